@@ -10,11 +10,24 @@ import sys
 import yaml
 import requests
 import json
+import time
 import logging
+import argparse
 from datetime import datetime
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Callable
 import urllib3
-from requests.auth import HTTPBasicAuth
+
+from redfish_client import RedfishClient
+from log_utils import setup_queue_logging
+from fanout import fan_out, DEFAULT_MAX_IN_FLIGHT
+from waves import run_waves, WaveRollout, DEFAULT_MAX_FAILURES
+from bmc_recovery import wait_for_bmc_recovery, DEFAULT_RECOVERY_DEADLINE
+
+# Auxiliary power reset action, on the chassis polled for recovery after it
+AUX_CHASSIS_PATH = "/redfish/v1/Chassis/BMC_0"
+
+# Manager whose uptime shows whether the BMC restarted after the power cycle
+AUX_MANAGER_PATH = "/redfish/v1/Managers/BMC_0"
 
 # Disable SSL warnings for self-signed certificates
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
@@ -26,7 +39,7 @@ class AuxPowerCycleError(Exception):
 
 
 def setup_logging():
-    """Set up logging to both console and file with timestamps."""
+    """Set up queue-backed logging to both console and file with timestamps."""
     # Create logs directory if it doesn't exist
     log_dir = './logs'
     if not os.path.exists(log_dir):
@@ -36,25 +49,8 @@ def setup_logging():
     # Set up logging configuration
     log_file = os.path.join(log_dir, 'aux_powercycle_compute.log')
     
-    # Create custom formatter with timestamp
-    formatter = logging.Formatter(
-        fmt='%(asctime)s - %(levelname)s - %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
-    
-    # Set up root logger
-    logger = logging.getLogger()
-    logger.setLevel(logging.INFO)
-    
-    # Remove any existing handlers
-    for handler in logger.handlers[:]:
-        logger.removeHandler(handler)
-    
-    # File handler (append mode) - console output handled by log_print function
-    file_handler = logging.FileHandler(log_file, mode='a', encoding='utf-8')
-    file_handler.setLevel(logging.INFO)
-    file_handler.setFormatter(formatter)
-    logger.addHandler(file_handler)
+    # Records are written by a background thread; see log_utils
+    logger = setup_queue_logging(log_file)
     
     return logger
 
@@ -128,12 +124,17 @@ def load_compute_hmc_yaml() -> Tuple[List[Dict], str, str]:
     return targets, username, password
 
 
-def execute_aux_power_cycle(ip: str, username: str, password: str, system_name: str) -> bool:
+def send_aux_power_cycle(client: RedfishClient, ip: str,
+                         log_detail: Callable[[str], None] = logging.info,
+                         timeout: int = 30) -> Tuple[bool, str]:
     """
-    Execute auxiliary power cycle via Redfish API.
-    Returns True if successful, False otherwise.
+    Send an auxiliary power cycle via Redfish API without printing.
+    Request and response details are passed to `log_detail` as one block once
+    the request has finished (the log file only, by default).
+    Returns tuple of (success, result message).
     """
-    url = f"https://{ip}/redfish/v1/Chassis/BMC_0/Actions/Oem/NvidiaChassis.AuxPowerReset"
+    path = f"{AUX_CHASSIS_PATH}/Actions/Oem/NvidiaChassis.AuxPowerReset"
+    url = client.url(ip, path)
     
     headers = {
         'Content-Type': 'application/json'
@@ -143,63 +144,110 @@ def execute_aux_power_cycle(ip: str, username: str, password: str, system_name:
         'ResetType': 'AuxPowerCycleForce'
     }
     
+    # Log request details
+    details = [
+        f"    Request URL: {url}",
+        f"    Request Headers: {headers}",
+        f"    Request Method: POST",
+        f"    Authentication: Basic (user: {client.username})",
+        f"    Request Payload: {json.dumps(payload)}"
+    ]
+    
     try:
-        log_print(f"  Sending auxiliary power cycle to {system_name} ({ip})...", end=" ", flush=True)
-        
-        # Log request details
-        log_print(f"\n    Request URL: {url}")
-        log_print(f"    Request Headers: {headers}")
-        log_print(f"    Request Method: POST")
-        log_print(f"    Authentication: Basic (user: {username})")
-        log_print(f"    Request Payload: {json.dumps(payload)}")
-        
-        response = requests.post(
-            url,
+        response = client.post(
+            ip,
+            path,
             headers=headers,
             json=payload,
-            auth=HTTPBasicAuth(username, password),
-            verify=False,
-            timeout=30
+            timeout=timeout
         )
         
         # Log comprehensive response details
-        log_print(f"\n    HTTP Response Details:")
-        log_print(f"    Status Code: {response.status_code}")
-        log_print(f"    Status Reason: {response.reason}")
-        log_print(f"    Response Headers: {dict(response.headers)}")
-        log_print(f"    Response URL: {response.url}")
-        log_print(f"    Response Time: {response.elapsed.total_seconds():.2f} seconds")
+        details.extend([
+            f"    HTTP Response Details:",
+            f"    Status Code: {response.status_code}",
+            f"    Status Reason: {response.reason}",
+            f"    Response Headers: {dict(response.headers)}",
+            f"    Response URL: {response.url}",
+            f"    Response Time: {response.elapsed.total_seconds():.2f} seconds"
+        ])
         
         # Log response content
         if response.text:
-            log_print(f"    Response Body:")
+            details.append(f"    Response Body:")
             try:
                 # Try to parse as JSON for prettier output
                 response_json = response.json()
-                log_print(f"    {json.dumps(response_json, indent=6)}")
+                details.append(f"    {json.dumps(response_json, indent=6)}")
             except:
                 # If not JSON, log as plain text
-                for line in response.text.splitlines():
-                    log_print(f"    {line}")
+                details.extend(f"    {line}" for line in response.text.splitlines())
         else:
-            log_print(f"    Response Body: (empty)")
+            details.append(f"    Response Body: (empty)")
         
         if response.status_code in [200, 202, 204]:
-            log_print("    Result: ✓ SUCCESS")
-            return True
-        else:
-            log_print(f"    Result: ✗ FAILED (HTTP {response.status_code})")
-            return False
+            return True, "✓ SUCCESS"
+        return False, f"✗ FAILED (HTTP {response.status_code})"
     
     except requests.exceptions.Timeout:
-        log_print("✗ FAILED (Timeout)")
-        return False
+        return False, "✗ FAILED (Timeout)"
     except requests.exceptions.ConnectionError:
-        log_print("✗ FAILED (Connection Error)")
-        return False
+        return False, "✗ FAILED (Connection Error)"
     except Exception as e:
-        log_print(f"✗ FAILED ({e})")
-        return False
+        return False, f"✗ FAILED ({e})"
+    finally:
+        log_detail("\n".join(details))
+
+
+def execute_aux_power_cycle(client: RedfishClient, ip: str, system_name: str) -> bool:
+    """
+    Execute auxiliary power cycle via Redfish API, showing the request and
+    response details.
+    Returns True if successful, False otherwise.
+    """
+    log_print(f"  Sending auxiliary power cycle to {system_name} ({ip})...")
+    
+    success, message = send_aux_power_cycle(client, ip, log_print)
+    log_print(f"    Result: {message}")
+    
+    return success
+
+
+def execute_aux_power_cycle_waves(client: RedfishClient, targets: List[Dict], wave_size: int,
+                                  max_failures: int = DEFAULT_MAX_FAILURES,
+                                  recovery_deadline: float = DEFAULT_RECOVERY_DEADLINE,
+                                  max_in_flight: int = DEFAULT_MAX_IN_FLIGHT) -> Tuple[WaveRollout, int]:
+    """
+    Auxiliary power cycle the systems in rolling waves of `wave_size`.
+    The systems of a wave are power cycled concurrently; the wave's health
+    gate then waits for each BMC to answer Redfish again before the next wave
+    starts. Systems that fail the command or the gate count towards
+    `max_failures`.
+    Returns tuple of (rollout, successful_operations).
+    """
+    cycle_times: Dict[str, float] = {}
+    
+    def cycle(target: Dict) -> Tuple[bool, str]:
+        success, message = send_aux_power_cycle(client, target['BMC_IP'])
+        if success:
+            cycle_times[target['BMC_IP']] = time.monotonic()
+        return success, message
+    
+    def report(index: int, target: Dict, result: Tuple[bool, str]) -> None:
+        log_print(f"  Auxiliary power cycle for {target['SYSTEM_NAME']} ({target['BMC_IP']})... {result[1]}")
+    
+    def run_wave(wave: List[Dict]) -> List[bool]:
+        results = fan_out(wave, cycle, max_in_flight=max_in_flight, on_result=report)
+        return [success for success, _ in results]
+    
+    def health_gate(wave: List[Dict]) -> List[bool]:
+        wave_recovered, _ = wait_for_bmc_recovery(wave, client, cycle_times, AUX_CHASSIS_PATH,
+                                                  recovery_deadline, max_in_flight=max_in_flight,
+                                                  log=log_print, manager_path=AUX_MANAGER_PATH)
+        return [target['BMC_IP'] in wave_recovered for target in wave]
+    
+    rollout = run_waves(targets, wave_size, run_wave, health_gate, max_failures, log=log_print)
+    return rollout, len(cycle_times)
 
 
 def get_unique_targets(targets: List[Dict]) -> List[Dict]:
@@ -246,8 +294,42 @@ def get_user_confirmation(targets: List[Dict]) -> bool:
             log_print("Please enter 'yes' or 'no'")
 
 
+def parse_arguments():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(
+        description='GB300 Compute Auxiliary Power Cycle Tool'
+    )
+    
+    parser.add_argument(
+        '--wave-size',
+        type=int,
+        default=0,
+        help='Power cycle this many systems at a time, waiting for their BMCs to answer Redfish '
+             'again before the next wave (default: 0 = one by one without waves)'
+    )
+    
+    parser.add_argument(
+        '--max-failures',
+        type=int,
+        default=DEFAULT_MAX_FAILURES,
+        help=f'With --wave-size, stop starting waves once more than this many systems failed '
+             f'(default: {DEFAULT_MAX_FAILURES})'
+    )
+    
+    parser.add_argument(
+        '--recovery-deadline',
+        type=float,
+        default=DEFAULT_RECOVERY_DEADLINE,
+        help=f'With --wave-size, seconds each BMC has to answer Redfish again (default: {DEFAULT_RECOVERY_DEADLINE})'
+    )
+    
+    return parser.parse_args()
+
+
 def main():
     """Main program flow."""
+    args = parse_arguments()
+    
     # Set up logging first (before any output)
     logger = setup_logging()
     log_session_start()
@@ -283,24 +365,29 @@ def main():
         success_count = 0
         total_count = len(unique_targets)
         
-        for i, target in enumerate(unique_targets, 1):
-            log_print(f"\n[{i}/{total_count}]", end=" ")
-            
-            success = execute_aux_power_cycle(
-                target['BMC_IP'],
-                username,
-                password,
-                target['SYSTEM_NAME']
-            )
-            
-            if success:
-                success_count += 1
-            
-            # Delay between operations to avoid overwhelming the network
-            if i < total_count:
-                log_print("  Waiting 3 seconds before next operation...")
-                import time
-                time.sleep(3)
+        rollout = None
+        with RedfishClient(username, password, pool_maxsize=DEFAULT_MAX_IN_FLIGHT) as client:
+            if args.wave_size > 0:
+                rollout, success_count = execute_aux_power_cycle_waves(
+                    client, unique_targets, args.wave_size, max(0, args.max_failures), args.recovery_deadline
+                )
+            else:
+                for i, target in enumerate(unique_targets, 1):
+                    log_print(f"\n[{i}/{total_count}]", end=" ")
+                    
+                    success = execute_aux_power_cycle(
+                        client,
+                        target['BMC_IP'],
+                        target['SYSTEM_NAME']
+                    )
+                    
+                    if success:
+                        success_count += 1
+                    
+                    # Delay between operations to avoid overwhelming the network
+                    if i < total_count:
+                        log_print("  Waiting 3 seconds before next operation...")
+                        time.sleep(3)
         
         # Final summary
         log_print(f"\n" + "=" * 60)
@@ -308,9 +395,18 @@ def main():
         log_print("=" * 60)
         log_print(f"Total systems: {total_count}")
         log_print(f"Successful operations: {success_count}")
-        log_print(f"Failed operations: {total_count - success_count}")
+        if rollout is not None:
+            log_print(f"Failed operations: {total_count - success_count - len(rollout.not_run)}")
+            log_print(f"BMCs answering again: {len(rollout.succeeded)}")
+            if rollout.not_run:
+                log_print(f"Not power cycled (stopped after failures): {len(rollout.not_run)}")
+        else:
+            log_print(f"Failed operations: {total_count - success_count}")
         
-        if success_count == total_count:
+        if rollout is not None and rollout.failed:
+            log_print("⚠ Some auxiliary power cycle operations failed. Check the output above for details.")
+            sys.exit(1)
+        elif success_count == total_count:
             log_print("✓ All auxiliary power cycle operations completed successfully!")
         else:
             log_print("⚠ Some auxiliary power cycle operations failed. Check the output above for details.")
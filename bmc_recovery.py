@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+GB300 BMC Recovery Helpers
+Waits for BMCs to answer Redfish again after a reset or power cycle, polling
+all of them concurrently with per-BMC backoff and deadlines.
+"""
+
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+from fanout import fan_out, DEFAULT_MAX_IN_FLIGHT
+from redfish_client import RedfishClient
+
+
+# Per-BMC deadline after its reset, first and maximum poll interval (seconds)
+DEFAULT_RECOVERY_DEADLINE = 600
+DEFAULT_RECOVERY_INTERVAL = 1.0
+DEFAULT_MAX_RECOVERY_INTERVAL = 15.0
+
+
+def is_bmc_responsive(client: RedfishClient, ip: str, path: str, timeout: int = 5) -> bool:
+    """Return True if the BMC's Redfish service answers a GET of `path`."""
+    try:
+        response = client.get(ip, path, timeout=timeout)
+        return response.status_code == 200
+    except Exception:
+        return False
+
+
+def _parse_redfish_time(value: Optional[str]) -> Optional[datetime]:
+    """Parse a Redfish DateTime string, or return None if it cannot be parsed."""
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+def check_bmc(client: RedfishClient, ip: str, path: str, manager_path: Optional[str] = None,
+              timeout: int = 5) -> Tuple[bool, Optional[float]]:
+    """
+    Check whether the BMC's Redfish service answers a GET of `path` and, if
+    `manager_path` is given, read how long its Manager has been up from the
+    Manager's own DateTime and LastResetTime (both on the BMC's clock).
+    Returns tuple of (responsive, uptime seconds or None if unknown).
+    """
+    try:
+        response = client.get(ip, path, timeout=timeout)
+        if response.status_code != 200:
+            return False, None
+        if manager_path is None:
+            return True, None
+        if manager_path != path:
+            response = client.get(ip, manager_path, timeout=timeout)
+            if response.status_code != 200:
+                return True, None
+        
+        data = response.json()
+        now = _parse_redfish_time(data.get('DateTime'))
+        last_reset = _parse_redfish_time(data.get('LastResetTime'))
+        if now is None or last_reset is None or (now.tzinfo is None) != (last_reset.tzinfo is None):
+            return True, None
+        return True, (now - last_reset).total_seconds()
+    except Exception:
+        return False, None
+
+
+def wait_for_bmc_recovery(targets: List[Dict], client: RedfishClient, reset_times: Dict[str, float],
+                          path: str, deadline: float = DEFAULT_RECOVERY_DEADLINE,
+                          interval: float = DEFAULT_RECOVERY_INTERVAL,
+                          max_interval: float = DEFAULT_MAX_RECOVERY_INTERVAL,
+                          max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+                          log: Callable[[str], None] = print,
+                          manager_path: Optional[str] = None) -> Tuple[Dict[str, float], List[Dict]]:
+    """
+    Poll every reset BMC concurrently until its Redfish service answers a GET
+    of `path` again.
+    Each BMC is polled every `interval` seconds until it stops answering, then
+    backs off to `max_interval` while it boots, and is given up on `deadline`
+    seconds after its own reset. A BMC only counts as recovered once it answers
+    after having been seen down, or, if `manager_path` is given, once its
+    Manager reports an uptime shorter than the time since the reset (it
+    restarted between polls). The old instance still answering before the
+    reset takes effect is thus not mistaken for recovery; a BMC that shows
+    no sign of restarting is reported as not reset. `reset_times` holds the
+    monotonic time of each reset by IP.
+    Result lines go to `log`; the running count is console only.
+    Returns tuple of (recovery seconds by IP, targets that did not recover).
+    """
+    log(f"\nWaiting for {len(targets)} BMCs to answer Redfish again (deadline {deadline:g}s per BMC)...")
+    
+    start = time.monotonic()
+    pending = {target['BMC_IP']: target for target in targets}
+    intervals = {ip: interval for ip in pending}
+    next_due = {ip: reset_times[ip] + interval for ip in pending}
+    seen_down = set()
+    recovered: Dict[str, float] = {}
+    unrecovered = []
+    
+    while pending:
+        now = time.monotonic()
+        due = [target for ip, target in pending.items() if next_due[ip] <= now]
+        # The uptime is only needed while a BMC has not been seen down
+        states = fan_out(
+            due,
+            lambda target: check_bmc(client, target['BMC_IP'], path,
+                                     manager_path if target['BMC_IP'] not in seen_down else None),
+            max_in_flight=max_in_flight
+        )
+        
+        now = time.monotonic()
+        for target, (responsive, uptime) in zip(due, states):
+            ip = target['BMC_IP']
+            elapsed = now - reset_times[ip]
+            restarted = ip in seen_down or (uptime is not None and 0 <= uptime < elapsed)
+            if responsive and restarted:
+                recovered[ip] = elapsed
+                del pending[ip]
+                line = f"  ✓ {target['SYSTEM_NAME']} ({ip}) recovered after {elapsed:.1f}s"
+                print("\r", end="")
+                log(f"{line:<50}")
+                continue
+            
+            if not responsive:
+                seen_down.add(ip)
+            if elapsed >= deadline:
+                unrecovered.append(target)
+                del pending[ip]
+                if ip in seen_down:
+                    line = f"  ✗ {target['SYSTEM_NAME']} ({ip}) not answering after {elapsed:.0f}s"
+                else:
+                    line = f"  ✗ {target['SYSTEM_NAME']} ({ip}) no restart observed, reset not taken"
+                print("\r", end="")
+                log(f"{line:<50}")
+                continue
+            
+            if ip in seen_down:
+                # Keep polling fast until the BMC goes down, then back off while it boots
+                intervals[ip] = min(intervals[ip] * 2, max_interval)
+            next_due[ip] = min(now + intervals[ip], reset_times[ip] + deadline)
+        
+        print(f"\r  Recovered: {len(recovered)}/{len(targets)} ({now - start:.0f}s elapsed)", end="", flush=True)
+        
+        if pending:
+            time.sleep(max(0.0, min(next_due[ip] for ip in pending) - time.monotonic()))
+    
+    print()
+    if unrecovered:
+        log(f"⚠ {len(unrecovered)} BMCs did not come back from a reset within {deadline:g}s:")
+        for target in unrecovered:
+            log(f"  - {target['SYSTEM_NAME']} ({target['BMC_IP']})")
+    else:
+        log(f"✓ All BMCs answering Redfish again after {time.monotonic() - start:.1f}s")
+    
+    return recovered, unrecovered
@@ -2,7 +2,7 @@
 """
 GB300 Compute HMC Sequential Update Script
 Creates Compute_Full.json and executes nvfwupd commands sequentially for each IP address
-from compute_hmc.yaml file.
+from compute_hmc.yaml file, or for several nodes at once with --parallel.
 """
 
 import os
@@ -11,8 +11,38 @@ import yaml
 import subprocess
 import json
 import logging
+import argparse
+import re
+import threading
+import time
 from datetime import datetime
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Optional, Callable
+
+from log_utils import setup_queue_logging
+from fanout import fan_out, DEFAULT_MAX_IN_FLIGHT
+from redfish_client import RedfishClient
+from fw_inventory import split_current_targets
+from waves import run_waves, WaveRollout, DEFAULT_MAX_FAILURES
+from bmc_recovery import is_bmc_responsive
+
+
+# Per-node nvfwupd timeout in seconds
+DEFAULT_NVFWUPD_TIMEOUT = 1800
+
+# Default maximum number of nvfwupd processes running at once in parallel mode
+DEFAULT_MAX_PARALLEL = 4
+
+# Directory for the per-node nvfwupd output logs written in parallel mode
+NODE_LOG_DIR = os.path.join('./logs', 'compute_hmc')
+
+# Minimum seconds between console progress lines per node in parallel mode
+PARALLEL_PROGRESS_INTERVAL = 10.0
+
+# Per-node progress journal used by --resume
+DEFAULT_JOURNAL_FILE = os.path.join('./logs', 'compute_hmc_journal.json')
+
+# Percentages in nvfwupd output, e.g. "PercentComplete: 40" or "Progress 40%"
+PERCENT_PATTERN = re.compile(r'(\d{1,3})(?:\.\d+)?\s*%|PercentComplete\W*(\d{1,3})')
 
 
 class HMCUpdateError(Exception):
@@ -21,7 +51,7 @@ class HMCUpdateError(Exception):
 
 
 def setup_logging():
-    """Set up logging to both console and file with timestamps."""
+    """Set up queue-backed logging to both console and file with timestamps."""
     # Create logs directory if it doesn't exist
     log_dir = './logs'
     if not os.path.exists(log_dir):
@@ -31,31 +61,8 @@ def setup_logging():
     # Set up logging configuration
     log_file = os.path.join(log_dir, 'compute_hmc.log')
     
-    # Create custom formatter with timestamp
-    formatter = logging.Formatter(
-        fmt='%(asctime)s - %(levelname)s - %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
-    
-    # Set up root logger
-    logger = logging.getLogger()
-    logger.setLevel(logging.INFO)
-    
-    # Remove any existing handlers
-    for handler in logger.handlers[:]:
-        logger.removeHandler(handler)
-    
-    # File handler (append mode)
-    file_handler = logging.FileHandler(log_file, mode='a', encoding='utf-8')
-    file_handler.setLevel(logging.INFO)
-    file_handler.setFormatter(formatter)
-    logger.addHandler(file_handler)
-    
-    # Console handler
-    console_handler = logging.StreamHandler(sys.stdout)
-    console_handler.setLevel(logging.INFO)
-    console_handler.setFormatter(logging.Formatter('%(message)s'))
-    logger.addHandler(console_handler)
+    # File records are written by a background thread; see log_utils
+    logger = setup_queue_logging(log_file, console=True)
     
     return logger
 
@@ -82,9 +89,196 @@ def log_session_start():
     logging.info(f"{separator}")
 
 
+def parse_arguments():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(
+        description='GB300 Compute HMC Update Tool',
+        epilog='''
+Examples:
+  python compute_hmc_sequential.py                              # One node at a time
+  python compute_hmc_sequential.py --parallel --max-parallel 6  # Six nodes at once
+  python compute_hmc_sequential.py --resume                     # Skip nodes already updated
+  python compute_hmc_sequential.py --wave-size 8                # Eight nodes at a time, checked between waves
+  python compute_hmc_sequential.py --force                      # Also update nodes already current
+        ''',
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    
+    parser.add_argument(
+        '--parallel',
+        action='store_true',
+        help='Run nvfwupd for several nodes at once instead of one at a time'
+    )
+    
+    parser.add_argument(
+        '--max-parallel',
+        type=int,
+        default=DEFAULT_MAX_PARALLEL,
+        help=f'Maximum concurrent nvfwupd processes in parallel and wave modes (default: {DEFAULT_MAX_PARALLEL})'
+    )
+    
+    parser.add_argument(
+        '--wave-size',
+        type=int,
+        default=0,
+        help='Update this many nodes at a time (concurrently), checking that their BMCs still answer '
+             'before the next wave (default: 0 = no waves)'
+    )
+    
+    parser.add_argument(
+        '--max-failures',
+        type=int,
+        default=DEFAULT_MAX_FAILURES,
+        help=f'With --wave-size, stop starting waves once more than this many nodes failed '
+             f'(default: {DEFAULT_MAX_FAILURES})'
+    )
+    
+    parser.add_argument(
+        '--timeout',
+        type=int,
+        default=DEFAULT_NVFWUPD_TIMEOUT,
+        help=f'Per-node nvfwupd timeout in seconds (default: {DEFAULT_NVFWUPD_TIMEOUT})'
+    )
+    
+    parser.add_argument(
+        '--force',
+        action='store_true',
+        help="Update every target, even those that already run the package's firmware"
+    )
+    
+    parser.add_argument(
+        '--resume',
+        action='store_true',
+        help='Continue an interrupted run: skip nodes the journal records as succeeded'
+    )
+    
+    return parser.parse_args()
+
+
 # JSON file creation removed - no longer needed for nvfwupd execution
 
 
+class UpdateJournal:
+    """
+    Crash-safe record of each node's update state for one package.
+    Nodes are keyed by BMC IP and move from pending to running to succeeded
+    or failed, with timestamps. Every change is written to a temporary file,
+    fsynced and atomically renamed over the journal, so the file on disk is
+    always complete even if the script is killed mid-write. A node left as
+    running was interrupted and is retried on resume. Write errors are
+    raised by start() and save(), which run before any update; once updates
+    are running they are only reported, so a full disk cannot abort a flash.
+    """
+    
+    def __init__(self, journal_file: str = DEFAULT_JOURNAL_FILE):
+        self.journal_file = journal_file
+        self._lock = threading.Lock()
+        self._data = {'package': None, 'target_platform': None, 'nodes': {}}
+        self._write_failed = False
+    
+    def load(self) -> bool:
+        """Load the journal file. Returns True if a readable journal was found."""
+        try:
+            with open(self.journal_file, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if not isinstance(data, dict) or not isinstance(data.get('nodes'), dict):
+            return False
+        self._data = data
+        return True
+    
+    def matches(self, package_path: str, target_platform: str) -> bool:
+        """Return True if the loaded journal was written for this package and platform."""
+        return (self._data.get('package') == os.path.abspath(package_path)
+                and self._data.get('target_platform') == target_platform)
+    
+    def start(self, targets: List[Dict], package_path: str, target_platform: str) -> None:
+        """Begin a new journal with every target pending."""
+        with self._lock:
+            self._data = {
+                'package': os.path.abspath(package_path),
+                'target_platform': target_platform,
+                'created': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                'nodes': {}
+            }
+            for target in targets:
+                self._data['nodes'][target['BMC_IP']] = {
+                    'system_name': target['SYSTEM_NAME'],
+                    'state': 'pending',
+                    'attempts': 0
+                }
+            self._write()
+    
+    def save(self) -> None:
+        """Write the journal as loaded, raising HMCUpdateError if it cannot be written."""
+        with self._lock:
+            self._write()
+    
+    def state(self, ip: str) -> Optional[str]:
+        """Return the recorded state of a node, or None if it is not in the journal."""
+        with self._lock:
+            return self._data['nodes'].get(ip, {}).get('state')
+    
+    def node(self, ip: str) -> Dict:
+        """Return a copy of the journal entry for a node."""
+        with self._lock:
+            return dict(self._data['nodes'].get(ip, {}))
+    
+    def mark_running(self, target: Dict) -> None:
+        """Record that nvfwupd has started for a node."""
+        with self._lock:
+            entry = self._data['nodes'].setdefault(
+                target['BMC_IP'], {'system_name': target['SYSTEM_NAME'], 'attempts': 0}
+            )
+            entry['state'] = 'running'
+            entry['attempts'] = entry.get('attempts', 0) + 1
+            entry['started'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            entry.pop('finished', None)
+            entry.pop('message', None)
+            self._save()
+    
+    def mark_finished(self, target: Dict, success: bool, message: str = '') -> None:
+        """Record the outcome of nvfwupd for a node."""
+        with self._lock:
+            entry = self._data['nodes'].setdefault(
+                target['BMC_IP'], {'system_name': target['SYSTEM_NAME'], 'attempts': 1}
+            )
+            entry['state'] = 'succeeded' if success else 'failed'
+            entry['finished'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            if message:
+                entry['message'] = message
+            self._save()
+    
+    def _save(self) -> None:
+        """
+        Write the journal from a node update, reporting (once) instead of
+        raising if it cannot be written. Caller must hold the lock.
+        """
+        try:
+            self._write()
+        except HMCUpdateError as e:
+            if not self._write_failed:
+                self._write_failed = True
+                log_print(f"⚠ {e}; node states are no longer being recorded")
+    
+    def _write(self) -> None:
+        """Write the journal atomically and durably. Caller must hold the lock."""
+        try:
+            journal_dir = os.path.dirname(self.journal_file)
+            if journal_dir and not os.path.exists(journal_dir):
+                os.makedirs(journal_dir)
+            
+            temp_file = f"{self.journal_file}.tmp"
+            with open(temp_file, 'w') as f:
+                json.dump(self._data, f, indent=2, sort_keys=True)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_file, self.journal_file)
+        except OSError as e:
+            raise HMCUpdateError(f"Cannot write journal {self.journal_file}: {e}")
+
+
 def load_compute_hmc_yaml() -> Tuple[List[Dict], str, str, str, str]:
     """
     Load and parse compute_hmc.yaml file.
@@ -167,13 +361,10 @@ def get_unique_targets(targets: List[Dict]) -> List[Dict]:
     return list(unique_targets.values())
 
 
-def execute_nvfwupd_command(ip: str, username: str, password: str, system_name: str, 
-                           package_path: str, target_platform: str) -> bool:
-    """
-    Execute nvfwupd command for a single target.
-    Returns True if successful, False otherwise.
-    """
-    cmd = [
+def build_nvfwupd_command(ip: str, username: str, password: str,
+                          package_path: str, target_platform: str) -> List[str]:
+    """Build the nvfwupd update_fw command line for a single target."""
+    return [
         'nvfwupd',
         '-t',
         f'ip={ip}',
@@ -184,6 +375,100 @@ def execute_nvfwupd_command(ip: str, username: str, password: str, system_name:
         '-p',
         f'"{package_path}"'  # Use absolute path in double quotes
     ]
+
+
+def parse_percent(line: str) -> Optional[int]:
+    """Return the last progress percentage in a line of nvfwupd output, or None."""
+    percent = None
+    for match in PERCENT_PATTERN.finditer(line):
+        value = int(match.group(1) or match.group(2))
+        if value <= 100:
+            percent = value
+    return percent
+
+
+def stream_nvfwupd(cmd: List[str], system_name: str, timeout: int,
+                   write: Callable[[str], None],
+                   on_progress: Optional[Callable[[int], None]] = None) -> Tuple[Optional[int], Optional[int]]:
+    """
+    Run nvfwupd and pass its output on line by line as it is produced.
+    Every stdout and stderr line is prefixed with a timestamp and the system
+    name and handed to `write` straight away, so memory use does not grow with
+    the output. `on_progress(percent)` is called whenever a new percentage is
+    seen. The process is killed once `timeout` seconds have passed.
+    Returns tuple of (exit code or None on timeout, last percentage seen or None).
+    Raises FileNotFoundError if nvfwupd is not installed.
+    """
+    process = subprocess.Popen(
+        cmd,
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        encoding='utf-8',
+        errors='replace',
+        bufsize=1
+    )
+    
+    timed_out = threading.Event()
+    
+    def kill() -> None:
+        timed_out.set()
+        process.kill()
+    
+    timer = threading.Timer(timeout, kill)
+    timer.daemon = True
+    timer.start()
+    
+    write_lock = threading.Lock()
+    percent = [None]
+    
+    def forward(stream, label: str) -> None:
+        for line in stream:
+            line = line.rstrip()
+            if not line:
+                continue
+            timestamp = datetime.now().strftime('%H:%M:%S')
+            with write_lock:
+                write(f"{timestamp} [{system_name}]{label} {line}")
+                value = parse_percent(line)
+                if value is not None and value != percent[0]:
+                    percent[0] = value
+                    if on_progress is not None:
+                        on_progress(value)
+    
+    # stderr is drained on its own thread so neither pipe can fill up and block nvfwupd
+    stderr_thread = threading.Thread(target=forward, args=(process.stderr, ' stderr:'), daemon=True)
+    stderr_thread.start()
+    try:
+        # Automatically respond "Y" to the confirmation prompt
+        process.stdin.write("Y\n")
+        process.stdin.close()
+    except OSError:
+        pass
+    
+    try:
+        forward(process.stdout, '')
+        stderr_thread.join()
+        returncode = process.wait()
+    finally:
+        timer.cancel()
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+    
+    return (None if timed_out.is_set() else returncode), percent[0]
+
+
+def execute_nvfwupd_command(ip: str, username: str, password: str, system_name: str, 
+                           package_path: str, target_platform: str,
+                           timeout: int = DEFAULT_NVFWUPD_TIMEOUT) -> bool:
+    """
+    Execute nvfwupd command for a single target.
+    Output is shown and logged line by line while nvfwupd runs, and each new
+    progress percentage parsed from it is shown on its own line.
+    Returns True if successful, False otherwise.
+    """
+    cmd = build_nvfwupd_command(ip, username, password, package_path, target_platform)
     
     log_print(f"\n  Executing nvfwupd for {system_name} ({ip})...")
     log_print(f"  Package file: {package_path}")
@@ -191,37 +476,23 @@ def execute_nvfwupd_command(ip: str, username: str, password: str, system_name:
     log_print(f"  Command: {' '.join(cmd)}")
     
     try:
-        # Execute the command and capture output, with automatic "Y" response
-        result = subprocess.run(
-            cmd,
-            input="Y\n",  # Automatically respond "Y" to confirmation prompt
-            capture_output=True,
-            text=True,
-            timeout=1800  # 30 minute timeout
+        returncode, percent = stream_nvfwupd(
+            cmd, system_name, timeout, lambda line: log_print(f"    {line}", flush=True),
+            on_progress=lambda value: print(f"  Progress: {system_name} ({ip}) {value}%", flush=True)
         )
         
-        # Log the command output
-        if result.stdout:
-            log_print("  STDOUT:")
-            for line in result.stdout.splitlines():
-                log_print(f"    {line}")
-        
-        if result.stderr:
-            log_print("  STDERR:")
-            for line in result.stderr.splitlines():
-                log_print(f"    {line}")
-        
         # Check return code
-        if result.returncode == 0:
+        if returncode == 0:
             log_print(f"  ✓ SUCCESS - nvfwupd completed for {system_name}")
             return True
+        
+        progress = f", last progress {percent}%" if percent is not None else ""
+        if returncode is None:
+            log_print(f"  ✗ FAILED - nvfwupd timed out for {system_name}{progress}")
         else:
-            log_print(f"  ✗ FAILED - nvfwupd failed for {system_name} (exit code: {result.returncode})")
-            return False
-    
-    except subprocess.TimeoutExpired:
-        log_print(f"  ✗ FAILED - nvfwupd timed out for {system_name}")
+            log_print(f"  ✗ FAILED - nvfwupd failed for {system_name} (exit code: {returncode}{progress})")
         return False
+    
     except FileNotFoundError:
         log_print(f"  ✗ FAILED - nvfwupd command not found. Please ensure nvfwupd is installed and in PATH.")
         return False
@@ -230,6 +501,260 @@ def execute_nvfwupd_command(ip: str, username: str, password: str, system_name:
         return False
 
 
+def format_duration(seconds: float) -> str:
+    """Format a duration as e.g. "42s" or "12m 03s"."""
+    minutes, seconds = divmod(int(seconds), 60)
+    return f"{minutes}m {seconds:02d}s" if minutes else f"{seconds}s"
+
+
+def node_log_path(target: Dict) -> str:
+    """Return the per-node nvfwupd log file path for a target."""
+    safe_name = "".join(c if c.isalnum() or c in '-_.' else '_' for c in target['SYSTEM_NAME'])
+    return os.path.join(NODE_LOG_DIR, f"{safe_name}_{target['BMC_IP']}.log")
+
+
+def run_nvfwupd_to_log(target: Dict, username: str, password: str, package_path: str,
+                       target_platform: str, timeout: int = DEFAULT_NVFWUPD_TIMEOUT,
+                       on_progress: Optional[Callable[[int], None]] = None) -> Dict:
+    """
+    Run nvfwupd for one target without printing.
+    Output is streamed line by line into the node's own log file as it is
+    written; `on_progress(percent)` is called as new percentages appear.
+    Returns a dict with success, message, log_file, elapsed (seconds) and
+    percent (last progress seen, or None).
+    """
+    ip = target['BMC_IP']
+    log_file = node_log_path(target)
+    cmd = build_nvfwupd_command(ip, username, password, package_path, target_platform)
+    result = {'success': False, 'message': '', 'log_file': log_file, 'elapsed': 0.0, 'percent': None}
+    
+    start = time.monotonic()
+    try:
+        with open(log_file, 'a', encoding='utf-8') as f:
+            f.write(f"\n{'=' * 80}\n")
+            f.write(f"{datetime.now().strftime('%Y-%m-%d %H:%M:%S')} - "
+                    f"nvfwupd for {target['SYSTEM_NAME']} ({ip})\n")
+            f.write(f"Command: {' '.join(cmd)}\n")
+            f.write(f"{'=' * 80}\n")
+            f.flush()
+            
+            def write(line: str) -> None:
+                f.write(line + "\n")
+                f.flush()
+            
+            returncode, result['percent'] = stream_nvfwupd(cmd, target['SYSTEM_NAME'], timeout,
+                                                           write, on_progress)
+            
+            result['elapsed'] = time.monotonic() - start
+            f.write(f"\n{datetime.now().strftime('%Y-%m-%d %H:%M:%S')} - "
+                    f"exit code: {returncode if returncode is not None else 'timeout'}, "
+                    f"{result['elapsed']:.0f}s\n")
+        
+        if returncode == 0:
+            result['success'] = True
+            result['message'] = "✓ SUCCESS"
+        elif returncode is None:
+            result['message'] = f"✗ FAILED (timed out after {timeout}s)"
+        else:
+            result['message'] = f"✗ FAILED (exit code: {returncode})"
+        if not result['success'] and result['percent'] is not None:
+            result['message'] += f" at {result['percent']}%"
+    
+    except FileNotFoundError:
+        result['message'] = "✗ FAILED (nvfwupd command not found)"
+    except Exception as e:
+        result['message'] = f"✗ FAILED ({e})"
+    
+    if not result['elapsed']:
+        result['elapsed'] = time.monotonic() - start
+    
+    return result
+
+
+def execute_sequential_updates(targets: List[Dict], username: str, password: str,
+                               package_path: str, target_platform: str,
+                               timeout: int = DEFAULT_NVFWUPD_TIMEOUT,
+                               journal: Optional[UpdateJournal] = None) -> int:
+    """
+    Run nvfwupd for one target at a time, pausing between them.
+    Each node's state is recorded in `journal`, if given.
+    Returns the number of successful updates.
+    """
+    success_count = 0
+    total_count = len(targets)
+    
+    for i, target in enumerate(targets, 1):
+        log_print(f"\n[{i}/{total_count}] Processing {target['SYSTEM_NAME']} ({target['BMC_IP']})")
+        
+        if journal is not None:
+            journal.mark_running(target)
+        
+        success = execute_nvfwupd_command(
+            target['BMC_IP'],
+            username,
+            password,
+            target['SYSTEM_NAME'],
+            package_path,
+            target_platform,
+            timeout
+        )
+        
+        if journal is not None:
+            journal.mark_finished(target, success)
+        
+        if success:
+            success_count += 1
+        
+        # Add a brief delay between updates
+        if i < total_count:
+            log_print("  Waiting 3 seconds before next update...")
+            time.sleep(3)
+    
+    return success_count
+
+
+def execute_parallel_updates(targets: List[Dict], username: str, password: str,
+                             package_path: str, target_platform: str,
+                             max_parallel: int = DEFAULT_MAX_PARALLEL,
+                             timeout: int = DEFAULT_NVFWUPD_TIMEOUT,
+                             journal: Optional[UpdateJournal] = None) -> List[Dict]:
+    """
+    Run nvfwupd for all targets concurrently.
+    At most `max_parallel` nvfwupd processes run at once, each with its own
+    timeout. Each node's output goes to its own log file under NODE_LOG_DIR;
+    the console gets one line when a node starts and one when it finishes,
+    plus its progress percentage at most every PARALLEL_PROGRESS_INTERVAL seconds.
+    Each node's state is recorded in `journal`, if given.
+    Returns the nvfwupd result dicts, in target order.
+    """
+    if not os.path.exists(NODE_LOG_DIR):
+        os.makedirs(NODE_LOG_DIR)
+    
+    total = len(targets)
+    start = time.monotonic()
+    completed = [0]
+    output_lock = threading.Lock()
+    
+    def progress_reporter(target: Dict) -> Callable[[int], None]:
+        last_report = [0.0]
+        
+        def show_progress(percent: int) -> None:
+            now = time.monotonic()
+            if percent < 100 and now - last_report[0] >= PARALLEL_PROGRESS_INTERVAL:
+                last_report[0] = now
+                with output_lock:
+                    print(f"    {target['SYSTEM_NAME']} ({target['BMC_IP']}): {percent}%")
+        return show_progress
+    
+    def run(target: Dict) -> Dict:
+        with output_lock:
+            log_print(f"  Started {target['SYSTEM_NAME']} ({target['BMC_IP']}) - "
+                      f"output: {node_log_path(target)}")
+        if journal is not None:
+            journal.mark_running(target)
+        result = run_nvfwupd_to_log(target, username, password, package_path, target_platform,
+                                    timeout, progress_reporter(target))
+        if journal is not None:
+            journal.mark_finished(target, result['success'], result['message'])
+        return result
+    
+    def report(index: int, target: Dict, result: Dict) -> None:
+        completed[0] += 1
+        with output_lock:
+            log_print(f"[{completed[0]}/{total}] {target['SYSTEM_NAME']} ({target['BMC_IP']}): "
+                      f"{result['message']} ({format_duration(result['elapsed'])})")
+    
+    results = fan_out(targets, run, max_in_flight=max_parallel, on_result=report)
+    
+    log_print(f"nvfwupd finished on {total} systems in {format_duration(time.monotonic() - start)}")
+    failed = [(target, result) for target, result in zip(targets, results) if not result['success']]
+    if failed:
+        log_print("Logs of failed systems:")
+        for target, result in failed:
+            log_print(f"  - {target['SYSTEM_NAME']} ({target['BMC_IP']}): {result['log_file']}")
+    
+    return results
+
+
+def execute_update_waves(targets: List[Dict], username: str, password: str,
+                         package_path: str, target_platform: str, wave_size: int,
+                         max_failures: int = DEFAULT_MAX_FAILURES,
+                         timeout: int = DEFAULT_NVFWUPD_TIMEOUT,
+                         journal: Optional[UpdateJournal] = None,
+                         max_parallel: int = DEFAULT_MAX_PARALLEL) -> WaveRollout:
+    """
+    Run nvfwupd in rolling waves of `wave_size` nodes.
+    The nodes of a wave are updated concurrently as in parallel mode (at
+    most `max_parallel` nvfwupd processes at once); the wave's health gate
+    then checks that each updated node's BMC still answers Redfish before
+    the next wave starts. Failed updates and unresponsive BMCs
+    count towards `max_failures` and are journaled as failed; nodes never
+    started stay pending, so --resume picks up both.
+    Returns the WaveRollout.
+    """
+    def run_wave(wave: List[Dict]) -> List[bool]:
+        results = execute_parallel_updates(wave, username, password, package_path, target_platform,
+                                           min(max_parallel, len(wave)), timeout, journal)
+        return [result['success'] for result in results]
+    
+    def health_gate(wave: List[Dict]) -> List[bool]:
+        log_print(f"\nChecking that {len(wave)} BMCs still answer Redfish...")
+        with RedfishClient(username, password, pool_maxsize=DEFAULT_MAX_IN_FLIGHT) as client:
+            responsive = fan_out(
+                wave,
+                lambda target: is_bmc_responsive(client, target['BMC_IP'], "/redfish/v1/UpdateService", timeout=30)
+            )
+        
+        unhealthy = [target for target, ok in zip(wave, responsive) if not ok]
+        for target in unhealthy:
+            log_print(f"  ✗ {target['SYSTEM_NAME']} ({target['BMC_IP']}): BMC not answering after update")
+            if journal is not None:
+                journal.mark_finished(target, False, "BMC not answering after update")
+        if not unhealthy:
+            log_print(f"✓ All {len(wave)} BMCs answering")
+        return responsive
+    
+    return run_waves(targets, wave_size, run_wave, health_gate, max_failures, log=log_print)
+
+
+def select_resume_targets(journal: UpdateJournal, targets: List[Dict], package_path: str,
+                          target_platform: str) -> Tuple[List[Dict], List[Dict]]:
+    """
+    Split targets using the journal of a previous run of the same package.
+    Nodes recorded as succeeded are skipped; pending, failed and interrupted
+    (still running) nodes are updated again. Without a matching journal every
+    target is updated.
+    Returns tuple of (remaining_targets, completed_targets).
+    """
+    if not journal.load():
+        log_print(f"⚠ No journal found at {journal.journal_file}; updating all systems")
+        return targets, []
+    
+    if not journal.matches(package_path, target_platform):
+        log_print(f"⚠ Journal at {journal.journal_file} is for a different package or platform; "
+                  f"updating all systems")
+        return targets, []
+    
+    remaining = []
+    completed = []
+    for target in targets:
+        entry = journal.node(target['BMC_IP'])
+        if entry.get('state') == 'succeeded':
+            completed.append(target)
+            continue
+        remaining.append(target)
+        if entry.get('state') == 'running':
+            log_print(f"  - {target['SYSTEM_NAME']} ({target['BMC_IP']}) was interrupted "
+                      f"(started {entry.get('started')}); retrying")
+        elif entry.get('state') == 'failed':
+            log_print(f"  - {target['SYSTEM_NAME']} ({target['BMC_IP']}) failed "
+                      f"at {entry.get('finished')}; retrying")
+    
+    log_print(f"✓ Resuming from {journal.journal_file}: {len(completed)} systems already updated, "
+              f"{len(remaining)} remaining")
+    return remaining, completed
+
+
 def display_summary(targets: List[Dict], package_path: str) -> None:
     """Display update summary before execution."""
     log_print(f"\n" + "=" * 60)
@@ -266,6 +791,9 @@ def get_user_confirmation(targets: List[Dict]) -> bool:
 
 def main():
     """Main program flow."""
+    # Parse command line arguments
+    args = parse_arguments()
+    
     # Set up logging first (before any output)
     logger = setup_logging()
     log_session_start()
@@ -289,6 +817,33 @@ def main():
         log_print(f"\n✓ Using credentials - Username: {username}")
         log_print(f"✓ Target platform: {target_platform}")
         
+        # The journal records every node's state so an interrupted run can be resumed
+        journal = UpdateJournal()
+        total_count = len(unique_targets)
+        completed_targets = []
+        if args.resume:
+            unique_targets, completed_targets = select_resume_targets(
+                journal, unique_targets, package_path, target_platform
+            )
+            if not unique_targets:
+                log_print("✓ All HMC firmware updates already completed; nothing to resume.")
+                return
+        
+        # Pre-flight: drop targets that already run the package's firmware
+        skipped_count = 0
+        if not args.force:
+            log_print("\nChecking installed firmware versions...")
+            with RedfishClient(username, password, pool_maxsize=DEFAULT_MAX_IN_FLIGHT) as client:
+                unique_targets, current_targets, notes = split_current_targets(
+                    client, unique_targets, package_path
+                )
+            for note in notes:
+                log_print(note)
+            skipped_count = len(current_targets)
+            if not unique_targets:
+                log_print("✓ All systems already run this firmware; nothing to update.")
+                return
+        
         # Display summary and get confirmation
         display_summary(unique_targets, package_path)
         
@@ -296,52 +851,72 @@ def main():
             log_print("Operation cancelled by user.")
             return
         
-        # Execute HMC updates sequentially
+        # Keep the history of a resumed journal, even if no node has succeeded yet.
+        # Either way the journal is written once here, so an unwritable file stops
+        # the run before any node is touched
+        if not journal.matches(package_path, target_platform):
+            journal.start(unique_targets, package_path, target_platform)
+        else:
+            journal.save()
+        
+        # Execute HMC updates
         log_print(f"\n" + "=" * 60)
         log_print("EXECUTING HMC FIRMWARE UPDATES")
         log_print("=" * 60)
-        log_print(f"Processing {len(unique_targets)} unique systems sequentially...")
         
-        success_count = 0
-        total_count = len(unique_targets)
+        update_count = len(unique_targets)
+        not_run_count = 0
         
-        for i, target in enumerate(unique_targets, 1):
-            log_print(f"\n[{i}/{total_count}] Processing {target['SYSTEM_NAME']} ({target['BMC_IP']})")
-            
-            success = execute_nvfwupd_command(
-                target['BMC_IP'],
-                username,
-                password,
-                target['SYSTEM_NAME'],
-                package_path,
-                target_platform
+        if args.wave_size > 0:
+            log_print(f"Processing {update_count} unique systems in waves of {args.wave_size} "
+                      f"({args.timeout}s timeout per node)...")
+            rollout = execute_update_waves(
+                unique_targets, username, password, package_path, target_platform, args.wave_size,
+                max(0, args.max_failures), args.timeout, journal, max(1, args.max_parallel)
+            )
+            success_count = len(rollout.succeeded)
+            not_run_count = len(rollout.not_run)
+        elif args.parallel:
+            max_parallel = max(1, args.max_parallel)
+            log_print(f"Processing {update_count} unique systems in parallel "
+                      f"(up to {max_parallel} at once, {args.timeout}s timeout per node)...")
+            results = execute_parallel_updates(
+                unique_targets, username, password, package_path, target_platform,
+                max_parallel, args.timeout, journal
+            )
+            success_count = sum(1 for result in results if result['success'])
+        else:
+            log_print(f"Processing {update_count} unique systems sequentially...")
+            success_count = execute_sequential_updates(
+                unique_targets, username, password, package_path, target_platform, args.timeout,
+                journal
             )
-            
-            if success:
-                success_count += 1
-            
-            # Add a brief delay between updates
-            if i < total_count:
-                log_print("  Waiting 3 seconds before next update...")
-                import time
-                time.sleep(3)
         
         # Final summary
         log_print(f"\n" + "=" * 60)
         log_print("HMC UPDATE SUMMARY")
         log_print("=" * 60)
         log_print(f"Total systems: {total_count}")
+        if completed_targets:
+            log_print(f"Already updated (skipped): {len(completed_targets)}")
+        if skipped_count:
+            log_print(f"Already current (skipped by version check): {skipped_count}")
         log_print(f"Successful updates: {success_count}")
-        log_print(f"Failed updates: {total_count - success_count}")
+        log_print(f"Failed updates: {update_count - success_count - not_run_count}")
+        if not_run_count:
+            log_print(f"Not updated (stopped after failures): {not_run_count}")
+        log_print(f"Journal: {journal.journal_file}")
         
-        if success_count == total_count:
+        if success_count == update_count:
             log_print("✓ All HMC firmware updates completed successfully!")
         else:
             log_print("⚠ Some HMC firmware updates failed. Check the output above for details.")
+            log_print("  Rerun with --resume to retry only the systems that did not succeed.")
             sys.exit(1)
     
     except KeyboardInterrupt:
         log_print("\n\nOperation cancelled by user.")
+        log_print("Rerun with --resume to continue with the systems that did not finish.")
         sys.exit(1)
     except HMCUpdateError as e:
         log_print(f"\nError: {e}")
@@ -9,23 +9,41 @@ import os
 import sys
 import yaml
 import requests
-import json
 import logging
+import argparse
+import time
 from datetime import datetime
 from typing import List, Dict, Tuple, Optional
 import urllib3
-from requests.auth import HTTPBasicAuth
+
+from redfish_client import RedfishClient
+from fanout import fan_out
+from log_utils import ResponseLogger
+from redfish_tasks import (
+    TaskTracker, watch_tasks, aggregate_exit_code, is_terminal_state, is_result_finished,
+    get_member_task_ids,
+    DEFAULT_ACTIVE_INTERVAL, DEFAULT_IDLE_INTERVAL, DEFAULT_MAX_WATCH_ERRORS, EXIT_SUCCESS, EXIT_TASK_FAILED
+)
+
+# Default number of BMCs queried concurrently
+DEFAULT_WORKERS = 32
+
+# Default Redfish request timeout in seconds
+DEFAULT_TIMEOUT = 30
 
 # Disable SSL warnings for self-signed certificates
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
+# Task detail responses: summaries at INFO, full bodies only at DEBUG
+RESPONSE_LOG = ResponseLogger()
+
 
 class RedfishStatusError(Exception):
     """Custom exception for Redfish status operations."""
     pass
 
 
-def setup_logging():
+def setup_logging(level: int = logging.INFO):
     """Set up logging to file with timestamps."""
     # Create logs directory if it doesn't exist
     log_dir = './logs'
@@ -44,7 +62,7 @@ def setup_logging():
     
     # Set up root logger
     logger = logging.getLogger()
-    logger.setLevel(logging.INFO)
+    logger.setLevel(level)
     
     # Remove any existing handlers
     for handler in logger.handlers[:]:
@@ -52,10 +70,13 @@ def setup_logging():
     
     # File handler (append mode)
     file_handler = logging.FileHandler(log_file, mode='a', encoding='utf-8')
-    file_handler.setLevel(logging.INFO)
+    file_handler.setLevel(level)
     file_handler.setFormatter(formatter)
     logger.addHandler(file_handler)
     
+    # Keep connection-level chatter out of the debug log
+    logging.getLogger('urllib3').setLevel(logging.WARNING)
+    
     return logger
 
 
@@ -118,20 +139,13 @@ def load_compute_bmc_yaml() -> Tuple[List[Dict], str, str]:
     return targets, username, password
 
 
-def get_task_collection(ip: str, username: str, password: str) -> Optional[Dict]:
+def get_task_collection(client: RedfishClient, ip: str, timeout: int = DEFAULT_TIMEOUT) -> Optional[Dict]:
     """
     Get the task collection from Redfish TaskService.
     Returns the JSON response or None if failed.
     """
-    url = f"https://{ip}/redfish/v1/TaskService/Tasks/"
-    
     try:
-        response = requests.get(
-            url,
-            auth=HTTPBasicAuth(username, password),
-            verify=False,
-            timeout=30
-        )
+        response = client.get(ip, "/redfish/v1/TaskService/Tasks/", timeout=timeout)
         
         if response.status_code == 200:
             return response.json()
@@ -150,67 +164,31 @@ def get_task_collection(ip: str, username: str, password: str) -> Optional[Dict]
         return None
 
 
-def get_latest_task_id(task_collection: Dict) -> Optional[str]:
-    """
-    Extract the latest (highest numbered) task ID from the task collection.
-    Returns the task ID string or None if no tasks found.
-    """
-    try:
-        members = task_collection.get('Members', [])
-        if not members:
-            return None
-        
-        # Extract task IDs from the @odata.id paths
-        task_ids = []
-        for member in members:
-            odata_id = member.get('@odata.id', '')
-            # Extract the task ID from paths like "/redfish/v1/TaskService/Tasks/13"
-            if '/Tasks/' in odata_id:
-                task_id = odata_id.split('/Tasks/')[-1]
-                if task_id.isdigit():
-                    task_ids.append(int(task_id))
-        
-        if task_ids:
-            # Return the highest task ID as string
-            return str(max(task_ids))
-        
-        return None
-    
-    except Exception as e:
-        logging.error(f"Error extracting task ID: {e}")
-        return None
-
-
-def get_task_details(ip: str, username: str, password: str, task_id: str) -> Optional[Dict]:
+def get_task_details(client: RedfishClient, ip: str, task_id: str,
+                     timeout: int = DEFAULT_TIMEOUT) -> Optional[Dict]:
     """
     Get detailed information for a specific task.
     Returns the JSON response or None if failed.
     """
-    url = f"https://{ip}/redfish/v1/TaskService/Tasks/{task_id}"
-    
     try:
-        response = requests.get(
-            url,
-            auth=HTTPBasicAuth(username, password),
-            verify=False,
-            timeout=30
-        )
+        response = client.get(ip, f"/redfish/v1/TaskService/Tasks/{task_id}", timeout=timeout)
         
-        # Log the full response
-        logging.info(f"Task details response from {ip} (Task {task_id}):")
-        logging.info(f"Status Code: {response.status_code}")
-        logging.info(f"Response Headers: {dict(response.headers)}")
+        # Parse the body once for both logging and the return value
+        task_details = None
         if response.text:
             try:
-                response_json = response.json()
-                logging.info(f"Response Body: {json.dumps(response_json, indent=2)}")
-            except:
-                logging.info(f"Response Body (raw): {response.text}")
-        else:
-            logging.info("Response Body: (empty)")
+                task_details = response.json()
+            except ValueError:
+                pass
+        
+        summary = ''
+        if isinstance(task_details, dict):
+            summary = (f"TaskState: {task_details.get('TaskState')}, "
+                       f"PercentComplete: {task_details.get('PercentComplete')}")
+        RESPONSE_LOG.log_response(ip, f"Task {task_id}", response, task_details, summary)
         
         if response.status_code == 200:
-            return response.json()
+            return task_details
         else:
             logging.error(f"Failed to get task details from {ip}: HTTP {response.status_code}")
             return None
@@ -251,10 +229,211 @@ def get_unique_targets(targets: List[Dict]) -> List[Dict]:
     return list(unique_targets.values())
 
 
+def check_task_status(client: RedfishClient, target: Dict, timeout: int = DEFAULT_TIMEOUT,
+                      tracker: Optional[TaskTracker] = None) -> Dict:
+    """
+    Look up the latest task on one BMC.
+    With a tracker, only tasks newer than the last-seen one are fetched;
+    otherwise the whole task collection is read.
+    Returns a dict with ip, system_name, task_id, task_state, task_status,
+    percent_complete, status and error.
+    """
+    result = {
+        'ip': target['BMC_IP'],
+        'system_name': target['SYSTEM_NAME'],
+        'task_id': None,
+        'task_state': None,
+        'task_status': None,
+        'percent_complete': None,
+        'status': None,
+        'error': False
+    }
+    ip = result['ip']
+    
+    if tracker is not None:
+        collection_read, task_id = tracker.latest_task_id(client, ip, timeout)
+    else:
+        # Get task collection
+        task_collection = get_task_collection(client, ip, timeout)
+        collection_read = task_collection is not None
+        
+        # Get latest (highest numbered) task ID
+        task_ids = get_member_task_ids(task_collection.get('Members', [])) if task_collection else []
+        task_id = str(max(task_ids)) if task_ids else None
+    
+    if not collection_read:
+        result['status'] = "ERROR - Could not get task collection"
+        result['error'] = True
+        return result
+    
+    if not task_id:
+        result['status'] = "NO TASKS FOUND"
+        return result
+    result['task_id'] = task_id
+    
+    # Get task details
+    task_details = get_task_details(client, ip, task_id, timeout)
+    if not task_details:
+        result['status'] = f"ERROR - Could not get details for task {task_id}"
+        result['error'] = True
+        if tracker is not None:
+            # The remembered task may be gone (e.g. IDs reset after a BMC reboot)
+            tracker.forget(ip)
+        return result
+    
+    return apply_task_details(result, task_details)
+
+
+def apply_task_details(result: Dict, task_details: Dict) -> Dict:
+    """Fill a status result from a task resource. Returns the updated result."""
+    result['task_state'] = task_details.get('TaskState')
+    result['task_status'] = task_details.get('TaskStatus')
+    result['percent_complete'] = get_percent_complete(task_details)
+    result['error'] = False
+    if result['percent_complete'] is not None:
+        result['status'] = f"PercentComplete: {result['percent_complete']}%"
+    else:
+        result['status'] = "PercentComplete: Not Available"
+    
+    return result
+
+
+def refresh_task_status(client: RedfishClient, target: Dict, previous: Optional[Dict],
+                        timeout: int = DEFAULT_TIMEOUT,
+                        tracker: Optional[TaskTracker] = None) -> Dict:
+    """
+    Re-poll one BMC in watch mode.
+    An active task is re-read directly by ID; finished, missing or failed
+    lookups check the task collection again so newer tasks are picked up.
+    Returns a status result dict.
+    """
+    if previous and previous['task_id'] and not previous['error'] \
+            and not is_terminal_state(previous['task_state']):
+        task_details = get_task_details(client, target['BMC_IP'], previous['task_id'], timeout)
+        if task_details:
+            return apply_task_details(dict(previous), task_details)
+    
+    return check_task_status(client, target, timeout, tracker)
+
+
+def format_status_table(results: List[Dict]) -> List[str]:
+    """Format the task status of every system as aligned table lines."""
+    headers = ['System', 'BMC IP', 'Task', 'State', 'Complete', 'Status']
+    rows = []
+    for result in results:
+        percent = result['percent_complete']
+        rows.append([
+            result['system_name'],
+            result['ip'],
+            result['task_id'] or '-',
+            result['task_state'] or '-',
+            f"{percent}%" if percent is not None else '-',
+            '' if percent is not None else result['status']
+        ])
+    
+    widths = [max(len(str(row[i])) for row in rows + [headers]) for i in range(len(headers))]
+    lines = ["  ".join(header.ljust(width) for header, width in zip(headers, widths)).rstrip()]
+    lines.append("  ".join('-' * width for width in widths))
+    for row in rows:
+        lines.append("  ".join(str(value).ljust(width) for value, width in zip(row, widths)).rstrip())
+    
+    return lines
+
+
+def display_status_table(results: List[Dict]) -> None:
+    """Print the task status of every system as one aligned table."""
+    for line in format_status_table(results):
+        print(line)
+
+
+def render_watch_dashboard(results: List[Dict]) -> List[str]:
+    """Build the watch mode dashboard lines."""
+    finished = sum(1 for result in results if is_result_finished(result))
+    unreachable = sum(1 for result in results if result['error'])
+    
+    lines = [f"Watching {len(results)} systems - {finished} finished, "
+             f"{len(results) - finished - unreachable} active, {unreachable} unreachable", ""]
+    lines.extend(format_status_table(results))
+    
+    return lines
+
+
+def parse_arguments():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(
+        description='GB300 Compute Redfish Task Status Checker'
+    )
+    
+    parser.add_argument(
+        '-w', '--workers',
+        type=int,
+        default=DEFAULT_WORKERS,
+        help=f'Number of BMCs to query concurrently (default: {DEFAULT_WORKERS})'
+    )
+    
+    parser.add_argument(
+        '-t', '--timeout',
+        type=int,
+        default=DEFAULT_TIMEOUT,
+        help=f'Redfish request timeout in seconds (default: {DEFAULT_TIMEOUT})'
+    )
+    
+    parser.add_argument(
+        '--watch',
+        action='store_true',
+        help='Keep polling and redraw the task dashboard until every task reaches a terminal state'
+    )
+    
+    parser.add_argument(
+        '--interval',
+        type=float,
+        default=DEFAULT_ACTIVE_INTERVAL,
+        help=f'Seconds between polls of active tasks in watch mode (default: {DEFAULT_ACTIVE_INTERVAL:g})'
+    )
+    
+    parser.add_argument(
+        '--idle-interval',
+        type=float,
+        default=DEFAULT_IDLE_INTERVAL,
+        help=f'Seconds between polls of finished tasks in watch mode (default: {DEFAULT_IDLE_INTERVAL:g})'
+    )
+    
+    parser.add_argument(
+        '--watch-timeout',
+        type=float,
+        default=None,
+        help='Stop watching after this many seconds even if tasks are still active'
+    )
+    
+    parser.add_argument(
+        '--max-errors',
+        type=int,
+        default=DEFAULT_MAX_WATCH_ERRORS,
+        help=f'In watch mode, stop polling a system after this many consecutive failed polls '
+             f'(default: {DEFAULT_MAX_WATCH_ERRORS})'
+    )
+    
+    parser.add_argument(
+        '--debug',
+        action='store_true',
+        help='Log full response headers and bodies to the log file'
+    )
+    
+    parser.add_argument(
+        '--full-scan',
+        action='store_true',
+        help='Read the whole task collection on every check instead of only tasks newer than the last seen'
+    )
+    
+    return parser.parse_args()
+
+
 def main():
     """Main program flow."""
+    args = parse_arguments()
+    
     # Set up logging first
-    logger = setup_logging()
+    logger = setup_logging(logging.DEBUG if args.debug else logging.INFO)
     log_session_start()
     
     print("GB300 Compute Redfish Task Status Checker")
@@ -274,37 +453,51 @@ def main():
         print(f"\nChecking task status for {len(unique_targets)} systems...")
         print("=" * 50)
         
-        # Check status for each system
-        for target in unique_targets:
-            ip = target['BMC_IP']
-            system_name = target['SYSTEM_NAME']
-            
-            print(f"{ip} ({system_name}):", end=" ", flush=True)
-            
-            # Get task collection
-            task_collection = get_task_collection(ip, username, password)
-            if not task_collection:
-                print("ERROR - Could not get task collection")
-                continue
-            
-            # Get latest task ID
-            task_id = get_latest_task_id(task_collection)
-            if not task_id:
-                print("NO TASKS FOUND")
-                continue
-            
-            # Get task details
-            task_details = get_task_details(ip, username, password, task_id)
-            if not task_details:
-                print(f"ERROR - Could not get details for task {task_id}")
-                continue
+        tracker = None if args.full_scan else TaskTracker()
+        
+        if args.watch:
+            with RedfishClient(username, password, pool_maxsize=max(1, args.workers)) as client:
+                results = watch_tasks(
+                    unique_targets,
+                    lambda target, previous: refresh_task_status(client, target, previous, args.timeout, tracker),
+                    render_watch_dashboard,
+                    max_in_flight=max(1, args.workers),
+                    active_interval=args.interval,
+                    max_active_interval=max(args.interval, args.interval * 5),
+                    idle_interval=args.idle_interval,
+                    deadline=args.watch_timeout,
+                    max_errors=max(1, args.max_errors)
+                )
             
-            # Extract percent complete
-            percent_complete = get_percent_complete(task_details)
-            if percent_complete is not None:
-                print(f"PercentComplete: {percent_complete}%")
+            exit_code = aggregate_exit_code(results)
+            print("\n" + "=" * 50)
+            if exit_code == EXIT_SUCCESS:
+                print("✓ All tasks completed successfully.")
+            elif exit_code == EXIT_TASK_FAILED:
+                print("✗ One or more tasks did not complete successfully.")
             else:
-                print("PercentComplete: Not Available")
+                print("⚠ Stopped watching with tasks still active or systems unreachable.")
+            print("Detailed logs saved to ./logs/redfish_tasks.log")
+            sys.exit(exit_code)
+        
+        # Check status for all systems concurrently
+        start = time.monotonic()
+        completed = [0]
+        
+        def report(index: int, target: Dict, result: Dict) -> None:
+            completed[0] += 1
+            print(f"\r  Checked {completed[0]}/{len(unique_targets)} systems", end="", flush=True)
+        
+        with RedfishClient(username, password, pool_maxsize=max(1, args.workers)) as client:
+            results = fan_out(
+                unique_targets,
+                lambda target: check_task_status(client, target, args.timeout, tracker),
+                max_in_flight=max(1, args.workers),
+                on_result=report
+            )
+        
+        print(f"\r  Checked {len(unique_targets)} systems in {time.monotonic() - start:.1f}s\n")
+        display_status_table(results)
         
         print("\n" + "=" * 50)
         print("Task status check completed.")
@@ -319,6 +512,8 @@ def main():
     except Exception as e:
         print(f"\nUnexpected Error: {e}")
         sys.exit(1)
+    finally:
+        RESPONSE_LOG.flush()
 
 
 if __name__ == "__main__":
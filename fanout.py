@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+GB300 Concurrent Fan-Out Helpers
+Thread-pool fan-out with a bounded number of operations in flight and an
+optional start-rate limit, shared by the scripts that act on many BMCs.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, Optional
+
+
+# Default maximum number of operations in flight at once
+DEFAULT_MAX_IN_FLIGHT = 16
+
+
+class RateLimiter:
+    """
+    Thread-safe token bucket.
+    `rate` tokens are added per second up to `burst`; callers that take more
+    tokens than are available sleep until their share has accrued.
+    """
+    
+    def __init__(self, rate: float, burst: float = 1.0):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = float(rate)
+        self.capacity = max(float(burst), 1.0)
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self, tokens: float = 1.0) -> None:
+        """Take `tokens` from the bucket, blocking until they are available."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            
+            # Reserve now and wait off the deficit outside the lock
+            self._tokens -= tokens
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        
+        if wait > 0:
+            time.sleep(wait)
+
+
+def fan_out(items: List[Any], func: Callable[[Any], Any],
+            max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+            rate: Optional[float] = None,
+            on_result: Optional[Callable[[int, Any, Any], None]] = None) -> List[Any]:
+    """
+    Call `func(item)` for every item concurrently.
+    At most `max_in_flight` calls run at once and, if `rate` is given, calls
+    start no faster than `rate` per second. `on_result(index, item, result)`
+    is invoked as each call finishes, serialized so output does not interleave.
+    Returns the results in the order of `items`.
+    """
+    if not items:
+        return []
+    
+    limiter = RateLimiter(rate) if rate else None
+    output_lock = threading.Lock()
+    
+    def run(index: int, item: Any) -> Any:
+        if limiter is not None:
+            limiter.acquire()
+        result = func(item)
+        if on_result is not None:
+            with output_lock:
+                on_result(index, item, result)
+        return result
+    
+    workers = max(1, min(max_in_flight, len(items)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(run, index, item) for index, item in enumerate(items)]
+        return [future.result() for future in futures]
@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""
+GB300 Fleet Firmware Inventory
+Crawls the Redfish FirmwareInventory of every system in the generated
+compute_*.yaml / switch_*.yaml files concurrently, writes a timestamped JSON
+snapshot, and diffs two snapshots (e.g. before and after a rollout).
+"""
+
+import os
+import sys
+import glob
+import json
+import time
+import argparse
+import yaml
+from datetime import datetime
+from typing import List, Dict, Tuple, Optional
+
+from redfish_client import RedfishClient
+from fanout import fan_out
+from fw_inventory import get_firmware_inventory, DEFAULT_MEMBER_CONCURRENCY
+
+
+# Default number of systems crawled concurrently and request timeout (seconds)
+DEFAULT_WORKERS = 32
+DEFAULT_TIMEOUT = 30
+
+# Where snapshots are written and looked up for --diff
+SNAPSHOT_DIR = os.path.join('./logs', 'fw_inventory')
+
+YAML_PATTERNS = {
+    'compute': ['compute_*.yaml'],
+    'switch': ['switch_*.yaml'],
+    'all': ['compute_*.yaml', 'switch_*.yaml']
+}
+
+
+def parse_arguments():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(
+        description='GB300 Fleet Firmware Inventory',
+        epilog='''
+Examples:
+  python fleet_fw_inventory.py                      # Snapshot every system in compute_*/switch_*.yaml
+  python fleet_fw_inventory.py -s switch            # Snapshot switches only
+  python fleet_fw_inventory.py --diff               # Compare the two latest snapshots
+  python fleet_fw_inventory.py --diff OLD.json NEW.json
+        ''',
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    
+    parser.add_argument(
+        '-s', '--systems',
+        choices=['compute', 'switch', 'all'],
+        default='all',
+        help='Which YAML files to read targets from (default: all)'
+    )
+    
+    parser.add_argument(
+        '-w', '--workers',
+        type=int,
+        default=DEFAULT_WORKERS,
+        help=f'Number of systems to crawl concurrently (default: {DEFAULT_WORKERS})'
+    )
+    
+    parser.add_argument(
+        '-t', '--timeout',
+        type=int,
+        default=DEFAULT_TIMEOUT,
+        help=f'Per-request timeout in seconds (default: {DEFAULT_TIMEOUT})'
+    )
+    
+    parser.add_argument(
+        '-o', '--output',
+        help=f'Snapshot file to write (default: {SNAPSHOT_DIR}/snapshot_<timestamp>.json)'
+    )
+    
+    parser.add_argument(
+        '--diff',
+        nargs='*',
+        metavar='SNAPSHOT',
+        help='Compare two snapshots instead of taking one (default: the two latest)'
+    )
+    
+    return parser.parse_args()
+
+
+def load_targets(systems: str) -> Tuple[List[Dict], List[str]]:
+    """
+    Load unique targets from the generated YAML files.
+    Returns tuple of (targets, yaml_files_read); each target has BMC_IP,
+    SYSTEM_NAME, RF_USERNAME, RF_PASSWORD and SOURCES (YAML files listing it).
+    """
+    yaml_files = sorted({path for pattern in YAML_PATTERNS[systems] for path in glob.glob(pattern)})
+    targets: Dict[str, Dict] = {}
+    files_read = []
+    
+    for yaml_file in yaml_files:
+        try:
+            with open(yaml_file, 'r') as f:
+                data = yaml.safe_load(f)
+        except yaml.YAMLError as e:
+            print(f"Warning: Error parsing {yaml_file}: {e}")
+            continue
+        except Exception as e:
+            print(f"Warning: Error reading {yaml_file}: {e}")
+            continue
+        
+        if not isinstance(data, dict) or not isinstance(data.get('Targets'), list):
+            continue
+        files_read.append(yaml_file)
+        
+        for target in data['Targets']:
+            if not all(field in target for field in ['BMC_IP', 'RF_USERNAME', 'RF_PASSWORD']):
+                continue
+            entry = targets.setdefault(target['BMC_IP'], {
+                'BMC_IP': target['BMC_IP'],
+                'SYSTEM_NAME': target.get('SYSTEM_NAME', target['BMC_IP']),
+                'RF_USERNAME': target['RF_USERNAME'],
+                'RF_PASSWORD': target['RF_PASSWORD'],
+                'SOURCES': []
+            })
+            entry['SOURCES'].append(yaml_file)
+    
+    return sorted(targets.values(), key=lambda target: target['BMC_IP']), files_read
+
+
+def take_snapshot(targets: List[Dict], workers: int = DEFAULT_WORKERS,
+                  timeout: int = DEFAULT_TIMEOUT) -> Dict:
+    """
+    Crawl the FirmwareInventory of every target concurrently.
+    Targets are grouped by credentials so each group shares one pooled client.
+    Returns the snapshot dict (timestamp, duration and systems keyed by IP).
+    """
+    clients: Dict[Tuple[str, str], RedfishClient] = {}
+    for target in targets:
+        credentials = (target['RF_USERNAME'], target['RF_PASSWORD'])
+        if credentials not in clients:
+            clients[credentials] = RedfishClient(*credentials, timeout=timeout,
+                                                 pool_maxsize=DEFAULT_MEMBER_CONCURRENCY)
+    
+    completed = [0]
+    
+    def crawl(target: Dict) -> Dict:
+        client = clients[(target['RF_USERNAME'], target['RF_PASSWORD'])]
+        system = {
+            'system_name': target['SYSTEM_NAME'],
+            'sources': target['SOURCES'],
+            'error': None,
+            'inventory': {}
+        }
+        try:
+            system['inventory'] = {
+                member_id: {'version': entry['version'], 'updateable': entry['updateable']}
+                for member_id, entry in get_firmware_inventory(client, target['BMC_IP'], timeout).items()
+            }
+        except Exception as e:
+            system['error'] = str(e)
+        return system
+    
+    def report(index: int, target: Dict, system: Dict) -> None:
+        completed[0] += 1
+        status = f"✗ {system['error']}" if system['error'] else f"✓ {len(system['inventory'])} components"
+        print(f"  [{completed[0]}/{len(targets)}] {target['SYSTEM_NAME']} ({target['BMC_IP']}): {status}")
+    
+    start = time.monotonic()
+    try:
+        systems = fan_out(targets, crawl, max_in_flight=max(1, workers), on_result=report)
+    finally:
+        for client in clients.values():
+            client.close()
+    
+    return {
+        'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'duration_seconds': round(time.monotonic() - start, 2),
+        'systems': {target['BMC_IP']: system for target, system in zip(targets, systems)}
+    }
+
+
+def save_snapshot(snapshot: Dict, output: Optional[str] = None) -> str:
+    """Write a snapshot atomically. Returns the file path."""
+    if output is None:
+        output = os.path.join(SNAPSHOT_DIR, f"snapshot_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    
+    output_dir = os.path.dirname(output)
+    if output_dir and not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+    
+    temp_file = f"{output}.tmp"
+    with open(temp_file, 'w') as f:
+        json.dump(snapshot, f, indent=2, sort_keys=True)
+    os.replace(temp_file, output)
+    
+    return output
+
+
+def format_version_matrix(snapshot: Dict) -> List[str]:
+    """
+    Summarize a snapshot as one line per component and version, listing
+    the systems that run it.
+    """
+    versions: Dict[str, Dict[str, List[str]]] = {}
+    for system in snapshot['systems'].values():
+        for member_id, entry in system['inventory'].items():
+            versions.setdefault(member_id, {}).setdefault(entry['version'] or '-', []).append(
+                system['system_name']
+            )
+    
+    lines = []
+    for member_id in sorted(versions):
+        for version, names in sorted(versions[member_id].items(), key=lambda item: -len(item[1])):
+            lines.append(f"  {member_id:<30} {version:<30} {len(names):>4} systems: {', '.join(sorted(names))}")
+    return lines
+
+
+def load_snapshot(path: str) -> Dict:
+    """Load a snapshot file. Raises ValueError if it is not a snapshot."""
+    with open(path, 'r') as f:
+        snapshot = json.load(f)
+    if not isinstance(snapshot, dict) or not isinstance(snapshot.get('systems'), dict):
+        raise ValueError(f"{path} is not a firmware inventory snapshot")
+    return snapshot
+
+
+def latest_snapshots(count: int = 2) -> List[str]:
+    """Return the newest snapshot files in SNAPSHOT_DIR, oldest first."""
+    return sorted(glob.glob(os.path.join(SNAPSHOT_DIR, 'snapshot_*.json')))[-count:]
+
+
+def diff_snapshots(old: Dict, new: Dict) -> Tuple[List[str], int, int]:
+    """
+    Compare two snapshots.
+    Returns tuple of (report lines, component changes, systems changed).
+    """
+    lines = []
+    change_count = 0
+    changed_systems = 0
+    
+    for ip in sorted(set(old['systems']) | set(new['systems'])):
+        before = old['systems'].get(ip)
+        after = new['systems'].get(ip)
+        name = f"{(after or before)['system_name']} ({ip})"
+        
+        if before is None:
+            lines.append(f"+ {name}: only in the new snapshot")
+            continue
+        if after is None:
+            lines.append(f"- {name}: only in the old snapshot")
+            continue
+        if before['error'] or after['error']:
+            which = 'old' if before['error'] else 'new'
+            lines.append(f"⚠ {name}: not read in the {which} snapshot "
+                         f"({before['error'] or after['error']})")
+            continue
+        
+        changes = []
+        for member_id in sorted(set(before['inventory']) | set(after['inventory'])):
+            old_entry = before['inventory'].get(member_id)
+            new_entry = after['inventory'].get(member_id)
+            if old_entry is None:
+                changes.append(f"    + {member_id}: {new_entry['version']}")
+            elif new_entry is None:
+                changes.append(f"    - {member_id}: {old_entry['version']}")
+            elif old_entry['version'] != new_entry['version']:
+                changes.append(f"    {member_id}: {old_entry['version']} -> {new_entry['version']}")
+        
+        if changes:
+            change_count += len(changes)
+            changed_systems += 1
+            lines.append(f"  {name}:")
+            lines.extend(changes)
+    
+    return lines, change_count, changed_systems
+
+
+def run_diff(paths: List[str]) -> None:
+    """Print the differences between two snapshot files."""
+    if not paths:
+        paths = latest_snapshots()
+        if len(paths) < 2:
+            print(f"Need two snapshots in {SNAPSHOT_DIR} to compare; found {len(paths)}.")
+            sys.exit(1)
+    elif len(paths) != 2:
+        print("--diff takes either no snapshots (compare the two latest) or exactly two.")
+        sys.exit(1)
+    
+    old, new = load_snapshot(paths[0]), load_snapshot(paths[1])
+    print(f"Old: {paths[0]} ({old['timestamp']})")
+    print(f"New: {paths[1]} ({new['timestamp']})")
+    print("=" * 60)
+    
+    lines, change_count, changed_systems = diff_snapshots(old, new)
+    for line in lines:
+        print(line)
+    
+    if change_count:
+        print(f"\n{change_count} component changes on {changed_systems} systems")
+    else:
+        print("No firmware version changes.")
+
+
+def main():
+    """Main program flow."""
+    args = parse_arguments()
+    
+    print("GB300 Fleet Firmware Inventory")
+    print("=" * 40)
+    
+    try:
+        if args.diff is not None:
+            run_diff(args.diff)
+            return
+        
+        targets, yaml_files = load_targets(args.systems)
+        if not targets:
+            print("No targets found. Make sure the compute_*.yaml / switch_*.yaml files exist.")
+            sys.exit(1)
+        
+        print(f"Read {len(targets)} unique systems from: {', '.join(yaml_files)}")
+        print(f"\nCrawling FirmwareInventory ({max(1, args.workers)} systems at a time)...")
+        snapshot = take_snapshot(targets, args.workers, args.timeout)
+        snapshot['yaml_files'] = yaml_files
+        path = save_snapshot(snapshot, args.output)
+        
+        failed = [system for system in snapshot['systems'].values() if system['error']]
+        
+        print("\n" + "=" * 60)
+        print("FIRMWARE VERSIONS")
+        print("=" * 60)
+        for line in format_version_matrix(snapshot):
+            print(line)
+        
+        print(f"\nSnapshot of {len(targets)} systems written to {path} "
+              f"in {snapshot['duration_seconds']:.1f}s")
+        if failed:
+            print(f"⚠ {len(failed)} systems could not be read:")
+            for system in failed:
+                print(f"  - {system['system_name']}: {system['error']}")
+            sys.exit(1)
+    
+    except KeyboardInterrupt:
+        print("\n\nOperation cancelled by user.")
+    except Exception as e:
+        print(f"\nError: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+GB300 Firmware Inventory Helpers
+Reads the component versions out of a PLDM firmware package (.fwpkg) header,
+crawls a BMC's Redfish FirmwareInventory, and compares the two so update
+scripts can skip targets that already run the package's firmware.
+"""
+
+import struct
+from typing import Dict, List, Optional, Tuple
+
+from fanout import fan_out, DEFAULT_MAX_IN_FLIGHT
+from redfish_client import RedfishClient
+
+
+FIRMWARE_INVENTORY_PATH = "/redfish/v1/UpdateService/FirmwareInventory"
+
+# Concurrent member GETs per BMC when the inventory cannot be expanded
+DEFAULT_MEMBER_CONCURRENCY = 4
+
+# Status.State values of staged or inactive images, which are not running firmware
+INACTIVE_STATES = {'Disabled', 'StandbyOffline', 'StandbySpare', 'UnavailableOffline'}
+
+# PLDM version string types (DSP0267)
+_STRING_ENCODINGS = {1: 'ascii', 2: 'utf-8', 3: 'utf-16', 4: 'utf-16-le', 5: 'utf-16-be'}
+
+
+def _decode_version(data: bytes, string_type: int) -> str:
+    """Decode a PLDM version string."""
+    return data.decode(_STRING_ENCODINGS.get(string_type, 'ascii'), errors='replace').strip('\x00 ')
+
+
+def parse_pldm_package(package_path: str) -> Dict:
+    """
+    Parse the header of a PLDM firmware update package (DSP0267).
+    Only the header is read, not the component images.
+    Returns a dict with package_version and components, a list of dicts with
+    classification, identifier and version.
+    Raises ValueError if the file is not a PLDM package.
+    """
+    with open(package_path, 'rb') as f:
+        fixed = f.read(36)
+        if len(fixed) < 36:
+            raise ValueError("file too short for a PLDM package header")
+        
+        revision = fixed[16]
+        header_size = struct.unpack_from('<H', fixed, 17)[0]
+        if revision not in (1, 2, 3, 4) or header_size < 36:
+            raise ValueError("not a PLDM firmware package")
+        
+        header = fixed + f.read(header_size - 36)
+        if len(header) < header_size:
+            raise ValueError("truncated PLDM package header")
+    
+    try:
+        version_type, version_length = struct.unpack_from('<BB', header, 34)
+        offset = 36
+        package_version = _decode_version(header[offset:offset + version_length], version_type)
+        offset += version_length
+        
+        # Firmware device (and, since revision 2, downstream device) ID records
+        for _ in range(2 if revision >= 2 else 1):
+            record_count = header[offset]
+            offset += 1
+            for _ in range(record_count):
+                offset += struct.unpack_from('<H', header, offset)[0]
+        
+        components = []
+        component_count = struct.unpack_from('<H', header, offset)[0]
+        offset += 2
+        for _ in range(component_count):
+            classification, identifier = struct.unpack_from('<HH', header, offset)
+            version_type, version_length = struct.unpack_from('<BB', header, offset + 20)
+            offset += 22
+            components.append({
+                'classification': classification,
+                'identifier': identifier,
+                'version': _decode_version(header[offset:offset + version_length], version_type)
+            })
+            offset += version_length
+            if revision >= 4:
+                # Component opaque data
+                offset += 4 + struct.unpack_from('<I', header, offset)[0]
+    
+    except (struct.error, IndexError):
+        raise ValueError("malformed PLDM package header")
+    
+    return {'package_version': package_version, 'components': components}
+
+
+def get_firmware_inventory(client: RedfishClient, ip: str, timeout: int = 30,
+                           member_concurrency: int = DEFAULT_MEMBER_CONCURRENCY) -> Dict[str, Dict]:
+    """
+    Read every FirmwareInventory member of a BMC.
+    Asks for an expanded collection first so one request returns all members;
+    otherwise the members are fetched concurrently.
+    Returns a dict of member ID -> dict with version, updateable, odata_id,
+    software_id and state (Status.State).
+    Raises the usual requests exceptions, or RuntimeError on an HTTP error.
+    """
+    response = client.get(ip, f"{FIRMWARE_INVENTORY_PATH}?$expand=.($levels=1)", timeout=timeout)
+    if response.status_code != 200:
+        # Some BMCs reject query parameters they do not support
+        response = client.get(ip, FIRMWARE_INVENTORY_PATH, timeout=timeout)
+    if response.status_code != 200:
+        raise RuntimeError(f"HTTP {response.status_code} reading {FIRMWARE_INVENTORY_PATH}")
+    
+    members = response.json().get('Members', [])
+    if members and not all('Id' in member for member in members):
+        def get_member(member: Dict) -> Dict:
+            member_response = client.get(ip, member['@odata.id'], timeout=timeout)
+            if member_response.status_code != 200:
+                raise RuntimeError(f"HTTP {member_response.status_code} reading {member['@odata.id']}")
+            return member_response.json()
+        
+        members = fan_out(members, get_member, max_in_flight=member_concurrency)
+    
+    inventory = {}
+    for member in members:
+        inventory[member.get('Id') or member.get('@odata.id', '').rstrip('/').split('/')[-1]] = {
+            'version': member.get('Version'),
+            'updateable': member.get('Updateable'),
+            'odata_id': member.get('@odata.id'),
+            'software_id': member.get('SoftwareId'),
+            'state': (member.get('Status') or {}).get('State')
+        }
+    return inventory
+
+
+def _normalize_version(version: Optional[str]) -> str:
+    """Normalize a version string for comparison."""
+    return (version or '').strip().lower()
+
+
+def _parse_software_id(software_id: Optional[str]) -> Optional[int]:
+    """Parse a SoftwareId holding a PLDM ComponentIdentifier ("0x0010" or "16")."""
+    text = str(software_id or '').strip().lower()
+    try:
+        if text.startswith('0x'):
+            return int(text, 16)
+        if text.isdigit():
+            return int(text, 10)
+    except ValueError:
+        pass
+    return None
+
+
+def find_missing_versions(package_info: Dict, inventory: Dict[str, Dict]) -> List[str]:
+    """
+    Compare a package with a BMC's inventory, component by component.
+    Each package component is matched to the active inventory members whose
+    SoftwareId is its ComponentIdentifier, and every one of them must report
+    the component's version. Staged or inactive members are ignored. A
+    component that matches no member counts as missing, so the target is
+    updated rather than skipped.
+    Returns descriptions of the components not installed; an empty list
+    means the target already runs everything in the package.
+    """
+    members: Dict[int, List[Tuple[str, Dict]]] = {}
+    for member_id, entry in inventory.items():
+        if entry.get('state') in INACTIVE_STATES:
+            continue
+        identifier = _parse_software_id(entry.get('software_id'))
+        if identifier is not None:
+            members.setdefault(identifier, []).append((member_id, entry))
+    
+    missing = []
+    for component in package_info['components']:
+        name = f"{component['version']} (component 0x{component['identifier']:04x})"
+        matches = members.get(component['identifier'])
+        if not matches:
+            missing.append(f"{name}: no matching inventory member")
+            continue
+        outdated = [member_id for member_id, entry in matches
+                    if _normalize_version(entry['version']) != _normalize_version(component['version'])]
+        if outdated:
+            missing.append(f"{name}: {', '.join(sorted(outdated))}")
+    return missing
+
+
+def check_targets_current(client: RedfishClient, targets: List[Dict], package_info: Dict,
+                          max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+                          timeout: int = 30) -> List[Dict]:
+    """
+    Read the FirmwareInventory of every target concurrently and compare it
+    with the package. A target only counts as current if every component
+    version in the package is installed; unreadable targets are not current.
+    Returns a list of dicts (in target order) with ip, system_name, current,
+    missing (versions not installed) and error.
+    """
+    def check(target: Dict) -> Dict:
+        result = {
+            'ip': target['BMC_IP'],
+            'system_name': target['SYSTEM_NAME'],
+            'current': False,
+            'missing': [],
+            'error': None
+        }
+        try:
+            inventory = get_firmware_inventory(client, target['BMC_IP'], timeout)
+            result['missing'] = find_missing_versions(package_info, inventory)
+            result['current'] = bool(package_info['components']) and not result['missing']
+        except Exception as e:
+            result['error'] = str(e)
+        return result
+    
+    return fan_out(targets, check, max_in_flight=max_in_flight)
+
+
+def split_current_targets(client: RedfishClient, targets: List[Dict], package_path: str,
+                          max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+                          timeout: int = 30) -> Tuple[List[Dict], List[Dict], List[str]]:
+    """
+    Pre-flight version check of all targets against a package.
+    Targets are only dropped when the package header can be parsed and every
+    component version in it is already installed.
+    Returns tuple of (targets_to_update, current_targets, notes), where notes
+    are status lines describing the check.
+    """
+    try:
+        package_info = parse_pldm_package(package_path)
+    except (OSError, ValueError) as e:
+        return targets, [], [f"⚠ Version check skipped: cannot read package versions ({e})"]
+    
+    if not package_info['components']:
+        return targets, [], ["⚠ Version check skipped: package lists no components"]
+    
+    versions = sorted({component['version'] for component in package_info['components']})
+    notes = [f"Package version: {package_info['package_version'] or 'unknown'} "
+             f"(components: {', '.join(versions)})"]
+    
+    results = check_targets_current(client, targets, package_info, max_in_flight, timeout)
+    
+    to_update = []
+    current = []
+    for target, result in zip(targets, results):
+        name = f"{result['system_name']} ({result['ip']})"
+        if result['current']:
+            current.append(target)
+            notes.append(f"  ✓ {name}: already current, skipping")
+        elif result['error']:
+            to_update.append(target)
+            notes.append(f"  ⚠ {name}: inventory not readable ({result['error']}), will update")
+        else:
+            to_update.append(target)
+            notes.append(f"  - {name}: needs {'; '.join(result['missing'])}")
+    
+    return to_update, current, notes
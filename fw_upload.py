@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+GB300 Firmware Upload Helpers
+Streaming upload bodies for Redfish UpdateService pushes, read from a single
+memory-mapped copy of the package, with an optional shared bandwidth budget
+across concurrent uploads, progress reporting, per-BMC throughput metrics and
+push URI discovery for raw (HttpPushUri) and multipart (MultipartHttpPushUri)
+pushes.
+"""
+
+import json
+import mmap
+import os
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+from fanout import RateLimiter
+from redfish_client import RedfishClient
+
+
+# Bytes read and sent per chunk
+DEFAULT_CHUNK_SIZE = 256 * 1024
+
+# Per-upload throughput records, one JSON object per line
+DEFAULT_METRICS_FILE = os.path.join('./logs', 'upload_metrics.jsonl')
+
+MEGABYTE = 1024 * 1024
+
+# UpdateService resource; also the legacy raw push target when no push URI is advertised
+UPDATE_SERVICE_PATH = "/redfish/v1/UpdateService"
+
+_metrics_lock = threading.Lock()
+
+
+def create_bandwidth_limiter(megabytes_per_second: Optional[float],
+                             chunk_size: int = DEFAULT_CHUNK_SIZE) -> Optional[RateLimiter]:
+    """
+    Create a limiter for an aggregate upload bandwidth cap.
+    Returns None when no cap is requested.
+    """
+    if not megabytes_per_second or megabytes_per_second <= 0:
+        return None
+    return RateLimiter(megabytes_per_second * 1024 * 1024, burst=chunk_size)
+
+
+class UploadProgress:
+    """
+    Bytes sent, throughput and ETA for one upload.
+    `report(progress)` is called at most every `interval` seconds while the
+    upload runs, and once more when the last byte has been sent.
+    """
+    
+    def __init__(self, total: int, report: Optional[Callable[['UploadProgress'], None]] = None,
+                 interval: float = 1.0):
+        self.total = total
+        self.report = report
+        self.interval = interval
+        self.sent = 0
+        self.start = time.monotonic()
+        self.end: Optional[float] = None
+        self._last_report = self.start
+    
+    def begin(self) -> None:
+        """Restart the clock when the first byte of the body is about to be sent."""
+        self.start = self._last_report = time.monotonic()
+        self.sent = 0
+        self.end = None
+    
+    def update(self, sent: int) -> None:
+        """Record the number of bytes sent so far."""
+        now = time.monotonic()
+        self.sent = sent
+        if sent >= self.total and self.end is None:
+            self.end = now
+        elif self.report is None or now - self._last_report < self.interval:
+            return
+        
+        self._last_report = now
+        if self.report is not None:
+            self.report(self)
+    
+    @property
+    def elapsed(self) -> float:
+        """Seconds spent sending the body so far."""
+        return (self.end or time.monotonic()) - self.start
+    
+    @property
+    def rate(self) -> float:
+        """Average throughput in bytes per second."""
+        return self.sent / self.elapsed if self.elapsed > 0 else 0.0
+    
+    @property
+    def eta(self) -> Optional[float]:
+        """Estimated seconds until the body is fully sent, or None if unknown."""
+        if self.sent >= self.total:
+            return 0.0
+        return (self.total - self.sent) / self.rate if self.rate > 0 else None
+    
+    def summary(self) -> str:
+        """Format the progress as a short status string."""
+        percent = 100.0 * self.sent / self.total if self.total else 100.0
+        text = (f"{self.sent / MEGABYTE:.1f}/{self.total / MEGABYTE:.1f} MB ({percent:.0f}%) "
+                f"at {self.rate / MEGABYTE:.1f} MB/s")
+        if self.sent < self.total:
+            text += f", ETA {self.eta:.0f}s" if self.eta is not None else ", ETA --"
+        return text
+
+
+class InlineProgressDisplay:
+    """
+    Shows an upload's progress in place at the end of the current console line,
+    so text already printed on the line (e.g. "[1/9] Uploading ...") is kept.
+    """
+    
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+        self._width = 0
+    
+    def __call__(self, progress: UploadProgress) -> None:
+        text = progress.summary() + " "
+        pad = max(0, self._width - len(text))
+        # Back up over the previous text, overwrite it and blank any leftover
+        self.stream.write("\b" * self._width + text + " " * pad + "\b" * pad)
+        self.stream.flush()
+        self._width = len(text)
+
+
+def record_upload_metrics(record: Dict, metrics_file: str = DEFAULT_METRICS_FILE) -> None:
+    """Append one upload's throughput record to the metrics file."""
+    record = dict(record, timestamp=datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+    try:
+        with _metrics_lock:
+            metrics_dir = os.path.dirname(metrics_file)
+            if metrics_dir and not os.path.exists(metrics_dir):
+                os.makedirs(metrics_dir)
+            with open(metrics_file, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record, sort_keys=True) + "\n")
+    except OSError:
+        pass
+
+
+class PackageBuffer:
+    """
+    Read-only, memory-mapped firmware package shared by all uploads.
+    The file is mapped once; every upload streams slices of the same mapping,
+    so concurrent pushes neither re-read the file (e.g. over NFS) nor hold a
+    private copy of it.
+    """
+    
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as package_file:
+            self._mmap = mmap.mmap(package_file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.size = len(self._mmap)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    
+    @property
+    def name(self) -> str:
+        """Return the package file name."""
+        return os.path.basename(self.path)
+    
+    def view(self) -> memoryview:
+        """Return a zero-copy, read-only view of the whole package."""
+        return memoryview(self._mmap)
+    
+    def close(self) -> None:
+        """Unmap the package."""
+        try:
+            self._mmap.close()
+        except BufferError:
+            # A view is still referenced somewhere; the mapping is freed with it
+            pass
+
+
+class ThrottledReader:
+    """
+    Iterable upload body that streams a package in chunks.
+    Chunks are zero-copy slices of the shared PackageBuffer. If a limiter is
+    given, every chunk takes its size in tokens first, so all readers sharing
+    one limiter stay within its aggregate byte rate. Each chunk counts as sent
+    once the connection asks for the next one. Defines __len__ so requests
+    sends a Content-Length rather than chunked encoding.
+    """
+    
+    def __init__(self, package: PackageBuffer, limiter: Optional[RateLimiter] = None,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 progress: Optional[UploadProgress] = None):
+        self.package = package
+        self.limiter = limiter
+        self.chunk_size = chunk_size
+        self.progress = progress
+        self.size = package.size
+    
+    def __len__(self) -> int:
+        return self.size
+    
+    def __iter__(self) -> Iterator[memoryview]:
+        view = self.package.view()
+        if self.progress is not None:
+            self.progress.begin()
+        for offset in range(0, self.size, self.chunk_size):
+            chunk = view[offset:offset + self.chunk_size]
+            if self.limiter is not None:
+                self.limiter.acquire(len(chunk))
+            yield chunk
+            if self.progress is not None:
+                self.progress.update(offset + len(chunk))
+
+
+class MultipartUpload:
+    """
+    Streaming multipart/form-data body for a MultipartHttpPushUri push.
+    The body is an UpdateParameters JSON part followed by the package as the
+    UpdateFile part. The package is streamed through a ThrottledReader, so it
+    shares the limiter and progress reporting of raw pushes, and __len__ gives
+    the exact body size for the Content-Length header.
+    """
+    
+    def __init__(self, package: PackageBuffer, parameters: Dict,
+                 limiter: Optional[RateLimiter] = None,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 progress: Optional[UploadProgress] = None):
+        self.boundary = uuid.uuid4().hex
+        self.reader = ThrottledReader(package, limiter, chunk_size, progress)
+        self._head = (
+            f"--{self.boundary}\r\n"
+            f'Content-Disposition: form-data; name="UpdateParameters"\r\n'
+            f"Content-Type: application/json\r\n\r\n"
+            f"{json.dumps(parameters)}\r\n"
+            f"--{self.boundary}\r\n"
+            f'Content-Disposition: form-data; name="UpdateFile"; filename="{package.name}"\r\n'
+            f"Content-Type: application/octet-stream\r\n\r\n"
+        ).encode('utf-8')
+        self._tail = f"\r\n--{self.boundary}--\r\n".encode('utf-8')
+    
+    @property
+    def content_type(self) -> str:
+        """Return the Content-Type header value including the boundary."""
+        return f"multipart/form-data; boundary={self.boundary}"
+    
+    def __len__(self) -> int:
+        return len(self._head) + len(self.reader) + len(self._tail)
+    
+    def __iter__(self) -> Iterator[Any]:
+        yield self._head
+        for chunk in self.reader:
+            yield chunk
+        yield self._tail
+
+
+def build_update_parameters(update_targets: Any) -> Dict:
+    """
+    Build the multipart UpdateParameters from a YAML UPDATE_PARAMETERS_TARGETS value.
+    Accepts the nvfwupd "-s" form (a dict such as {"Targets": [...]}) or a bare
+    list of target URIs. An empty Targets list updates every applicable component.
+    """
+    if isinstance(update_targets, dict):
+        parameters = dict(update_targets)
+    elif isinstance(update_targets, (list, tuple)):
+        parameters = {'Targets': list(update_targets)}
+    else:
+        parameters = {}
+    
+    parameters.setdefault('Targets', [])
+    return parameters
+
+
+def discover_push_uri(client: RedfishClient, ip: str, timeout: int = 30,
+                      use_cache: bool = True) -> Tuple[str, Optional[str]]:
+    """
+    Find where firmware can be pushed on a BMC.
+    Reads HttpPushUri and MultipartHttpPushUri from the UpdateService resource,
+    using the client's resource path cache when available. If the BMC cannot be
+    read or advertises no HttpPushUri, raw pushes go to the UpdateService itself.
+    Returns tuple of (http_push_uri, multipart_push_uri or None).
+    """
+    cache = client.path_cache
+    if use_cache and cache is not None:
+        http_uri = cache.get(ip, 'http_push_uri')
+        multipart_uri = cache.get(ip, 'multipart_push_uri')
+        # Both are recorded together; an empty multipart value means "not supported"
+        if http_uri and multipart_uri is not None:
+            return http_uri, multipart_uri or None
+    
+    try:
+        response = client.get(ip, UPDATE_SERVICE_PATH, timeout=timeout)
+        if response.status_code != 200:
+            return UPDATE_SERVICE_PATH, None
+        data = response.json()
+    except Exception:
+        return UPDATE_SERVICE_PATH, None
+    
+    http_uri = data.get('HttpPushUri') or UPDATE_SERVICE_PATH
+    multipart_uri = data.get('MultipartHttpPushUri') or ''
+    if cache is not None:
+        cache.put(ip, 'http_push_uri', http_uri)
+        cache.put(ip, 'multipart_push_uri', multipart_uri)
+    
+    return http_uri, multipart_uri or None
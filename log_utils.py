@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+GB300 Logging Helpers
+Queue-backed log file setup so worker threads never block on file I/O, and
+level-gated, compacting logging of Redfish responses for scripts that poll
+the same resources repeatedly.
+"""
+
+import atexit
+import json
+import logging
+import queue
+import sys
+import threading
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Optional, Tuple
+
+
+# Background listener writing queued records, if queue logging is active
+_listener: Optional[QueueListener] = None
+
+
+def setup_queue_logging(log_file: str, level: int = logging.INFO,
+                        console: bool = False) -> logging.Logger:
+    """
+    Configure the root logger to append to `log_file` through a queue.
+    Callers only enqueue file records; a single background thread formats and
+    writes them. With `console`, records are also echoed to stdout directly
+    from the calling thread, so they stay in order with print() output.
+    The queue is drained and the file closed at interpreter exit (including
+    sys.exit and KeyboardInterrupt) or by stop_queue_logging().
+    Returns the root logger.
+    """
+    stop_queue_logging()
+    
+    # Create custom formatter with timestamp
+    formatter = logging.Formatter(
+        fmt='%(asctime)s - %(levelname)s - %(message)s',
+        datefmt='%Y-%m-%d %H:%M:%S'
+    )
+    
+    # File handler (append mode)
+    file_handler = logging.FileHandler(log_file, mode='a', encoding='utf-8')
+    file_handler.setLevel(level)
+    file_handler.setFormatter(formatter)
+    
+    # Set up root logger
+    logger = logging.getLogger()
+    logger.setLevel(level)
+    
+    # Remove any existing handlers
+    for handler in logger.handlers[:]:
+        logger.removeHandler(handler)
+    
+    log_queue = queue.Queue(-1)
+    logger.addHandler(QueueHandler(log_queue))
+    
+    # Console handler
+    if console:
+        console_handler = logging.StreamHandler(sys.stdout)
+        console_handler.setLevel(level)
+        console_handler.setFormatter(logging.Formatter('%(message)s'))
+        logger.addHandler(console_handler)
+    
+    global _listener
+    _listener = QueueListener(log_queue, file_handler, respect_handler_level=True)
+    _listener.start()
+    
+    return logger
+
+
+def stop_queue_logging() -> None:
+    """Flush all queued records to disk and stop the background writer."""
+    global _listener
+    listener, _listener = _listener, None
+    if listener is None:
+        return
+    
+    listener.stop()
+    for handler in listener.handlers:
+        handler.flush()
+        if isinstance(handler, logging.FileHandler):
+            handler.close()
+
+
+atexit.register(stop_queue_logging)
+
+
+class ResponseLogger:
+    """
+    Logs Redfish responses without re-serializing them on every poll.
+    Each response is logged as one INFO summary line; headers and the full
+    body are only serialized when DEBUG is enabled. A response whose status
+    and parsed body are identical to the previous one for the same key is
+    not logged again; the repeat count is reported once the body changes
+    or when flush() is called.
+    """
+    
+    def __init__(self, logger: Optional[logging.Logger] = None):
+        self.logger = logger or logging.getLogger()
+        self._lock = threading.Lock()
+        # (ip, key) -> [status_code, body, repeat_count]
+        self._last: Dict[Tuple[str, str], list] = {}
+    
+    def log_response(self, ip: str, key: str, response, body: Optional[Any] = None,
+                     summary: str = '') -> None:
+        """
+        Log a response that has already been parsed into `body`.
+        `key` identifies the polled resource (e.g. "Task 13") and `summary`
+        is a short description of the interesting fields for the INFO line.
+        """
+        with self._lock:
+            last = self._last.get((ip, key))
+            if last is not None and last[0] == response.status_code and last[1] == body:
+                last[2] += 1
+                return
+            repeats = last[2] if last is not None else 0
+            self._last[(ip, key)] = [response.status_code, body, 0]
+        
+        message = f"{key} response from {ip}: HTTP {response.status_code}"
+        if summary:
+            message += f" - {summary}"
+        if repeats:
+            message += f" (previous response repeated {repeats} more times)"
+        
+        if self.logger.isEnabledFor(logging.DEBUG):
+            lines = [message, f"Response Headers: {dict(response.headers)}"]
+            if body is not None:
+                lines.append(f"Response Body: {json.dumps(body, indent=2)}")
+            elif response.text:
+                lines.append(f"Response Body (raw): {response.text}")
+            else:
+                lines.append("Response Body: (empty)")
+            self.logger.debug("\n".join(lines))
+        else:
+            self.logger.info(message)
+    
+    def flush(self) -> None:
+        """Log the repeat counts still pending for every resource."""
+        with self._lock:
+            pending = [(ip, key, entry[2]) for (ip, key), entry in self._last.items() if entry[2]]
+            for entry in self._last.values():
+                entry[2] = 0
+        
+        for ip, key, repeats in pending:
+            self.logger.info(f"{key} response from {ip}: unchanged for {repeats} more polls")
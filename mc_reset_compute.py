@@ -11,9 +11,20 @@ import yaml
 import requests
 import json
 import time
+import argparse
 from typing import List, Dict, Set, Tuple
 import urllib3
-from requests.auth import HTTPBasicAuth
+
+from redfish_client import RedfishClient
+from fanout import fan_out, DEFAULT_MAX_IN_FLIGHT
+from waves import run_waves, WaveRollout, DEFAULT_MAX_FAILURES
+from bmc_recovery import (
+    wait_for_bmc_recovery, DEFAULT_RECOVERY_DEADLINE, DEFAULT_RECOVERY_INTERVAL,
+    DEFAULT_MAX_RECOVERY_INTERVAL
+)
+
+# Manager reset (and polled for recovery) on GB300 compute systems
+MANAGER_ID = "HGX_BMC_0"
 
 # Disable SSL warnings for self-signed certificates
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
@@ -188,16 +199,12 @@ def get_unique_credentials(targets: List[Dict]) -> Tuple[str, str]:
     return usernames.pop(), passwords.pop()
 
 
-def execute_bmc_reset(ip: str, username: str, password: str, system_name: str, timeout: int = 30) -> bool:
+def send_bmc_reset(client: RedfishClient, ip: str, timeout: int = 30) -> Tuple[bool, str]:
     """
-    Execute BMC reset via Redfish API.
-    Returns True if successful, False otherwise.
+    Send a BMC reset via Redfish API without printing.
+    Returns tuple of (success, result message).
     """
-    base_url = f"https://{ip}"
-    
-    # Use the correct manager ID for GB300 compute systems
-    manager_id = "HGX_BMC_0"
-    reset_url = f"{base_url}/redfish/v1/Managers/{manager_id}/Actions/Manager.Reset"
+    reset_path = f"/redfish/v1/Managers/{MANAGER_ID}/Actions/Manager.Reset"
     
     headers = {
         'Content-Type': 'application/json',
@@ -209,38 +216,85 @@ def execute_bmc_reset(ip: str, username: str, password: str, system_name: str, t
     }
     
     try:
-        print(f"  Executing BMC reset for {system_name} ({ip})...", end=" ", flush=True)
-        
-        response = requests.post(
-            reset_url,
+        response = client.post(
+            ip,
+            reset_path,
             headers=headers,
             data=json.dumps(reset_payload),
-            auth=HTTPBasicAuth(username, password),
-            verify=False,
             timeout=timeout
         )
         
         if response.status_code in [200, 202, 204]:
-            print("✓ SUCCESS")
-            return True
+            return True, "✓ SUCCESS"
         else:
-            print(f"✗ FAILED (HTTP {response.status_code})")
+            message = f"✗ FAILED (HTTP {response.status_code})"
             try:
                 error_data = response.json()
-                print(f"    Error: {error_data}")
+                message += f"\n    Error: {error_data}"
             except:
-                print(f"    Response: {response.text}")
-            return False
+                message += f"\n    Response: {response.text}"
+            return False, message
     
     except requests.exceptions.Timeout:
-        print("✗ FAILED (Timeout)")
-        return False
+        return False, "✗ FAILED (Timeout)"
     except requests.exceptions.ConnectionError:
-        print("✗ FAILED (Connection Error)")
-        return False
+        return False, "✗ FAILED (Connection Error)"
     except Exception as e:
-        print(f"✗ FAILED ({e})")
-        return False
+        return False, f"✗ FAILED ({e})"
+
+
+def execute_bmc_reset(client: RedfishClient, ip: str, system_name: str, timeout: int = 30) -> bool:
+    """
+    Execute BMC reset via Redfish API.
+    Returns True if successful, False otherwise.
+    """
+    print(f"  Executing BMC reset for {system_name} ({ip})...", end=" ", flush=True)
+    
+    success, message = send_bmc_reset(client, ip, timeout)
+    print(message)
+    
+    return success
+
+
+def execute_reset_waves(targets: List[Dict], client: RedfishClient, wave_size: int,
+                        max_failures: int = DEFAULT_MAX_FAILURES,
+                        recovery_deadline: float = DEFAULT_RECOVERY_DEADLINE,
+                        poll_interval: float = DEFAULT_RECOVERY_INTERVAL,
+                        max_in_flight: int = DEFAULT_MAX_IN_FLIGHT) -> Tuple[WaveRollout, Dict[str, float], Dict[str, float]]:
+    """
+    Reset the BMCs in rolling waves of `wave_size`.
+    The BMCs of a wave are reset concurrently; the wave's health gate then
+    waits for each of them to answer Redfish again before the next wave
+    starts. BMCs that fail to reset or to recover count towards `max_failures`.
+    Returns tuple of (rollout, reset times by IP, recovery seconds by IP).
+    """
+    reset_times: Dict[str, float] = {}
+    recovered: Dict[str, float] = {}
+    
+    def reset(target: Dict) -> Tuple[bool, str]:
+        success, message = send_bmc_reset(client, target['BMC_IP'])
+        if success:
+            reset_times[target['BMC_IP']] = time.monotonic()
+        return success, message
+    
+    def report(index: int, target: Dict, result: Tuple[bool, str]) -> None:
+        print(f"  BMC reset for {target['SYSTEM_NAME']} ({target['BMC_IP']})... {result[1]}")
+    
+    def run_wave(wave: List[Dict]) -> List[bool]:
+        results = fan_out(wave, reset, max_in_flight=max_in_flight, on_result=report)
+        return [success for success, _ in results]
+    
+    def health_gate(wave: List[Dict]) -> List[bool]:
+        wave_recovered, _ = wait_for_bmc_recovery(
+            wave, client, reset_times, f"/redfish/v1/Managers/{MANAGER_ID}",
+            recovery_deadline, poll_interval, max_in_flight=max_in_flight,
+            manager_path=f"/redfish/v1/Managers/{MANAGER_ID}"
+        )
+        recovered.update(wave_recovered)
+        return [target['BMC_IP'] in wave_recovered for target in wave]
+    
+    rollout = run_waves(targets, wave_size, run_wave, health_gate, max_failures)
+    return rollout, reset_times, recovered
 
 
 def get_user_confirmation(targets: List[Dict], compute_ips: Set[str]) -> bool:
@@ -278,8 +332,65 @@ def get_user_confirmation(targets: List[Dict], compute_ips: Set[str]) -> bool:
             print("Please enter 'yes' or 'no'")
 
 
+def parse_arguments():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(
+        description='GB300 Compute BMC Reset Tool'
+    )
+    
+    parser.add_argument(
+        '--wave-size',
+        type=int,
+        default=0,
+        help='Reset this many BMCs at a time, waiting for each wave to recover before the next '
+             '(default: 0 = one by one without waves)'
+    )
+    
+    parser.add_argument(
+        '--max-failures',
+        type=int,
+        default=DEFAULT_MAX_FAILURES,
+        help=f'With --wave-size, stop starting waves once more than this many BMCs failed to reset '
+             f'or recover (default: {DEFAULT_MAX_FAILURES})'
+    )
+    
+    parser.add_argument(
+        '--wait-recovery',
+        action='store_true',
+        help='After the resets, poll every BMC until Redfish answers again and report its recovery time'
+    )
+    
+    parser.add_argument(
+        '--recovery-deadline',
+        type=float,
+        default=DEFAULT_RECOVERY_DEADLINE,
+        help=f'Per-BMC deadline in seconds after its reset with --wait-recovery or --wave-size '
+             f'(default: {DEFAULT_RECOVERY_DEADLINE})'
+    )
+    
+    parser.add_argument(
+        '--poll-interval',
+        type=float,
+        default=DEFAULT_RECOVERY_INTERVAL,
+        help=f'Initial seconds between recovery polls, doubling up to {DEFAULT_MAX_RECOVERY_INTERVAL:g} '
+             f'(default: {DEFAULT_RECOVERY_INTERVAL:g})'
+    )
+    
+    parser.add_argument(
+        '--max-in-flight',
+        type=int,
+        default=DEFAULT_MAX_IN_FLIGHT,
+        help=f'Maximum concurrent Redfish requests in waves and while waiting for recovery '
+             f'(default: {DEFAULT_MAX_IN_FLIGHT})'
+    )
+    
+    return parser.parse_args()
+
+
 def main():
     """Main program flow."""
+    args = parse_arguments()
+    
     print("GB300 Compute BMC Reset Tool")
     print("=" * 40)
     
@@ -314,25 +425,49 @@ def main():
         unique_target_list = list(unique_targets.values())
         success_count = 0
         total_count = len(unique_target_list)
+        reset_times = {}
+        recovered = {}
+        unrecovered = []
+        not_run_count = 0
+        wait_recovery = args.wait_recovery or args.wave_size > 0
         
         print(f"Executing BMC resets for {total_count} unique IP addresses...")
         
-        for i, target in enumerate(unique_target_list, 1):
-            print(f"[{i}/{total_count}]", end=" ")
-            
-            success = execute_bmc_reset(
-                target['BMC_IP'],
-                username,
-                password,
-                target['SYSTEM_NAME']
-            )
-            
-            if success:
-                success_count += 1
-            
-            # Small delay between requests to avoid overwhelming BMCs
-            if i < total_count:
-                time.sleep(1)
+        with RedfishClient(username, password, pool_maxsize=max(1, args.max_in_flight)) as client:
+            if args.wave_size > 0:
+                rollout, reset_times, recovered = execute_reset_waves(
+                    unique_target_list, client, args.wave_size, max(0, args.max_failures),
+                    args.recovery_deadline, max(0.1, args.poll_interval), max(1, args.max_in_flight)
+                )
+                success_count = len(reset_times)
+                unrecovered = [target for target in rollout.failed if target['BMC_IP'] in reset_times]
+                not_run_count = len(rollout.not_run)
+            else:
+                for i, target in enumerate(unique_target_list, 1):
+                    print(f"[{i}/{total_count}]", end=" ")
+                    
+                    success = execute_bmc_reset(
+                        client,
+                        target['BMC_IP'],
+                        target['SYSTEM_NAME']
+                    )
+                    
+                    if success:
+                        success_count += 1
+                        reset_times[target['BMC_IP']] = time.monotonic()
+                    
+                    # Small delay between requests to avoid overwhelming BMCs
+                    if i < total_count:
+                        time.sleep(1)
+                
+                if args.wait_recovery and reset_times:
+                    recovered, unrecovered = wait_for_bmc_recovery(
+                        [target for target in unique_target_list if target['BMC_IP'] in reset_times],
+                        client, reset_times, f"/redfish/v1/Managers/{MANAGER_ID}",
+                        args.recovery_deadline, max(0.1, args.poll_interval),
+                        max_in_flight=max(1, args.max_in_flight),
+                        manager_path=f"/redfish/v1/Managers/{MANAGER_ID}"
+                    )
         
         # Summary
         print(f"\n" + "=" * 60)
@@ -340,9 +475,20 @@ def main():
         print("=" * 60)
         print(f"Total systems: {total_count}")
         print(f"Successful resets: {success_count}")
-        print(f"Failed resets: {total_count - success_count}")
+        print(f"Failed resets: {total_count - success_count - not_run_count}")
+        if not_run_count:
+            print(f"Not reset (stopped after failures): {not_run_count}")
+        if wait_recovery and reset_times:
+            print(f"Recovered BMCs: {len(recovered)}/{len(reset_times)}")
+            if recovered:
+                slowest = max(recovered, key=recovered.get)
+                print(f"Slowest recovery: {unique_targets[slowest]['SYSTEM_NAME']} ({slowest}) "
+                      f"after {recovered[slowest]:.1f}s")
         
-        if success_count == total_count:
+        if unrecovered:
+            print("⚠ Some BMCs did not come back. Check the output above for details.")
+            sys.exit(1)
+        elif success_count == total_count:
             print("✓ All BMC resets completed successfully!")
         else:
             print("⚠ Some BMC resets failed. Check the output above for details.")
@@ -10,14 +10,26 @@ import yaml
 import requests
 import time
 import logging
+import argparse
 from datetime import datetime
 from typing import List, Dict, Tuple
 import urllib3
-from requests.auth import HTTPBasicAuth
+
+from redfish_client import RedfishClient
+from fw_upload import (
+    PackageBuffer, ThrottledReader, UploadProgress, InlineProgressDisplay, record_upload_metrics, MEGABYTE,
+    DEFAULT_METRICS_FILE
+)
+from log_utils import setup_queue_logging
+from fw_inventory import split_current_targets
+from fanout import DEFAULT_MAX_IN_FLIGHT
 
 # Disable SSL warnings for self-signed certificates
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
+# Seconds between upload progress updates on the console
+PROGRESS_INTERVAL = 0.5
+
 
 class BMCUpdateError(Exception):
     """Custom exception for BMC update operations."""
@@ -25,7 +37,7 @@ class BMCUpdateError(Exception):
 
 
 def setup_logging():
-    """Set up logging to both console and file with timestamps."""
+    """Set up queue-backed logging to both console and file with timestamps."""
     # Create logs directory if it doesn't exist
     log_dir = './logs'
     if not os.path.exists(log_dir):
@@ -35,31 +47,8 @@ def setup_logging():
     # Set up logging configuration
     log_file = os.path.join(log_dir, 'nvsw_bmc_update.log')
     
-    # Create custom formatter with timestamp
-    formatter = logging.Formatter(
-        fmt='%(asctime)s - %(levelname)s - %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
-    
-    # Set up root logger
-    logger = logging.getLogger()
-    logger.setLevel(logging.INFO)
-    
-    # Remove any existing handlers
-    for handler in logger.handlers[:]:
-        logger.removeHandler(handler)
-    
-    # File handler (append mode)
-    file_handler = logging.FileHandler(log_file, mode='a', encoding='utf-8')
-    file_handler.setLevel(logging.INFO)
-    file_handler.setFormatter(formatter)
-    logger.addHandler(file_handler)
-    
-    # Console handler
-    console_handler = logging.StreamHandler(sys.stdout)
-    console_handler.setLevel(logging.INFO)
-    console_handler.setFormatter(logging.Formatter('%(message)s'))
-    logger.addHandler(console_handler)
+    # File records are written by a background thread; see log_utils
+    logger = setup_queue_logging(log_file, console=True)
     
     return logger
 
@@ -74,6 +63,27 @@ def log_print(message, end='\n', flush=False):
         logging.info(message.rstrip())
 
 
+def parse_arguments():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(
+        description='GB300 Switch BMC Firmware Update Tool',
+        epilog='''
+Examples:
+  python nvsw_bmc_update.py           # Update switches not yet running the package
+  python nvsw_bmc_update.py --force   # Update every switch
+        ''',
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    
+    parser.add_argument(
+        '--force',
+        action='store_true',
+        help="Update every target, even those that already run the package's firmware"
+    )
+    
+    return parser.parse_args()
+
+
 def log_session_start():
     """Log the start of a new session."""
     session_start = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
@@ -149,36 +159,38 @@ def validate_firmware_file(package_path: str) -> None:
     log_print(f"Firmware file validated: {package_path} ({file_size:,} bytes)")
 
 
-def execute_bmc_update(ip: str, username: str, password: str, system_name: str, 
-                      package_path: str, timeout: int = 300) -> bool:
+def execute_bmc_update(client: RedfishClient, ip: str, system_name: str,
+                       package: PackageBuffer, timeout: int = 300) -> bool:
     """
     Execute BMC firmware update via Redfish API.
+    Shows bytes sent, MB/s and ETA while uploading and appends the transfer
+    throughput to the upload metrics file.
     Returns True if successful, False otherwise.
     """
-    base_url = f"https://{ip}"
-    update_url = f"{base_url}/redfish/v1/UpdateService"
+    update_path = "/redfish/v1/UpdateService"
     
     headers = {
         'Content-Type': 'application/octet-stream'
     }
     
+    progress = UploadProgress(package.size, InlineProgressDisplay(), PROGRESS_INTERVAL)
+    success = False
+    
     try:
         log_print(f"  Uploading firmware to {system_name} ({ip})...", end=" ", flush=True)
         
-        # Open and read the firmware file
-        with open(package_path, 'rb') as firmware_file:
-            response = requests.post(
-                update_url,
-                headers=headers,
-                data=firmware_file,
-                auth=HTTPBasicAuth(username, password),
-                verify=False,
-                timeout=timeout
-            )
+        # Stream the firmware from the shared package buffer
+        response = client.post(
+            ip,
+            update_path,
+            headers=headers,
+            data=ThrottledReader(package, progress=progress),
+            timeout=timeout
+        )
         
         if response.status_code in [200, 202, 204]:
             log_print("✓ SUCCESS")
-            return True
+            success = True
         else:
             log_print(f"✗ FAILED (HTTP {response.status_code})")
             try:
@@ -186,20 +198,29 @@ def execute_bmc_update(ip: str, username: str, password: str, system_name: str,
                 log_print(f"    Error: {error_data}")
             except:
                 log_print(f"    Response: {response.text}")
-            return False
     
     except requests.exceptions.Timeout:
         log_print("✗ FAILED (Timeout)")
-        return False
     except requests.exceptions.ConnectionError:
         log_print("✗ FAILED (Connection Error)")
-        return False
-    except FileNotFoundError:
-        log_print(f"✗ FAILED (Firmware file not found: {package_path})")
-        return False
     except Exception as e:
         log_print(f"✗ FAILED ({e})")
-        return False
+    
+    # Logged after the result so the console handler does not break the progress line
+    logging.info(f"    Transfer: {progress.summary()} in {progress.elapsed:.1f} seconds")
+    record_upload_metrics({
+        'script': 'nvsw_bmc_update.py',
+        'mode': 'sequential',
+        'ip': ip,
+        'system_name': system_name,
+        'package': package.name,
+        'bytes_sent': progress.sent,
+        'transfer_seconds': round(progress.elapsed, 3),
+        'mb_per_second': round(progress.rate / MEGABYTE, 2),
+        'success': success
+    })
+    
+    return success
 
 
 def get_unique_targets(targets: List[Dict]) -> List[Dict]:
@@ -249,6 +270,9 @@ def get_user_confirmation(targets: List[Dict]) -> bool:
 
 def main():
     """Main program flow."""
+    # Parse command line arguments
+    args = parse_arguments()
+    
     # Set up logging first (before any output)
     logger = setup_logging()
     log_session_start()
@@ -277,6 +301,21 @@ def main():
         
         log_print(f"\n✓ Using credentials - Username: {username}")
         
+        # Pre-flight: drop targets that already run the package's firmware
+        skipped_count = 0
+        if not args.force:
+            log_print("\nChecking installed firmware versions...")
+            with RedfishClient(username, password, pool_maxsize=DEFAULT_MAX_IN_FLIGHT) as client:
+                unique_targets, current_targets, notes = split_current_targets(
+                    client, unique_targets, package_path
+                )
+            for note in notes:
+                log_print(note)
+            skipped_count = len(current_targets)
+            if not unique_targets:
+                log_print("✓ All systems already run this firmware; nothing to update.")
+                return
+        
         # Display summary and get confirmation
         display_summary(unique_targets, package_path)
         
@@ -293,32 +332,36 @@ def main():
         success_count = 0
         total_count = len(unique_targets)
         
-        for i, target in enumerate(unique_targets, 1):
-            log_print(f"\n[{i}/{total_count}]", end=" ")
-            
-            success = execute_bmc_update(
-                target['BMC_IP'],
-                username,
-                password,
-                target['SYSTEM_NAME'],
-                target['PACKAGE']
-            )
-            
-            if success:
-                success_count += 1
-            
-            # Delay between updates to avoid overwhelming the network
-            if i < total_count:
-                log_print("  Waiting 5 seconds before next update...")
-                time.sleep(5)
+        # Map the package once and stream every upload from the same memory
+        with PackageBuffer(package_path) as package, RedfishClient(username, password) as client:
+            for i, target in enumerate(unique_targets, 1):
+                log_print(f"\n[{i}/{total_count}]", end=" ")
+                
+                success = execute_bmc_update(
+                    client,
+                    target['BMC_IP'],
+                    target['SYSTEM_NAME'],
+                    package
+                )
+                
+                if success:
+                    success_count += 1
+                
+                # Delay between updates to avoid overwhelming the network
+                if i < total_count:
+                    log_print("  Waiting 5 seconds before next update...")
+                    time.sleep(5)
         
         # Final summary
         log_print(f"\n" + "=" * 60)
         log_print("BMC UPDATE SUMMARY")
         log_print("=" * 60)
-        log_print(f"Total systems: {total_count}")
+        log_print(f"Total systems: {total_count + skipped_count}")
+        if skipped_count:
+            log_print(f"Already current (skipped): {skipped_count}")
         log_print(f"Successful updates: {success_count}")
         log_print(f"Failed updates: {total_count - success_count}")
+        log_print(f"Upload throughput per system appended to {DEFAULT_METRICS_FILE}")
         
         if success_count == total_count:
             log_print("✓ All BMC firmware updates completed successfully!")
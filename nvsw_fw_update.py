@@ -12,10 +12,33 @@ import requests
 import time
 import logging
 import argparse
+import json
+import threading
 from datetime import datetime
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Optional, Callable
 import urllib3
-from requests.auth import HTTPBasicAuth
+
+from redfish_client import RedfishClient, ResourcePathCache
+from log_utils import setup_queue_logging
+from fanout import fan_out, RateLimiter, DEFAULT_MAX_IN_FLIGHT
+from fw_inventory import split_current_targets
+from redfish_tasks import TaskPoller, task_uri_from_response, is_task_successful
+from waves import run_waves, WaveRollout, DEFAULT_MAX_FAILURES
+from fw_upload import (
+    PackageBuffer, ThrottledReader, MultipartUpload, UploadProgress, InlineProgressDisplay,
+    create_bandwidth_limiter, build_update_parameters, discover_push_uri, record_upload_metrics,
+    MEGABYTE, DEFAULT_METRICS_FILE
+)
+
+# Default maximum number of concurrent uploads in parallel mode
+DEFAULT_MAX_UPLOADS = 4
+
+# Seconds between upload progress reports (sequential / parallel mode)
+PROGRESS_INTERVAL = 0.5
+PARALLEL_PROGRESS_INTERVAL = 5.0
+
+# Seconds to keep following the update tasks after the last upload
+DEFAULT_TASK_TIMEOUT = 3600
 
 # Disable SSL warnings for self-signed certificates
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
@@ -27,7 +50,7 @@ class FirmwareUpdateError(Exception):
 
 
 def setup_logging(package_type: str):
-    """Set up logging to both console and file with timestamps."""
+    """Set up queue-backed logging to both console and file with timestamps."""
     # Create logs directory if it doesn't exist
     log_dir = './logs'
     if not os.path.exists(log_dir):
@@ -37,25 +60,8 @@ def setup_logging(package_type: str):
     # Set up logging configuration
     log_file = os.path.join(log_dir, f'switch_{package_type}.log')
     
-    # Create custom formatter with timestamp
-    formatter = logging.Formatter(
-        fmt='%(asctime)s - %(levelname)s - %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
-    
-    # Set up root logger
-    logger = logging.getLogger()
-    logger.setLevel(logging.INFO)
-    
-    # Remove any existing handlers
-    for handler in logger.handlers[:]:
-        logger.removeHandler(handler)
-    
-    # File handler (append mode) - console output handled by log_print function
-    file_handler = logging.FileHandler(log_file, mode='a', encoding='utf-8')
-    file_handler.setLevel(logging.INFO)
-    file_handler.setFormatter(formatter)
-    logger.addHandler(file_handler)
+    # Records are written by a background thread; see log_utils
+    logger = setup_queue_logging(log_file)
     
     return logger
 
@@ -92,6 +98,11 @@ Examples:
   python nvsw_fw_update.py -p bmc     # Update BMC firmware
   python nvsw_fw_update.py -p bios    # Update BIOS firmware
   python nvsw_fw_update.py -p cpld    # Update CPLD firmware
+  python nvsw_fw_update.py -p bios --parallel --max-uploads 9 --bandwidth 100
+  python nvsw_fw_update.py -p bmc --no-multipart   # Always push the raw package
+  python nvsw_fw_update.py -p cpld --no-wait        # Do not follow the update tasks
+  python nvsw_fw_update.py -p bios --force          # Also update switches already current
+  python nvsw_fw_update.py -p bmc --wave-size 4     # Update 4 switches at a time, tasks done before the next 4
         ''',
         formatter_class=argparse.RawDescriptionHelpFormatter
     )
@@ -103,6 +114,73 @@ Examples:
         help='Firmware package type to update (bmc, bios, or cpld)'
     )
     
+    parser.add_argument(
+        '--parallel',
+        action='store_true',
+        help='Upload to several systems at once instead of one at a time'
+    )
+    
+    parser.add_argument(
+        '--max-uploads',
+        type=int,
+        default=DEFAULT_MAX_UPLOADS,
+        help=f'Maximum concurrent uploads in parallel and wave modes (default: {DEFAULT_MAX_UPLOADS})'
+    )
+    
+    parser.add_argument(
+        '--bandwidth',
+        type=float,
+        default=0,
+        help='Aggregate upload bandwidth cap in MB/s across all uploads (default: 0 = unlimited)'
+    )
+    
+    parser.add_argument(
+        '--no-multipart',
+        action='store_true',
+        help='Push the raw package even if the BMC supports MultipartHttpPushUri'
+    )
+    
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Rediscover UpdateService push URIs instead of using the cached values'
+    )
+    
+    parser.add_argument(
+        '--force',
+        action='store_true',
+        help="Update every target, even those that already run the package's firmware"
+    )
+    
+    parser.add_argument(
+        '--wave-size',
+        type=int,
+        default=0,
+        help='Update this many systems at a time (concurrently), following their update tasks to '
+             'completion before the next wave (default: 0 = no waves)'
+    )
+    
+    parser.add_argument(
+        '--max-failures',
+        type=int,
+        default=DEFAULT_MAX_FAILURES,
+        help=f'With --wave-size, stop starting waves once more than this many systems failed '
+             f'(default: {DEFAULT_MAX_FAILURES})'
+    )
+    
+    parser.add_argument(
+        '--no-wait',
+        action='store_true',
+        help='Do not follow the update tasks after uploading'
+    )
+    
+    parser.add_argument(
+        '--task-timeout',
+        type=float,
+        default=DEFAULT_TASK_TIMEOUT,
+        help=f'Seconds to wait for update tasks to finish after the uploads (default: {DEFAULT_TASK_TIMEOUT})'
+    )
+    
     return parser.parse_args()
 
 
@@ -140,6 +218,11 @@ def load_switch_yaml(package_type: str) -> Tuple[List[Dict], str, str]:
         for field in required_fields:
             if field not in target:
                 raise FirmwareUpdateError(f"Target {i+1} in {yaml_file} missing required field: {field}")
+        
+        update_targets = target.get('UPDATE_PARAMETERS_TARGETS')
+        if update_targets is not None and not isinstance(update_targets, (dict, list)):
+            raise FirmwareUpdateError(f"Target {i+1} in {yaml_file} has invalid UPDATE_PARAMETERS_TARGETS: "
+                                      f"expected a mapping or a list")
     
     # Extract username and password (assuming all targets use same credentials)
     username = targets[0]['RF_USERNAME']
@@ -169,82 +252,391 @@ def validate_firmware_file(package_path: str) -> None:
     log_print(f"Firmware file validated: {package_path} ({file_size:,} bytes)")
 
 
-def execute_firmware_update(ip: str, username: str, password: str, system_name: str, 
-                           package_path: str, timeout: int = 300) -> bool:
+def send_firmware_update(client: RedfishClient, ip: str, package: PackageBuffer,
+                         timeout: int = 300, limiter: Optional[RateLimiter] = None,
+                         progress_report: Optional[Callable[[UploadProgress], None]] = None,
+                         progress_interval: float = PROGRESS_INTERVAL,
+                         update_parameters: Optional[Dict] = None,
+                         multipart: bool = True) -> Dict:
     """
-    Execute firmware update via Redfish API.
-    Returns True if successful, False otherwise.
+    Push the firmware package to one BMC via Redfish API without printing.
+    Uses the BMC's MultipartHttpPushUri with `update_parameters` (e.g. Targets)
+    when it has one and `multipart` is True, otherwise a raw push to HttpPushUri.
+    The body is streamed from the shared package buffer in chunks through the
+    optional shared bandwidth limiter; `progress_report` is called with the
+    UploadProgress at most every `progress_interval` seconds.
+    Returns a dict with success, message, details (request/response log lines),
+    elapsed (upload seconds), bytes_sent, transfer_seconds, mb_per_second and
+    task_uri (the update task, or None).
     """
-    base_url = f"https://{ip}"
-    update_url = f"{base_url}/redfish/v1/UpdateService"
+    if update_parameters is None:
+        update_parameters = build_update_parameters(None)
     
-    headers = {
-        'Content-Type': 'application/octet-stream'
-    }
+    result = {'success': False, 'message': '', 'details': [], 'elapsed': 0.0,
+              'bytes_sent': 0, 'transfer_seconds': 0.0, 'mb_per_second': 0.0, 'task_uri': None}
+    details = result['details']
     
-    try:
-        log_print(f"  Uploading firmware to {system_name} ({ip})...", end=" ", flush=True)
+    progress = UploadProgress(package.size, progress_report, progress_interval)
+    
+    def push(use_cache: bool = True) -> requests.Response:
+        http_uri, multipart_uri = discover_push_uri(client, ip, use_cache=use_cache)
+        
+        if multipart and multipart_uri:
+            update_path = multipart_uri
+            body = MultipartUpload(package, update_parameters, limiter, progress=progress)
+            headers = {'Content-Type': body.content_type}
+        else:
+            update_path = http_uri
+            body = ThrottledReader(package, limiter, progress=progress)
+            headers = {'Content-Type': 'application/octet-stream'}
         
         # Log request details
-        log_print(f"\n    Request URL: {update_url}")
-        log_print(f"    Request Headers: {headers}")
-        log_print(f"    Request Method: POST")
-        log_print(f"    Authentication: Basic (user: {username})")
-        log_print(f"    Firmware File: {os.path.basename(package_path)}")
+        details.append(f"    Request URL: {client.url(ip, update_path)}")
+        details.append(f"    Request Headers: {headers}")
+        details.append(f"    Request Method: POST")
+        details.append(f"    Authentication: Basic (user: {client.username})")
+        details.append(f"    Firmware File: {package.name}")
+        if isinstance(body, MultipartUpload):
+            details.append(f"    Update Parameters: {json.dumps(update_parameters)}")
+        elif update_parameters.get('Targets'):
+            details.append(f"    ⚠ No multipart push available; Targets ignored, full package pushed")
+        
+        return client.post(ip, update_path, headers=headers, data=body, timeout=timeout)
+    
+    cache = client.path_cache
+    cached = cache is not None and cache.get(ip, 'http_push_uri') is not None
+    
+    start = time.monotonic()
+    try:
+        response = push()
         
-        # Open and read the firmware file
-        with open(package_path, 'rb') as firmware_file:
-            response = requests.post(
-                update_url,
-                headers=headers,
-                data=firmware_file,
-                auth=HTTPBasicAuth(username, password),
-                verify=False,
-                timeout=timeout
-            )
+        # A cached push URI can go stale (e.g. after a BMC update); rediscover once
+        if response.status_code in [404, 405] and cached:
+            details.append(f"    HTTP {response.status_code} from cached push URI, rediscovering")
+            cache.invalidate(ip, 'http_push_uri')
+            cache.invalidate(ip, 'multipart_push_uri')
+            response = push(use_cache=False)
+        
+        result['elapsed'] = time.monotonic() - start
         
         # Log comprehensive response details
-        log_print(f"\n    HTTP Response Details:")
-        log_print(f"    Status Code: {response.status_code}")
-        log_print(f"    Status Reason: {response.reason}")
-        log_print(f"    Response Headers: {dict(response.headers)}")
-        log_print(f"    Response URL: {response.url}")
-        log_print(f"    Response Time: {response.elapsed.total_seconds():.2f} seconds")
+        details.append(f"")
+        details.append(f"    Transfer: {progress.summary()} in {progress.elapsed:.1f} seconds")
+        details.append(f"    HTTP Response Details:")
+        details.append(f"    Status Code: {response.status_code}")
+        details.append(f"    Status Reason: {response.reason}")
+        details.append(f"    Response Headers: {dict(response.headers)}")
+        details.append(f"    Response URL: {response.url}")
+        details.append(f"    Response Time: {response.elapsed.total_seconds():.2f} seconds")
         
         # Log response content
         if response.text:
-            log_print(f"    Response Body:")
+            details.append(f"    Response Body:")
             try:
                 # Try to parse as JSON for prettier output
                 response_json = response.json()
-                import json
-                log_print(f"    {json.dumps(response_json, indent=6)}")
+                details.append(f"    {json.dumps(response_json, indent=6)}")
             except:
                 # If not JSON, log as plain text
                 for line in response.text.splitlines():
-                    log_print(f"    {line}")
+                    details.append(f"    {line}")
         else:
-            log_print(f"    Response Body: (empty)")
+            details.append(f"    Response Body: (empty)")
         
         if response.status_code in [200, 202, 204]:
-            log_print("    Result: ✓ SUCCESS")
-            return True
+            result['success'] = True
+            result['message'] = "✓ SUCCESS"
+            result['task_uri'] = task_uri_from_response(response)
         else:
-            log_print(f"    Result: ✗ FAILED (HTTP {response.status_code})")
-            return False
+            result['message'] = f"✗ FAILED (HTTP {response.status_code})"
     
     except requests.exceptions.Timeout:
-        log_print("✗ FAILED (Timeout)")
-        return False
+        result['message'] = "✗ FAILED (Timeout)"
     except requests.exceptions.ConnectionError:
-        log_print("✗ FAILED (Connection Error)")
-        return False
-    except FileNotFoundError:
-        log_print(f"✗ FAILED (Firmware file not found: {package_path})")
-        return False
+        result['message'] = "✗ FAILED (Connection Error)"
     except Exception as e:
-        log_print(f"✗ FAILED ({e})")
-        return False
+        result['message'] = f"✗ FAILED ({e})"
+    
+    if not result['elapsed']:
+        result['elapsed'] = time.monotonic() - start
+    result['bytes_sent'] = progress.sent
+    result['transfer_seconds'] = progress.elapsed
+    result['mb_per_second'] = progress.rate / MEGABYTE
+    
+    return result
+
+
+def save_upload_metrics(target: Dict, package: PackageBuffer, result: Dict, mode: str) -> None:
+    """Append the throughput of one upload to the metrics file."""
+    record_upload_metrics({
+        'script': 'nvsw_fw_update.py',
+        'mode': mode,
+        'ip': target['BMC_IP'],
+        'system_name': target['SYSTEM_NAME'],
+        'package': package.name,
+        'bytes_sent': result['bytes_sent'],
+        'transfer_seconds': round(result['transfer_seconds'], 3),
+        'mb_per_second': round(result['mb_per_second'], 2),
+        'success': result['success']
+    })
+
+
+def hand_off_task(poller: TaskPoller, target: Dict, result: Dict) -> str:
+    """
+    Start following the update task of a successful upload.
+    Returns a status line for the console.
+    """
+    if not result['task_uri']:
+        return f"    ⚠ No task returned by {target['SYSTEM_NAME']}; flash completion cannot be tracked"
+    
+    poller.add(target['BMC_IP'], target['SYSTEM_NAME'], result['task_uri'])
+    return f"    Tracking task {result['task_uri']}"
+
+
+def execute_firmware_update(client: RedfishClient, ip: str, system_name: str,
+                            package: PackageBuffer, timeout: int = 300,
+                            limiter: Optional[RateLimiter] = None,
+                            update_parameters: Optional[Dict] = None,
+                            multipart: bool = True,
+                            poller: Optional[TaskPoller] = None) -> bool:
+    """
+    Execute firmware update via Redfish API.
+    The update task of a successful upload is handed off to `poller`, if given.
+    Returns True if successful, False otherwise.
+    """
+    log_print(f"  Uploading firmware to {system_name} ({ip})...", end=" ", flush=True)
+    
+    # Progress is console only; the final transfer summary is logged with the response
+    result = send_firmware_update(client, ip, package, timeout, limiter, InlineProgressDisplay(),
+                                  update_parameters=update_parameters, multipart=multipart)
+    save_upload_metrics({'BMC_IP': ip, 'SYSTEM_NAME': system_name}, package, result, 'sequential')
+    
+    log_print("")
+    for line in result['details']:
+        log_print(line)
+    log_print(f"    Result: {result['message']}")
+    if poller is not None and result['success']:
+        log_print(hand_off_task(poller, {'BMC_IP': ip, 'SYSTEM_NAME': system_name}, result))
+    
+    return result['success']
+
+
+def execute_serial_updates(client: RedfishClient, targets: List[Dict], package: PackageBuffer,
+                           limiter: Optional[RateLimiter] = None, multipart: bool = True,
+                           poller: Optional[TaskPoller] = None) -> int:
+    """
+    Upload the firmware package to one target at a time, pausing between them.
+    Returns the number of successful uploads.
+    """
+    success_count = 0
+    total_count = len(targets)
+    
+    for i, target in enumerate(targets, 1):
+        log_print(f"\n[{i}/{total_count}]", end=" ")
+        
+        success = execute_firmware_update(
+            client,
+            target['BMC_IP'],
+            target['SYSTEM_NAME'],
+            package,
+            limiter=limiter,
+            update_parameters=build_update_parameters(target.get('UPDATE_PARAMETERS_TARGETS')),
+            multipart=multipart,
+            poller=poller
+        )
+        
+        if success:
+            success_count += 1
+        
+        # Delay between updates to avoid overwhelming the network
+        if i < total_count:
+            log_print("  Waiting 5 seconds before next update...")
+            time.sleep(5)
+    
+    return success_count
+
+
+def execute_parallel_updates(client: RedfishClient, targets: List[Dict], package: PackageBuffer,
+                             max_uploads: int = DEFAULT_MAX_UPLOADS,
+                             limiter: Optional[RateLimiter] = None,
+                             timeout: int = 300, multipart: bool = True,
+                             poller: Optional[TaskPoller] = None) -> List[Dict]:
+    """
+    Upload the firmware package to all targets concurrently.
+    At most `max_uploads` uploads run at once and all of them share the
+    optional bandwidth limiter. Full request/response details go to the log
+    file; the console gets one line per system. Update tasks are handed off
+    to `poller` as each upload finishes, if given.
+    Returns the upload result dicts, in target order.
+    """
+    total = len(targets)
+    start = time.monotonic()
+    completed = [0]
+    
+    output_lock = threading.Lock()
+    
+    def progress_reporter(target: Dict) -> Callable[[UploadProgress], None]:
+        def show_progress(progress: UploadProgress) -> None:
+            if progress.sent < progress.total:
+                with output_lock:
+                    print(f"    {target['SYSTEM_NAME']} ({target['BMC_IP']}): {progress.summary()}")
+        return show_progress
+    
+    def report(index: int, target: Dict, result: Dict) -> None:
+        completed[0] += 1
+        save_upload_metrics(target, package, result, 'parallel')
+        logging.info("\n".join([f"Upload details for {target['SYSTEM_NAME']} ({target['BMC_IP']}):"]
+                               + result['details']))
+        with output_lock:
+            log_print(f"[{completed[0]}/{total}]   {target['SYSTEM_NAME']} ({target['BMC_IP']}): "
+                      f"{result['message']} ({result['elapsed']:.1f}s, {result['mb_per_second']:.1f} MB/s)")
+            if poller is not None and result['success']:
+                log_print(hand_off_task(poller, target, result))
+    
+    def upload(target: Dict) -> Dict:
+        return send_firmware_update(
+            client, target['BMC_IP'], package, timeout, limiter,
+            progress_reporter(target), PARALLEL_PROGRESS_INTERVAL,
+            update_parameters=build_update_parameters(target.get('UPDATE_PARAMETERS_TARGETS')),
+            multipart=multipart
+        )
+    
+    results = fan_out(
+        targets,
+        upload,
+        max_in_flight=max_uploads,
+        on_result=report
+    )
+    
+    log_print(f"Uploads to {total} systems finished in {time.monotonic() - start:.1f}s")
+    log_print(f"Per-system throughput appended to {DEFAULT_METRICS_FILE}")
+    return results
+
+
+def format_task_table(results: List[Dict]) -> List[str]:
+    """Format the tracked update tasks as aligned table lines."""
+    headers = ['System', 'BMC IP', 'Task', 'State', 'Complete', 'Time']
+    rows = []
+    for result in results:
+        percent = result['percent_complete']
+        rows.append([
+            result['system_name'],
+            result['ip'],
+            result['task_id'],
+            result['task_state'] or (result['status'] if result['error'] else '-'),
+            f"{percent}%" if percent is not None else '-',
+            f"{result['seconds']:.0f}s" if result['seconds'] is not None else '-'
+        ])
+    
+    widths = [max(len(str(row[i])) for row in rows + [headers]) for i in range(len(headers))]
+    lines = ["  ".join(header.ljust(width) for header, width in zip(headers, widths)).rstrip()]
+    lines.append("  ".join('-' * width for width in widths))
+    for row in rows:
+        lines.append("  ".join(str(value).ljust(width) for value, width in zip(row, widths)).rstrip())
+    
+    return lines
+
+
+def render_task_dashboard(results: List[Dict]) -> List[str]:
+    """Build the task tracking dashboard lines."""
+    finished = sum(1 for result in results if result['finished_at'] is not None)
+    lines = [f"Tracking {len(results)} update tasks - {finished} finished, "
+             f"{len(results) - finished} in progress", ""]
+    lines.extend(format_task_table(results))
+    
+    return lines
+
+
+def track_update_tasks(poller: TaskPoller, task_timeout: float) -> Tuple[int, int]:
+    """
+    Follow all handed-off update tasks until they finish or the timeout passes,
+    then report each system's result and completion time.
+    Returns tuple of (completed_count, tracked_count).
+    """
+    if not poller.results():
+        return 0, 0
+    
+    log_print(f"\n" + "=" * 60)
+    log_print("TRACKING FIRMWARE UPDATE TASKS")
+    log_print("=" * 60)
+    results = poller.wait(render_task_dashboard, deadline=task_timeout)
+    
+    completed_count = 0
+    log_print("")
+    for result in results:
+        name = f"{result['system_name']} ({result['ip']})"
+        if result['gave_up']:
+            log_print(f"  ✗ {name}: task {result['task_id']} unreadable after {result['errors']} "
+                      f"failed polls ({result['status']})")
+        elif result['finished_at'] is None:
+            state = result['task_state'] or result['status'] or 'Unknown'
+            percent = f" ({result['percent_complete']}%)" if result['percent_complete'] is not None else ""
+            log_print(f"  ⚠ {name}: still {state}{percent} after {task_timeout:.0f}s")
+        elif is_task_successful(result['task_state'], result['task_status']):
+            completed_count += 1
+            log_print(f"  ✓ {name}: task {result['task_id']} completed in {result['seconds']:.0f}s")
+        else:
+            log_print(f"  ✗ {name}: task {result['task_id']} {result['task_state']} "
+                      f"({result['task_status']}) after {result['seconds']:.0f}s")
+    
+    return completed_count, len(results)
+
+
+def execute_update_waves(client: RedfishClient, targets: List[Dict], package: PackageBuffer,
+                         wave_size: int, max_failures: int = DEFAULT_MAX_FAILURES,
+                         limiter: Optional[RateLimiter] = None, multipart: bool = True,
+                         task_timeout: Optional[float] = DEFAULT_TASK_TIMEOUT,
+                         max_uploads: int = DEFAULT_MAX_UPLOADS) -> Tuple[WaveRollout, int, int, int]:
+    """
+    Update the targets in rolling waves of `wave_size`.
+    The uploads of a wave run concurrently (at most `max_uploads` at once)
+    and share the bandwidth limiter; the wave's health gate then follows its
+    update tasks until they finish (skipped when `task_timeout` is None).
+    Failed uploads, uploads that returned no update task, and failed or
+    unfinished tasks count towards `max_failures`.
+    Returns tuple of (rollout, successful_uploads, completed_tasks, tracked_tasks).
+    """
+    counts = {'uploads': 0, 'completed': 0, 'tracked': 0}
+    pollers: List[TaskPoller] = []
+    
+    def run_wave(wave: List[Dict]) -> List[bool]:
+        pollers.append(TaskPoller(client))
+        results = execute_parallel_updates(
+            client, wave, package, min(max_uploads, len(wave)), limiter, multipart=multipart,
+            poller=pollers[-1] if task_timeout is not None else None
+        )
+        counts['uploads'] += sum(1 for result in results if result['success'])
+        return [result['success'] for result in results]
+    
+    def health_gate(wave: List[Dict]) -> List[bool]:
+        poller = pollers[-1]
+        completed_count, tracked_count = track_update_tasks(poller, task_timeout)
+        poller.stop()
+        counts['completed'] += completed_count
+        counts['tracked'] += tracked_count
+        
+        tracked_ips = {result['ip'] for result in poller.results()}
+        failed_ips = {result['ip'] for result in poller.results()
+                      if result['finished_at'] is None
+                      or not is_task_successful(result['task_state'], result['task_status'])}
+        
+        # Without a task the update cannot be confirmed, so the wave must not pass on it
+        for target in wave:
+            if target['BMC_IP'] not in tracked_ips:
+                log_print(f"  ✗ {target['SYSTEM_NAME']} ({target['BMC_IP']}): upload returned no update task, "
+                          f"update not confirmed")
+                failed_ips.add(target['BMC_IP'])
+        return [target['BMC_IP'] not in failed_ips for target in wave]
+    
+    try:
+        rollout = run_waves(targets, wave_size, run_wave,
+                            health_gate if task_timeout is not None else None,
+                            max_failures, log=log_print)
+    finally:
+        for poller in pollers:
+            poller.stop()
+    
+    return rollout, counts['uploads'], counts['completed'], counts['tracked']
 
 
 def get_unique_targets(targets: List[Dict]) -> List[Dict]:
@@ -327,6 +719,21 @@ def main():
         
         log_print(f"\n✓ Using credentials - Username: {username}")
         
+        # Pre-flight: drop targets that already run the package's firmware
+        skipped_count = 0
+        if not args.force:
+            log_print("\nChecking installed firmware versions...")
+            with RedfishClient(username, password, pool_maxsize=DEFAULT_MAX_IN_FLIGHT) as client:
+                unique_targets, current_targets, notes = split_current_targets(
+                    client, unique_targets, package_path
+                )
+            for note in notes:
+                log_print(note)
+            skipped_count = len(current_targets)
+            if not unique_targets:
+                log_print("✓ All systems already run this firmware; nothing to update.")
+                return
+        
         # Display summary and get confirmation
         display_summary(unique_targets, package_path, package_type)
         
@@ -340,37 +747,58 @@ def main():
         log_print("=" * 60)
         log_print(f"Updating {len(unique_targets)} unique systems...")
         
-        success_count = 0
         total_count = len(unique_targets)
+        limiter = create_bandwidth_limiter(args.bandwidth)
+        if limiter is not None:
+            log_print(f"Aggregate upload bandwidth capped at {args.bandwidth:g} MB/s")
+        
+        # Push URIs discovered from each BMC's UpdateService are cached across runs
+        path_cache = None if args.no_cache else ResourcePathCache()
+        multipart = not args.no_multipart
+        
+        # Map the package once and stream every upload from the same memory; update
+        # tasks are followed in the background while the remaining uploads run
+        rollout = None
+        with PackageBuffer(package_path) as package, \
+                RedfishClient(username, password, path_cache=path_cache,
+                              pool_maxsize=max(1, args.max_uploads) + DEFAULT_MAX_IN_FLIGHT) as client, \
+                TaskPoller(client, max_in_flight=DEFAULT_MAX_IN_FLIGHT) as poller:
+            task_poller = None if args.no_wait else poller
+            if args.wave_size > 0:
+                rollout, success_count, completed_count, tracked_count = execute_update_waves(
+                    client, unique_targets, package, args.wave_size, max(0, args.max_failures), limiter,
+                    multipart, None if args.no_wait else args.task_timeout, max(1, args.max_uploads)
+                )
+            else:
+                if args.parallel:
+                    results = execute_parallel_updates(
+                        client, unique_targets, package, max(1, args.max_uploads), limiter,
+                        multipart=multipart, poller=task_poller
+                    )
+                    success_count = sum(1 for result in results if result['success'])
+                else:
+                    success_count = execute_serial_updates(client, unique_targets, package, limiter,
+                                                           multipart, task_poller)
+                
+                completed_count, tracked_count = track_update_tasks(poller, args.task_timeout)
         
-        for i, target in enumerate(unique_targets, 1):
-            log_print(f"\n[{i}/{total_count}]", end=" ")
-            
-            success = execute_firmware_update(
-                target['BMC_IP'],
-                username,
-                password,
-                target['SYSTEM_NAME'],
-                target['PACKAGE']
-            )
-            
-            if success:
-                success_count += 1
-            
-            # Delay between updates to avoid overwhelming the network
-            if i < total_count:
-                log_print("  Waiting 5 seconds before next update...")
-                time.sleep(5)
+        not_run_count = len(rollout.not_run) if rollout is not None else 0
         
         # Final summary
         log_print(f"\n" + "=" * 60)
         log_print(f"{package_type.upper()} FIRMWARE UPDATE SUMMARY")
         log_print("=" * 60)
-        log_print(f"Total systems: {total_count}")
+        log_print(f"Total systems: {total_count + skipped_count}")
+        if skipped_count:
+            log_print(f"Already current (skipped): {skipped_count}")
         log_print(f"Successful updates: {success_count}")
-        log_print(f"Failed updates: {total_count - success_count}")
+        log_print(f"Failed updates: {total_count - success_count - not_run_count}")
+        if not_run_count:
+            log_print(f"Not updated (stopped after failures): {not_run_count}")
+        if tracked_count:
+            log_print(f"Update tasks completed: {completed_count}/{tracked_count}")
         
-        if success_count == total_count:
+        if success_count == total_count and completed_count == tracked_count:
             log_print(f"✓ All {package_type.upper()} firmware updates completed successfully!")
         else:
             log_print(f"⚠ Some {package_type.upper()} firmware updates failed. Check the output above for details.")
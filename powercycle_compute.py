@@ -11,9 +11,26 @@ import yaml
 import requests
 import json
 import time
-from typing import List, Dict, Set, Tuple
+import argparse
+from typing import List, Dict, Set, Tuple, Optional
 import urllib3
-from requests.auth import HTTPBasicAuth
+
+from redfish_client import RedfishClient, ResourcePathCache
+from fanout import fan_out, DEFAULT_MAX_IN_FLIGHT
+from waves import run_waves, WaveRollout, DEFAULT_MAX_FAILURES
+
+# Default start rate (commands per second) for parallel fan-out
+DEFAULT_RATE = 10.0
+
+# Fixed wait between ForceOff and PowerCycle (seconds)
+DEFAULT_WAIT_SECONDS = 15
+
+# Power-off confirmation: per-node deadline and PowerState poll interval (seconds)
+DEFAULT_OFF_DEADLINE = 60
+DEFAULT_POLL_INTERVAL = 2.0
+
+# Rolling waves: per-node deadline for reaching PowerState On after the power cycle (seconds)
+DEFAULT_ON_DEADLINE = 120
 
 # Disable SSL warnings for self-signed certificates
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
@@ -188,21 +205,22 @@ def get_unique_credentials(targets: List[Dict]) -> Tuple[str, str]:
     return usernames.pop(), passwords.pop()
 
 
-def discover_system_id(ip: str, username: str, password: str, timeout: int = 30) -> str:
+def discover_system_id(client: RedfishClient, ip: str, timeout: int = 30,
+                       use_cache: bool = True) -> str:
     """
     Discover the correct System ID for power operations.
+    Uses the client's resource path cache when available so repeat calls skip
+    the Systems collection round-trip.
     Returns the system ID or '1' as fallback.
     """
-    base_url = f"https://{ip}"
-    systems_url = f"{base_url}/redfish/v1/Systems"
+    cache = client.path_cache
+    if use_cache and cache is not None:
+        system_id = cache.get(ip, 'system_id')
+        if system_id:
+            return system_id
     
     try:
-        response = requests.get(
-            systems_url,
-            auth=HTTPBasicAuth(username, password),
-            verify=False,
-            timeout=timeout
-        )
+        response = client.get(ip, "/redfish/v1/Systems", timeout=timeout)
         
         if response.status_code == 200:
             data = response.json()
@@ -212,40 +230,31 @@ def discover_system_id(ip: str, username: str, password: str, timeout: int = 30)
                 # e.g., "/redfish/v1/Systems/system" -> "system"
                 member_url = data['Members'][0]['@odata.id']
                 system_id = member_url.split('/')[-1]
+                if cache is not None:
+                    cache.put(ip, 'system_id', system_id)
                 return system_id
         
         # Try common alternatives if discovery fails
         common_ids = ['system', 'System', 'Self', '1']
         for system_id in common_ids:
-            test_url = f"{base_url}/redfish/v1/Systems/{system_id}"
-            response = requests.get(
-                test_url,
-                auth=HTTPBasicAuth(username, password),
-                verify=False,
-                timeout=timeout
-            )
+            response = client.get(ip, f"/redfish/v1/Systems/{system_id}", timeout=timeout)
             if response.status_code == 200:
+                if cache is not None:
+                    cache.put(ip, 'system_id', system_id)
                 return system_id
-                
+    
     except Exception:
         pass
     
     return "1"  # Fallback to default
 
 
-def execute_power_command(ip: str, username: str, password: str, system_name: str, 
-                         command: str, timeout: int = 30) -> bool:
+def send_power_command(client: RedfishClient, ip: str, command: str, timeout: int = 30) -> Tuple[bool, str]:
     """
-    Execute power command via Redfish API.
+    Send a power command via Redfish API without printing.
     command should be 'ForceOff' or 'PowerCycle'
-    Returns True if successful, False otherwise.
+    Returns tuple of (success, result message).
     """
-    base_url = f"https://{ip}"
-    
-    # Discover the correct system ID
-    system_id = discover_system_id(ip, username, password, timeout)
-    power_url = f"{base_url}/redfish/v1/Systems/{system_id}/Actions/ComputerSystem.Reset"
-    
     headers = {
         'Content-Type': 'application/json',
         'Accept': 'application/json'
@@ -255,39 +264,266 @@ def execute_power_command(ip: str, username: str, password: str, system_name: st
         "ResetType": command
     }
     
-    try:
-        print(f"  Executing {command} for {system_name} ({ip})...", end=" ", flush=True)
-        
-        response = requests.post(
-            power_url,
+    def post_reset(system_id: str) -> requests.Response:
+        return client.post(
+            ip,
+            f"/redfish/v1/Systems/{system_id}/Actions/ComputerSystem.Reset",
             headers=headers,
             data=json.dumps(power_payload),
-            auth=HTTPBasicAuth(username, password),
-            verify=False,
             timeout=timeout
         )
+    
+    try:
+        # Discover the correct system ID (cached after the first lookup)
+        system_id = discover_system_id(client, ip, timeout)
+        response = post_reset(system_id)
+        
+        # A cached ID can go stale (e.g. after a firmware update); rediscover once
+        cache = client.path_cache
+        if response.status_code == 404 and cache is not None and cache.get(ip, 'system_id') == system_id:
+            cache.invalidate(ip, 'system_id')
+            system_id = discover_system_id(client, ip, timeout, use_cache=False)
+            response = post_reset(system_id)
         
         if response.status_code in [200, 202, 204]:
-            print("✓ SUCCESS")
-            return True
+            return True, "✓ SUCCESS"
         else:
-            print(f"✗ FAILED (HTTP {response.status_code})")
+            message = f"✗ FAILED (HTTP {response.status_code})"
             try:
                 error_data = response.json()
-                print(f"    Error: {error_data}")
+                message += f"\n    Error: {error_data}"
             except:
-                print(f"    Response: {response.text}")
-            return False
+                message += f"\n    Response: {response.text}"
+            return False, message
     
     except requests.exceptions.Timeout:
-        print("✗ FAILED (Timeout)")
-        return False
+        return False, "✗ FAILED (Timeout)"
     except requests.exceptions.ConnectionError:
-        print("✗ FAILED (Connection Error)")
-        return False
+        return False, "✗ FAILED (Connection Error)"
     except Exception as e:
-        print(f"✗ FAILED ({e})")
-        return False
+        return False, f"✗ FAILED ({e})"
+
+
+def execute_power_command(client: RedfishClient, ip: str, system_name: str,
+                          command: str, timeout: int = 30) -> bool:
+    """
+    Execute power command via Redfish API.
+    command should be 'ForceOff' or 'PowerCycle'
+    Returns True if successful, False otherwise.
+    """
+    print(f"  Executing {command} for {system_name} ({ip})...", end=" ", flush=True)
+    
+    success, message = send_power_command(client, ip, command, timeout)
+    print(message)
+    
+    return success
+
+
+def execute_power_phase(targets: List[Dict], client: RedfishClient, command: str,
+                        parallel: bool = False, max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+                        rate: Optional[float] = DEFAULT_RATE) -> List[Dict]:
+    """
+    Send one power command to every target.
+    Sequential mode sends one command per second; parallel mode fans the
+    command out with at most `max_in_flight` requests outstanding and no more
+    than `rate` new commands started per second.
+    Returns the targets whose command succeeded.
+    """
+    total = len(targets)
+    start = time.monotonic()
+    
+    if not parallel:
+        succeeded = []
+        for i, target in enumerate(targets, 1):
+            print(f"[{i}/{total}]", end=" ")
+            
+            success = execute_power_command(
+                client,
+                target['BMC_IP'],
+                target['SYSTEM_NAME'],
+                command
+            )
+            
+            if success:
+                succeeded.append(target)
+            
+            # Small delay between requests
+            if i < total:
+                time.sleep(1)
+        
+        print(f"{command} sent to {total} systems in {time.monotonic() - start:.1f}s")
+        return succeeded
+    
+    print(f"Sending {command} to {total} systems (max {max_in_flight} in flight"
+          f"{f', {rate:g}/s' if rate else ''})...")
+    
+    completed = [0]
+    
+    def report(index: int, target: Dict, result: Tuple[bool, str]) -> None:
+        completed[0] += 1
+        print(f"[{completed[0]}/{total}]   {command} for {target['SYSTEM_NAME']} ({target['BMC_IP']})... {result[1]}")
+    
+    results = fan_out(
+        targets,
+        lambda target: send_power_command(client, target['BMC_IP'], command),
+        max_in_flight=max_in_flight,
+        rate=rate,
+        on_result=report
+    )
+    
+    print(f"{command} sent to {total} systems in {time.monotonic() - start:.1f}s")
+    return [target for target, (success, _) in zip(targets, results) if success]
+
+
+def get_power_state(client: RedfishClient, ip: str, timeout: int = 10) -> Optional[str]:
+    """
+    Read the PowerState of a system via Redfish API.
+    Returns the PowerState string (e.g. 'On', 'Off') or None if it could not be read.
+    """
+    system_id = discover_system_id(client, ip, timeout)
+    
+    try:
+        response = client.get(ip, f"/redfish/v1/Systems/{system_id}", timeout=timeout)
+        
+        # A cached ID can go stale (e.g. after a firmware update); rediscover once
+        cache = client.path_cache
+        if response.status_code == 404 and cache is not None and cache.get(ip, 'system_id') == system_id:
+            cache.invalidate(ip, 'system_id')
+            system_id = discover_system_id(client, ip, timeout, use_cache=False)
+            response = client.get(ip, f"/redfish/v1/Systems/{system_id}", timeout=timeout)
+        
+        if response.status_code == 200:
+            return response.json().get('PowerState')
+    except Exception:
+        pass
+    
+    return None
+
+
+def wait_for_power_state(targets: List[Dict], client: RedfishClient, expected: str = 'Off',
+                         deadline: float = DEFAULT_OFF_DEADLINE,
+                         interval: float = DEFAULT_POLL_INTERVAL,
+                         max_in_flight: int = DEFAULT_MAX_IN_FLIGHT) -> List[Dict]:
+    """
+    Poll PowerState on every target concurrently until all report `expected`
+    or the per-node deadline expires, returning as soon as the whole set is
+    confirmed.
+    Returns the list of targets that never reported `expected`.
+    """
+    print(f"\nWaiting for {len(targets)} systems to report PowerState {expected} (deadline {deadline:g}s)...")
+    
+    start = time.monotonic()
+    pending = list(targets)
+    last_state = {}
+    
+    while pending:
+        states = fan_out(
+            pending,
+            lambda target: get_power_state(client, target['BMC_IP']),
+            max_in_flight=max_in_flight
+        )
+        
+        elapsed = time.monotonic() - start
+        still_pending = []
+        for target, state in zip(pending, states):
+            last_state[target['BMC_IP']] = state
+            if state == expected:
+                line = f"  ✓ {target['SYSTEM_NAME']} ({target['BMC_IP']}) {expected} after {elapsed:.1f}s"
+                print(f"\r{line:<50}")
+            else:
+                still_pending.append(target)
+        pending = still_pending
+        
+        confirmed = len(targets) - len(pending)
+        print(f"\r  Confirmed {expected}: {confirmed}/{len(targets)} ({elapsed:.0f}s elapsed)", end="", flush=True)
+        
+        if not pending or elapsed + interval > deadline:
+            break
+        time.sleep(interval)
+    
+    print()
+    if pending:
+        print(f"⚠ {len(pending)} systems did not report PowerState {expected} within {deadline:g}s:")
+        for target in pending:
+            state = last_state.get(target['BMC_IP']) or 'unknown'
+            print(f"  - {target['SYSTEM_NAME']} ({target['BMC_IP']}): PowerState {state}")
+    else:
+        print(f"✓ All systems confirmed {expected} in {time.monotonic() - start:.1f}s")
+    
+    return pending
+
+
+def power_cycle_target(client: RedfishClient, ip: str, confirm_off: bool = False,
+                       off_deadline: float = DEFAULT_OFF_DEADLINE,
+                       poll_interval: float = DEFAULT_POLL_INTERVAL) -> Tuple[bool, bool, str]:
+    """
+    Run the whole power cycle sequence on one system without printing:
+    ForceOff, then wait (a fixed 15 seconds, or until PowerState is Off with
+    confirm_off), then PowerCycle.
+    Returns tuple of (power_off_success, power_cycle_success, result message).
+    """
+    success, message = send_power_command(client, ip, 'ForceOff')
+    if not success:
+        return False, False, f"ForceOff {message}"
+    
+    if confirm_off:
+        start = time.monotonic()
+        while get_power_state(client, ip) != 'Off':
+            if time.monotonic() - start + poll_interval > off_deadline:
+                return True, False, f"✗ FAILED (PowerState not Off within {off_deadline:g}s)"
+            time.sleep(poll_interval)
+    else:
+        time.sleep(DEFAULT_WAIT_SECONDS)
+    
+    success, message = send_power_command(client, ip, 'PowerCycle')
+    if not success:
+        return True, False, f"PowerCycle {message}"
+    return True, True, message
+
+
+def execute_power_waves(targets: List[Dict], client: RedfishClient, wave_size: int,
+                        max_failures: int = DEFAULT_MAX_FAILURES, confirm_off: bool = False,
+                        off_deadline: float = DEFAULT_OFF_DEADLINE,
+                        poll_interval: float = DEFAULT_POLL_INTERVAL,
+                        max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+                        rate: Optional[float] = None,
+                        on_deadline: float = DEFAULT_ON_DEADLINE) -> Tuple[WaveRollout, int, int]:
+    """
+    Power cycle the systems in rolling waves of `wave_size`.
+    Every system of a wave runs the full ForceOff/wait/PowerCycle sequence
+    concurrently, with at most `max_in_flight` sequences running and no more
+    than `rate` started per second; the wave's health gate then waits up to
+    `on_deadline` seconds for each of them to report PowerState On before the
+    next wave starts. Systems that fail a command or the gate count towards
+    `max_failures`.
+    Returns tuple of (rollout, successful_power_offs, successful_power_cycles).
+    """
+    counts = {'off': 0, 'cycle': 0}
+    
+    def report(index: int, target: Dict, result: Tuple[bool, bool, str]) -> None:
+        counts['off'] += result[0]
+        counts['cycle'] += result[1]
+        print(f"  Power cycle for {target['SYSTEM_NAME']} ({target['BMC_IP']})... {result[2]}")
+    
+    def run_wave(wave: List[Dict]) -> List[bool]:
+        print(f"Power cycling {len(wave)} systems (ForceOff, "
+              f"{'wait for Off' if confirm_off else f'wait {DEFAULT_WAIT_SECONDS}s'}, PowerCycle)...")
+        results = fan_out(
+            wave,
+            lambda target: power_cycle_target(client, target['BMC_IP'], confirm_off, off_deadline, poll_interval),
+            max_in_flight=max_in_flight,
+            rate=rate,
+            on_result=report
+        )
+        return [cycled for _, cycled, _ in results]
+    
+    def health_gate(wave: List[Dict]) -> List[bool]:
+        not_on = {target['BMC_IP'] for target in
+                  wait_for_power_state(wave, client, 'On', on_deadline, poll_interval, max_in_flight)}
+        return [target['BMC_IP'] not in not_on for target in wave]
+    
+    rollout = run_waves(targets, wave_size, run_wave, health_gate, max_failures)
+    return rollout, counts['off'], counts['cycle']
 
 
 def display_countdown_timer(seconds: int):
@@ -311,7 +547,8 @@ def display_countdown_timer(seconds: int):
     print()
 
 
-def get_user_confirmation(targets: List[Dict], compute_ips: Set[str]) -> bool:
+def get_user_confirmation(targets: List[Dict], compute_ips: Set[str],
+                          wait_description: str = f"Wait {DEFAULT_WAIT_SECONDS} seconds") -> bool:
     """Get user confirmation before executing power cycle."""
     print("\n" + "=" * 60)
     print("READY TO EXECUTE POWER CYCLE")
@@ -336,7 +573,7 @@ def get_user_confirmation(targets: List[Dict], compute_ips: Set[str]) -> bool:
     print(f"\n⚠ WARNING: This will power cycle {len(unique_target_list)} unique systems!")
     print("⚠ This operation will:")
     print("  1. Force power off all systems")
-    print("  2. Wait 15 seconds")
+    print(f"  2. {wait_description}")
     print("  3. Power cycle all systems")
     print("⚠ This may cause data loss if systems are not properly shut down!")
     
@@ -350,9 +587,16 @@ def get_user_confirmation(targets: List[Dict], compute_ips: Set[str]) -> bool:
             print("Please enter 'yes' or 'no'")
 
 
-def execute_power_sequence(targets: List[Dict], username: str, password: str) -> Tuple[int, int]:
+def execute_power_sequence(targets: List[Dict], client: RedfishClient, parallel: bool = False,
+                           max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+                           rate: Optional[float] = DEFAULT_RATE, confirm_off: bool = False,
+                           off_deadline: float = DEFAULT_OFF_DEADLINE,
+                           poll_interval: float = DEFAULT_POLL_INTERVAL) -> Tuple[int, int]:
     """
     Execute the complete power cycle sequence.
+    With confirm_off, phase 2 polls PowerState until every system that
+    accepted ForceOff is Off (or its deadline passes) instead of waiting a
+    fixed 15 seconds.
     Returns tuple of (successful_power_offs, successful_power_cycles).
     """
     unique_targets = {}
@@ -368,63 +612,122 @@ def execute_power_sequence(targets: List[Dict], username: str, password: str) ->
     print("PHASE 1: POWERING OFF SYSTEMS")
     print("=" * 60)
     
-    power_off_success = 0
-    for i, target in enumerate(unique_target_list, 1):
-        print(f"[{i}/{len(unique_target_list)}]", end=" ")
-        
-        success = execute_power_command(
-            target['BMC_IP'],
-            username,
-            password,
-            target['SYSTEM_NAME'],
-            'ForceOff'
-        )
-        
-        if success:
-            power_off_success += 1
-        
-        # Small delay between requests
-        if i < len(unique_target_list):
-            time.sleep(1)
+    powered_off = execute_power_phase(unique_target_list, client, 'ForceOff',
+                                      parallel, max_in_flight, rate)
+    power_off_success = len(powered_off)
     
     print(f"\nPower off completed: {power_off_success}/{len(unique_target_list)} successful")
     
-    # Phase 2: Wait 15 seconds
+    # Phase 2: Wait for systems to power off
     print(f"\n" + "=" * 60)
     print("PHASE 2: WAITING BEFORE POWER CYCLE")
     print("=" * 60)
     
-    display_countdown_timer(15)
+    if confirm_off:
+        # Systems that rejected ForceOff will not turn Off; do not wait out their deadline
+        if powered_off:
+            wait_for_power_state(powered_off, client, 'Off', off_deadline, poll_interval, max_in_flight)
+        else:
+            print("No system accepted ForceOff; nothing to confirm")
+    else:
+        display_countdown_timer(DEFAULT_WAIT_SECONDS)
     
     # Phase 3: Power Cycle
     print(f"\n" + "=" * 60)
     print("PHASE 3: POWER CYCLING SYSTEMS")
     print("=" * 60)
     
-    power_cycle_success = 0
-    for i, target in enumerate(unique_target_list, 1):
-        print(f"[{i}/{len(unique_target_list)}]", end=" ")
-        
-        success = execute_power_command(
-            target['BMC_IP'],
-            username,
-            password,
-            target['SYSTEM_NAME'],
-            'PowerCycle'
-        )
-        
-        if success:
-            power_cycle_success += 1
-        
-        # Small delay between requests
-        if i < len(unique_target_list):
-            time.sleep(1)
+    power_cycle_success = len(execute_power_phase(unique_target_list, client, 'PowerCycle',
+                                                  parallel, max_in_flight, rate))
     
     return power_off_success, power_cycle_success
 
 
+def parse_arguments():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(
+        description='GB300 Compute Power Cycle Tool'
+    )
+    
+    parser.add_argument(
+        '--parallel',
+        action='store_true',
+        help='Send each phase\'s power command to all systems concurrently instead of one per second'
+    )
+    
+    parser.add_argument(
+        '--max-in-flight',
+        type=int,
+        default=DEFAULT_MAX_IN_FLIGHT,
+        help=f'Maximum concurrent Redfish requests in parallel mode and within each wave '
+             f'(default: {DEFAULT_MAX_IN_FLIGHT})'
+    )
+    
+    parser.add_argument(
+        '--rate',
+        type=float,
+        default=DEFAULT_RATE,
+        help=f'Maximum commands started per second in parallel mode, and systems started per second '
+             f'within each wave with --parallel --wave-size (default: {DEFAULT_RATE:g}, 0 = unlimited)'
+    )
+    
+    parser.add_argument(
+        '--confirm-off',
+        action='store_true',
+        help=f'Poll PowerState until all systems are Off instead of waiting a fixed {DEFAULT_WAIT_SECONDS} seconds'
+    )
+    
+    parser.add_argument(
+        '--off-deadline',
+        type=float,
+        default=DEFAULT_OFF_DEADLINE,
+        help=f'Per-system deadline in seconds for reaching Off with --confirm-off (default: {DEFAULT_OFF_DEADLINE})'
+    )
+    
+    parser.add_argument(
+        '--poll-interval',
+        type=float,
+        default=DEFAULT_POLL_INTERVAL,
+        help=f'Seconds between PowerState polls with --confirm-off (default: {DEFAULT_POLL_INTERVAL:g})'
+    )
+    
+    parser.add_argument(
+        '--wave-size',
+        type=int,
+        default=0,
+        help='Power cycle this many systems at a time, waiting for each wave to report PowerState On '
+             'before the next (default: 0 = all systems in three phases)'
+    )
+    
+    parser.add_argument(
+        '--max-failures',
+        type=int,
+        default=DEFAULT_MAX_FAILURES,
+        help=f'With --wave-size, stop starting waves once more than this many systems failed '
+             f'(default: {DEFAULT_MAX_FAILURES})'
+    )
+    
+    parser.add_argument(
+        '--on-deadline',
+        type=float,
+        default=DEFAULT_ON_DEADLINE,
+        help=f'With --wave-size, per-system deadline in seconds for reaching PowerState On '
+             f'(default: {DEFAULT_ON_DEADLINE})'
+    )
+    
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Rediscover System IDs instead of using the cached values'
+    )
+    
+    return parser.parse_args()
+
+
 def main():
     """Main program flow."""
+    args = parse_arguments()
+    
     print("GB300 Compute Power Cycle Tool")
     print("=" * 40)
     
@@ -440,12 +743,39 @@ def main():
         print(f"\n✓ Using credentials - Username: {username}")
         
         # Get user confirmation
-        if not get_user_confirmation(all_targets, compute_ips):
+        if args.confirm_off:
+            wait_description = f"Wait until all systems report PowerState Off (up to {args.off_deadline:g} seconds)"
+        else:
+            wait_description = f"Wait {DEFAULT_WAIT_SECONDS} seconds"
+        if args.wave_size > 0:
+            wait_description += (f" (in waves of {args.wave_size} systems, each confirmed "
+                                 f"PowerState On within {args.on_deadline:g} seconds before the next)")
+        
+        if not get_user_confirmation(all_targets, compute_ips, wait_description):
             print("Operation cancelled by user.")
             return
         
         # Execute power cycle sequence
-        power_off_success, power_cycle_success = execute_power_sequence(all_targets, username, password)
+        path_cache = None if args.no_cache else ResourcePathCache()
+        rollout = None
+        with RedfishClient(username, password, path_cache=path_cache,
+                           pool_maxsize=max(1, args.max_in_flight)) as client:
+            if args.wave_size > 0:
+                unique_targets = {}
+                for target in all_targets:
+                    unique_targets.setdefault(target['BMC_IP'], target)
+                
+                # Without --parallel, systems of a wave are started one per second as in sequential mode
+                rollout, power_off_success, power_cycle_success = execute_power_waves(
+                    list(unique_targets.values()), client, args.wave_size, max(0, args.max_failures), args.confirm_off,
+                    args.off_deadline, args.poll_interval, max(1, args.max_in_flight),
+                    (args.rate or None) if args.parallel else 1.0, args.on_deadline
+                )
+            else:
+                power_off_success, power_cycle_success = execute_power_sequence(
+                    all_targets, client, args.parallel, max(1, args.max_in_flight), args.rate or None,
+                    args.confirm_off, args.off_deadline, args.poll_interval
+                )
         
         # Summary
         unique_count = len(set(target['BMC_IP'] for target in all_targets))
@@ -455,8 +785,15 @@ def main():
         print(f"Total unique systems: {unique_count}")
         print(f"Successful power offs: {power_off_success}")
         print(f"Successful power cycles: {power_cycle_success}")
+        if rollout is not None:
+            print(f"Confirmed PowerState On: {len(rollout.succeeded)}")
+            if rollout.not_run:
+                print(f"Not power cycled (stopped after failures): {len(rollout.not_run)}")
         
-        if power_off_success == unique_count and power_cycle_success == unique_count:
+        if rollout is not None and rollout.failed:
+            print("⚠ Some power cycle operations failed. Check the output above for details.")
+            sys.exit(1)
+        elif power_off_success == unique_count and power_cycle_success == unique_count:
             print("✓ All power cycle operations completed successfully!")
         else:
             print("⚠ Some power cycle operations failed. Check the output above for details.")
@@ -0,0 +1,485 @@
+#!/usr/bin/env python3
+"""
+GB300 Reachability Probe Engine
+In-process asyncio probing of many BMCs from a single event loop.
+Uses an unprivileged ICMP datagram socket where the kernel allows it and
+falls back to TCP-connect probing otherwise.
+"""
+
+import asyncio
+import ipaddress
+import itertools
+import os
+import socket
+import ssl
+import struct
+import time
+from typing import Any, Callable, List, Dict, Tuple, Optional
+
+
+ICMP_ECHO_REPLY = 0
+ICMP_ECHO_REQUEST = 8
+
+# Port used by the TCP-connect fallback (Redfish/HTTPS on the BMC)
+DEFAULT_FALLBACK_PORT = 443
+
+# Default number of probes kept in flight at once
+DEFAULT_CONCURRENCY = 256
+
+# Stages of the full readiness pipeline, in order
+FULL_PROBE_STAGES = ['ping', 'tcp', 'tls', 'redfish']
+
+REDFISH_SERVICE_ROOT = '/redfish/v1'
+
+
+def icmp_checksum(data: bytes) -> int:
+    """Compute the RFC 1071 Internet checksum of the given bytes."""
+    if len(data) % 2:
+        data += b'\x00'
+    
+    total = sum(struct.unpack(f'!{len(data) // 2}H', data))
+    total = (total >> 16) + (total & 0xFFFF)
+    total += total >> 16
+    
+    return ~total & 0xFFFF
+
+
+def build_echo_request(identifier: int, sequence: int, payload: bytes = b'GB300-probe') -> bytes:
+    """Build an ICMP echo request packet (header + payload)."""
+    header = struct.pack('!BBHHH', ICMP_ECHO_REQUEST, 0, 0, identifier & 0xFFFF, sequence & 0xFFFF)
+    checksum = icmp_checksum(header + payload)
+    header = struct.pack('!BBHHH', ICMP_ECHO_REQUEST, 0, checksum, identifier & 0xFFFF, sequence & 0xFFFF)
+    return header + payload
+
+
+def parse_echo_reply(packet: bytes) -> Optional[Tuple[int, int]]:
+    """
+    Parse an ICMP echo reply.
+    Returns tuple of (identifier, sequence) or None if the packet is not an echo reply.
+    """
+    # Some platforms (e.g. macOS) deliver the IPv4 header on datagram ICMP sockets
+    if packet and (packet[0] >> 4) == 4:
+        header_length = (packet[0] & 0x0F) * 4
+        packet = packet[header_length:]
+    
+    if len(packet) < 8:
+        return None
+    
+    icmp_type, _, _, identifier, sequence = struct.unpack('!BBHHH', packet[:8])
+    if icmp_type != ICMP_ECHO_REPLY:
+        return None
+    
+    return identifier, sequence
+
+
+def open_icmp_socket() -> Optional[socket.socket]:
+    """
+    Open an unprivileged ICMP datagram socket.
+    Returns None if the platform or kernel does not allow it
+    (e.g. Linux with net.ipv4.ping_group_range excluding our group).
+    """
+    try:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_ICMP)
+    except (OSError, AttributeError):
+        return None
+    
+    sock.setblocking(False)
+    return sock
+
+
+class IcmpProber:
+    """
+    Sends echo requests to many hosts over one shared datagram socket and
+    matches replies by (source address, sequence number).
+    
+    `port` is only meaningful when a plain UDP socket is injected to talk
+    to a fake responder; real ICMP sockets ignore it.
+    """
+    
+    def __init__(self, sock: socket.socket, port: int = 0):
+        self._sock = sock
+        self._port = port
+        self._identifier = os.getpid() & 0xFFFF
+        self._sequence = itertools.count(1)
+        self._pending = {}
+        self._loop = None
+    
+    def start(self) -> None:
+        """Register the socket with the running event loop."""
+        self._loop = asyncio.get_running_loop()
+        self._loop.add_reader(self._sock.fileno(), self._on_readable)
+    
+    def close(self) -> None:
+        """Unregister the socket and fail any outstanding probes."""
+        if self._loop is not None:
+            self._loop.remove_reader(self._sock.fileno())
+            self._loop = None
+        
+        for future in self._pending.values():
+            if not future.done():
+                future.cancel()
+        self._pending.clear()
+        self._sock.close()
+    
+    def _on_readable(self) -> None:
+        """Drain all queued replies and resolve the matching probes."""
+        while True:
+            try:
+                packet, address = self._sock.recvfrom(2048)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError:
+                return
+            
+            reply = parse_echo_reply(packet)
+            if reply is None:
+                continue
+            
+            future = self._pending.pop((address[0], reply[1]), None)
+            if future is not None and not future.done():
+                future.set_result(time.monotonic())
+    
+    async def ping(self, ip: str, timeout: float) -> Optional[float]:
+        """
+        Send one echo request and wait for its reply.
+        Returns the round-trip time in seconds, or None on timeout/error.
+        """
+        sequence = next(self._sequence) & 0xFFFF
+        key = (ip, sequence)
+        future = self._loop.create_future()
+        self._pending[key] = future
+        
+        start = time.monotonic()
+        try:
+            self._sock.sendto(build_echo_request(self._identifier, sequence), (ip, self._port))
+            received = await asyncio.wait_for(future, timeout)
+            return received - start
+        except (asyncio.TimeoutError, OSError):
+            return None
+        finally:
+            self._pending.pop(key, None)
+
+
+async def tcp_probe(ip: str, port: int = DEFAULT_FALLBACK_PORT, timeout: float = 3.0,
+                    refused_is_up: bool = False) -> Optional[float]:
+    """
+    Probe a host by opening a TCP connection.
+    By default the port must accept the connection. With refused_is_up=True a
+    refused connection also counts as reachable; note that a firewall or
+    router answering for an unreachable host sends the same reset.
+    Returns the connect time in seconds, or None if the probe failed.
+    """
+    start = time.monotonic()
+    try:
+        _, writer = await asyncio.wait_for(asyncio.open_connection(ip, port), timeout)
+    except ConnectionRefusedError:
+        return time.monotonic() - start if refused_is_up else None
+    except (asyncio.TimeoutError, OSError):
+        return None
+    
+    elapsed = time.monotonic() - start
+    writer.close()
+    return elapsed
+
+
+async def _resolve(ip: str) -> Optional[str]:
+    """Resolve a host to a numeric IPv4 address (replies are matched on it)."""
+    try:
+        ipaddress.IPv4Address(ip)
+        return ip
+    except ipaddress.AddressValueError:
+        pass
+    
+    try:
+        loop = asyncio.get_running_loop()
+        infos = await loop.getaddrinfo(ip, None, family=socket.AF_INET, type=socket.SOCK_STREAM)
+        return infos[0][4][0]
+    except (OSError, IndexError):
+        return None
+
+
+def start_icmp_prober(use_icmp: bool = True, icmp_sock: Optional[socket.socket] = None,
+                      icmp_port: int = 0) -> Optional[IcmpProber]:
+    """
+    Create and start an IcmpProber on the running event loop.
+    Returns None if ICMP is disabled or unavailable on this platform.
+    """
+    if not use_icmp:
+        return None
+    
+    sock = icmp_sock if icmp_sock is not None else open_icmp_socket()
+    if sock is None:
+        return None
+    
+    prober = IcmpProber(sock, icmp_port)
+    try:
+        prober.start()
+    except NotImplementedError:
+        # Event loops without add_reader (e.g. Windows Proactor)
+        sock.close()
+        return None
+    
+    return prober
+
+
+async def run_bounded(ip_addresses: List[str], probe, concurrency: int,
+                      deadline: Optional[float],
+                      on_result: Optional[Callable[[str, Any], None]] = None) -> Dict:
+    """
+    Run `probe(address)` for every host with at most `concurrency` in flight.
+    Hosts that cannot be resolved, or are still pending when `deadline`
+    seconds have passed, are reported as None. `on_result(ip, result)` is
+    called as each host finishes; hosts cut off by the deadline are not reported.
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    
+    async def run_one(ip: str) -> Optional[float]:
+        async with semaphore:
+            address = await _resolve(ip)
+            result = await probe(address) if address is not None else None
+        if on_result is not None:
+            on_result(ip, result)
+        return result
+    
+    tasks = {ip: asyncio.ensure_future(run_one(ip)) for ip in ip_addresses}
+    if tasks:
+        await asyncio.wait(list(tasks.values()), timeout=deadline or None)
+    
+    unfinished = [task for task in tasks.values() if not task.done()]
+    for task in unfinished:
+        task.cancel()
+    if unfinished:
+        await asyncio.wait(unfinished)
+    
+    return {ip: None if task.cancelled() else task.result() for ip, task in tasks.items()}
+
+
+async def probe_hosts_async(ip_addresses: List[str], timeout: float = 3.0,
+                            concurrency: int = DEFAULT_CONCURRENCY,
+                            deadline: Optional[float] = None,
+                            use_icmp: bool = True,
+                            fallback_port: int = DEFAULT_FALLBACK_PORT,
+                            icmp_sock: Optional[socket.socket] = None,
+                            icmp_port: int = 0,
+                            refused_is_up: bool = False,
+                            on_result: Optional[Callable[[str, Optional[float], str], None]] = None
+                            ) -> Tuple[Dict[str, Optional[float]], str]:
+    """
+    Probe all hosts concurrently from the running event loop.
+    `refused_is_up` is passed to tcp_probe when falling back to TCP, and
+    `on_result(ip, rtt_seconds or None, method)` is called as each host finishes.
+    Returns tuple of ({ip: rtt_seconds or None}, method) where method is
+    'icmp' or 'tcp/<port>'.
+    """
+    prober = start_icmp_prober(use_icmp, icmp_sock, icmp_port)
+    method = 'icmp' if prober is not None else f'tcp/{fallback_port}'
+    
+    async def probe_one(address: str) -> Optional[float]:
+        if prober is not None:
+            return await prober.ping(address, timeout)
+        return await tcp_probe(address, fallback_port, timeout, refused_is_up)
+    
+    def report(ip: str, rtt: Optional[float]) -> None:
+        on_result(ip, rtt, method)
+    
+    try:
+        results = await run_bounded(ip_addresses, probe_one, concurrency, deadline,
+                                    report if on_result is not None else None)
+    finally:
+        if prober is not None:
+            prober.close()
+    
+    return results, method
+
+
+def probe_hosts(ip_addresses: List[str], timeout: float = 3.0,
+                concurrency: int = DEFAULT_CONCURRENCY,
+                deadline: Optional[float] = None,
+                use_icmp: bool = True,
+                fallback_port: int = DEFAULT_FALLBACK_PORT,
+                refused_is_up: bool = False,
+                on_result: Optional[Callable[[str, Optional[float], str], None]] = None
+                ) -> Tuple[Dict[str, Optional[float]], str]:
+    """
+    Synchronous wrapper around probe_hosts_async for use from the CLI scripts.
+    Returns tuple of ({ip: rtt_seconds or None}, method).
+    """
+    return asyncio.run(probe_hosts_async(
+        ip_addresses,
+        timeout=timeout,
+        concurrency=concurrency,
+        deadline=deadline,
+        use_icmp=use_icmp,
+        fallback_port=fallback_port,
+        refused_is_up=refused_is_up,
+        on_result=on_result
+    ))
+
+
+async def scan_tcp_port_async(ip_addresses: List[str], port: int = DEFAULT_FALLBACK_PORT,
+                              timeout: float = 5.0, concurrency: int = DEFAULT_CONCURRENCY,
+                              deadline: Optional[float] = None) -> Dict[str, Optional[float]]:
+    """
+    Connect to `port` on all hosts concurrently.
+    Returns {ip: connect_time_seconds or None}; refused connections count as failures.
+    """
+    async def connect_one(address: str) -> Optional[float]:
+        return await tcp_probe(address, port, timeout)
+    
+    return await run_bounded(ip_addresses, connect_one, concurrency, deadline)
+
+
+def scan_tcp_port(ip_addresses: List[str], port: int = DEFAULT_FALLBACK_PORT,
+                  timeout: float = 5.0, concurrency: int = DEFAULT_CONCURRENCY,
+                  deadline: Optional[float] = None) -> Dict[str, Optional[float]]:
+    """
+    Synchronous wrapper around scan_tcp_port_async for use from the CLI scripts.
+    Returns {ip: connect_time_seconds or None}.
+    """
+    return asyncio.run(scan_tcp_port_async(
+        ip_addresses,
+        port=port,
+        timeout=timeout,
+        concurrency=concurrency,
+        deadline=deadline
+    ))
+
+
+def _elapsed_ms(start: float) -> float:
+    """Milliseconds elapsed since a time.monotonic() timestamp."""
+    return (time.monotonic() - start) * 1000
+
+
+def _unverified_tls_context() -> ssl.SSLContext:
+    """TLS context for BMCs with self-signed certificates."""
+    context = ssl.create_default_context()
+    context.check_hostname = False
+    context.verify_mode = ssl.CERT_NONE
+    return context
+
+
+def _empty_full_result(error: str = '') -> Dict:
+    """Result record for one host in the full pipeline."""
+    result = {stage: None for stage in FULL_PROBE_STAGES}
+    result['http_status'] = None
+    result['error'] = error
+    return result
+
+
+async def full_probe_host(address: str, prober: Optional[IcmpProber] = None,
+                          port: int = DEFAULT_FALLBACK_PORT, timeout: float = 5.0,
+                          ssl_context: Optional[ssl.SSLContext] = None) -> Dict:
+    """
+    Take one host through ping -> TCP connect -> TLS handshake -> GET /redfish/v1.
+    Stage latencies are recorded in milliseconds; a stage that failed or was
+    not reached is None and `error` names the first failing stage.
+    A failed ping does not stop the chain, since BMC networks often filter ICMP.
+    """
+    result = _empty_full_result()
+    loop = asyncio.get_running_loop()
+    
+    if prober is not None:
+        rtt = await prober.ping(address, timeout)
+        if rtt is not None:
+            result['ping'] = rtt * 1000
+    
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setblocking(False)
+    writer = None
+    
+    try:
+        start = time.monotonic()
+        try:
+            await asyncio.wait_for(loop.sock_connect(sock, (address, port)), timeout)
+        except (asyncio.TimeoutError, OSError):
+            result['error'] = f'TCP {port} connect failed'
+            return result
+        result['tcp'] = _elapsed_ms(start)
+        
+        start = time.monotonic()
+        try:
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(sock=sock, ssl=ssl_context or _unverified_tls_context(),
+                                        server_hostname=address),
+                timeout
+            )
+        except (asyncio.TimeoutError, OSError):
+            result['error'] = 'TLS handshake failed'
+            return result
+        result['tls'] = _elapsed_ms(start)
+        
+        request = (f"GET {REDFISH_SERVICE_ROOT} HTTP/1.1\r\n"
+                   f"Host: {address}\r\n"
+                   "Accept: application/json\r\n"
+                   "Connection: close\r\n\r\n")
+        
+        start = time.monotonic()
+        try:
+            writer.write(request.encode('ascii'))
+            status_line = await asyncio.wait_for(reader.readline(), timeout)
+        except (asyncio.TimeoutError, OSError):
+            result['error'] = 'Redfish request failed'
+            return result
+        
+        parts = status_line.decode('latin-1').split()
+        if len(parts) < 2 or not parts[1].isdigit():
+            result['error'] = 'Invalid HTTP response'
+            return result
+        
+        result['http_status'] = int(parts[1])
+        if result['http_status'] == 200:
+            result['redfish'] = _elapsed_ms(start)
+        else:
+            result['error'] = f"Redfish HTTP {result['http_status']}"
+    finally:
+        if writer is not None:
+            writer.close()
+        else:
+            sock.close()
+    
+    return result
+
+
+async def full_probe_hosts_async(ip_addresses: List[str], port: int = DEFAULT_FALLBACK_PORT,
+                                 timeout: float = 5.0, concurrency: int = DEFAULT_CONCURRENCY,
+                                 deadline: Optional[float] = None,
+                                 use_icmp: bool = True) -> Tuple[Dict[str, Dict], bool]:
+    """
+    Run the full readiness pipeline for all hosts concurrently.
+    Each host streams through its stages independently of the others.
+    Returns tuple of ({ip: result as produced by full_probe_host}, icmp_available).
+    """
+    prober = start_icmp_prober(use_icmp)
+    ssl_context = _unverified_tls_context()
+    
+    async def probe_one(address: str) -> Dict:
+        return await full_probe_host(address, prober, port, timeout, ssl_context)
+    
+    try:
+        results = await run_bounded(ip_addresses, probe_one, concurrency, deadline)
+    finally:
+        if prober is not None:
+            prober.close()
+    
+    for ip, result in results.items():
+        if result is None:
+            results[ip] = _empty_full_result('Unresolved or deadline exceeded')
+    
+    return results, prober is not None
+
+
+def full_probe_hosts(ip_addresses: List[str], port: int = DEFAULT_FALLBACK_PORT,
+                     timeout: float = 5.0, concurrency: int = DEFAULT_CONCURRENCY,
+                     deadline: Optional[float] = None, use_icmp: bool = True) -> Tuple[Dict[str, Dict], bool]:
+    """
+    Synchronous wrapper around full_probe_hosts_async for use from the CLI scripts.
+    Returns tuple of ({ip: result}, icmp_available).
+    """
+    return asyncio.run(full_probe_hosts_async(
+        ip_addresses,
+        port=port,
+        timeout=timeout,
+        concurrency=concurrency,
+        deadline=deadline,
+        use_icmp=use_icmp
+    ))
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+GB300 Shared Redfish Client
+Keeps one persistent requests.Session per BMC so repeated Redfish calls reuse
+pooled keep-alive connections instead of paying a TLS handshake every time,
+and caches discovered resource paths (e.g. System IDs) across runs.
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+import requests
+import urllib3
+from requests.adapters import HTTPAdapter
+from requests.auth import HTTPBasicAuth
+
+# Disable SSL warnings for self-signed certificates
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+
+# Default request timeout in seconds
+DEFAULT_TIMEOUT = 30
+
+# Number of distinct connection pools kept per session (one BMC per session)
+DEFAULT_POOL_CONNECTIONS = 1
+
+# Maximum keep-alive connections kept open to a single BMC; scripts that
+# fan out pass their worker count so no concurrent connection is discarded
+DEFAULT_POOL_MAXSIZE = 4
+
+# On-disk resource path cache and how long its entries stay valid (seconds)
+DEFAULT_CACHE_FILE = os.path.join('./logs', 'redfish_path_cache.json')
+DEFAULT_CACHE_TTL = 24 * 60 * 60
+
+
+class ResourcePathCache:
+    """
+    Memory-plus-disk cache of discovered Redfish resource paths.
+    Entries are keyed by BMC IP; an entry older than the TTL is a miss.
+    Callers invalidate an entry when the BMC rejects the cached path (HTTP
+    404), e.g. after a firmware update moved it. The JSON file is rewritten
+    atomically on every change so concurrent workers and later runs share
+    discoveries.
+    """
+    
+    def __init__(self, cache_file: str = DEFAULT_CACHE_FILE, ttl: float = DEFAULT_CACHE_TTL):
+        self.cache_file = cache_file
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = self._load()
+    
+    def _load(self) -> Dict:
+        """Load the cache file, treating a missing or corrupt file as empty."""
+        try:
+            with open(self.cache_file, 'r') as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except (OSError, ValueError):
+            return {}
+    
+    def _save(self) -> None:
+        """Write the cache file atomically. Caller must hold the lock."""
+        try:
+            cache_dir = os.path.dirname(self.cache_file)
+            if cache_dir and not os.path.exists(cache_dir):
+                os.makedirs(cache_dir)
+            
+            temp_file = f"{self.cache_file}.tmp"
+            with open(temp_file, 'w') as f:
+                json.dump(self._entries, f, indent=2, sort_keys=True)
+            os.replace(temp_file, self.cache_file)
+        except OSError:
+            # The cache is an optimization only; never fail the operation over it
+            pass
+    
+    def get(self, ip: str, name: str) -> Optional[str]:
+        """Return a cached path value, or None on a miss."""
+        with self._lock:
+            entry = self._entries.get(ip)
+            if not entry:
+                return None
+            
+            path = entry.get('paths', {}).get(name)
+            if not path or time.time() - path.get('timestamp', 0) > self.ttl:
+                return None
+            
+            return path.get('value')
+    
+    def put(self, ip: str, name: str, value: str) -> None:
+        """Store a discovered path value for a BMC."""
+        with self._lock:
+            entry = self._entries.setdefault(ip, {'paths': {}})
+            entry.setdefault('paths', {})[name] = {'value': value, 'timestamp': time.time()}
+            self._save()
+    
+    def invalidate(self, ip: str, name: Optional[str] = None) -> None:
+        """Drop one cached path for a BMC, or all of them if name is None."""
+        with self._lock:
+            if ip not in self._entries:
+                return
+            if name is None:
+                del self._entries[ip]
+            else:
+                self._entries[ip].get('paths', {}).pop(name, None)
+            self._save()
+
+
+class RedfishClient:
+    """
+    Pooled Redfish client shared by the BMC scripts.
+    Sessions are created lazily per BMC IP and are safe to use from worker threads.
+    `pool_maxsize` should be at least the number of requests that may be in
+    flight at once, otherwise urllib3 discards the extra connections instead
+    of reusing them.
+    """
+    
+    def __init__(self, username: str, password: str, timeout: int = DEFAULT_TIMEOUT,
+                 pool_connections: int = DEFAULT_POOL_CONNECTIONS,
+                 pool_maxsize: int = DEFAULT_POOL_MAXSIZE, verify: bool = False,
+                 path_cache: Optional[ResourcePathCache] = None):
+        self.username = username
+        self.path_cache = path_cache
+        self.timeout = timeout
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.verify = verify
+        self._auth = HTTPBasicAuth(username, password)
+        self._sessions: Dict[str, requests.Session] = {}
+        self._lock = threading.Lock()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    
+    @staticmethod
+    def url(ip: str, path: str) -> str:
+        """Build the absolute URL for a Redfish path on a BMC."""
+        if path.startswith('https://') or path.startswith('http://'):
+            return path
+        if not path.startswith('/'):
+            path = '/' + path
+        return f"https://{ip}{path}"
+    
+    def session(self, ip: str) -> requests.Session:
+        """Return the persistent session for a BMC, creating it on first use."""
+        with self._lock:
+            session = self._sessions.get(ip)
+            if session is None:
+                session = requests.Session()
+                session.auth = self._auth
+                session.verify = self.verify
+                adapter = HTTPAdapter(
+                    pool_connections=self.pool_connections,
+                    pool_maxsize=self.pool_maxsize
+                )
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                self._sessions[ip] = session
+            return session
+    
+    def request(self, method: str, ip: str, path: str, timeout: Optional[float] = None,
+                **kwargs) -> requests.Response:
+        """
+        Send a Redfish request to a BMC over its pooled session.
+        Raises the usual requests exceptions (Timeout, ConnectionError, ...).
+        """
+        # Pass verify per request: REQUESTS_CA_BUNDLE would otherwise override session.verify
+        kwargs.setdefault('verify', self.verify)
+        return self.session(ip).request(
+            method,
+            self.url(ip, path),
+            timeout=timeout if timeout is not None else self.timeout,
+            **kwargs
+        )
+    
+    def get(self, ip: str, path: str, **kwargs) -> requests.Response:
+        """Send a GET request to a BMC."""
+        return self.request('GET', ip, path, **kwargs)
+    
+    def post(self, ip: str, path: str, **kwargs) -> requests.Response:
+        """Send a POST request to a BMC."""
+        return self.request('POST', ip, path, **kwargs)
+    
+    def close(self) -> None:
+        """Close all sessions and their pooled connections."""
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
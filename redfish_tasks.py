@@ -0,0 +1,537 @@
+#!/usr/bin/env python3
+"""
+GB300 Redfish Task Helpers
+Task state classification, incremental latest-task lookup, an adaptive,
+concurrent watch loop shared by the Redfish task status scripts, and a
+background poller that follows tasks handed off by firmware pushes.
+"""
+
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from fanout import fan_out, DEFAULT_MAX_IN_FLIGHT
+from redfish_client import RedfishClient
+
+
+# Redfish TaskState values after which a task will not change again
+TERMINAL_TASK_STATES = {'Completed', 'Exception', 'Killed', 'Cancelled'}
+
+# Watch mode poll intervals (seconds): active tasks start at the active
+# interval and back off toward the maximum while their progress is unchanged;
+# finished tasks are only re-checked at the idle interval
+DEFAULT_ACTIVE_INTERVAL = 2.0
+DEFAULT_MAX_ACTIVE_INTERVAL = 10.0
+DEFAULT_IDLE_INTERVAL = 30.0
+
+# Consecutive failed polls after which watch mode stops polling a system
+DEFAULT_MAX_WATCH_ERRORS = 5
+
+# Task collection path and the state file remembering what was seen per BMC
+TASK_COLLECTION_PATH = "/redfish/v1/TaskService/Tasks/"
+DEFAULT_TASK_STATE_FILE = os.path.join('./logs', 'redfish_task_state.json')
+
+# Watch mode exit codes
+EXIT_SUCCESS = 0
+EXIT_TASK_FAILED = 1
+EXIT_INCOMPLETE = 2
+
+
+def is_terminal_state(task_state: Optional[str]) -> bool:
+    """Return True if a TaskState will not change again."""
+    return task_state in TERMINAL_TASK_STATES
+
+
+def is_task_successful(task_state: Optional[str], task_status: Optional[str]) -> bool:
+    """Return True if a task completed without a Critical TaskStatus."""
+    return task_state == 'Completed' and task_status != 'Critical'
+
+
+def is_result_finished(result: Dict) -> bool:
+    """
+    Return True if a status result needs no more watching.
+    Results are dicts with task_id, task_state and error keys; systems with
+    no tasks at all count as finished, unreachable systems do not.
+    """
+    if result.get('error'):
+        return False
+    return result.get('task_id') is None or is_terminal_state(result.get('task_state'))
+
+
+def aggregate_exit_code(results: List[Dict]) -> int:
+    """
+    Summarize watch results as a process exit code.
+    Returns EXIT_TASK_FAILED if any task ended unsuccessfully, EXIT_INCOMPLETE
+    if any system is still running or could not be read, otherwise EXIT_SUCCESS.
+    """
+    if any(result.get('task_id') is not None and is_terminal_state(result.get('task_state'))
+           and not is_task_successful(result.get('task_state'), result.get('task_status'))
+           for result in results):
+        return EXIT_TASK_FAILED
+    if not all(is_result_finished(result) for result in results):
+        return EXIT_INCOMPLETE
+    return EXIT_SUCCESS
+
+
+def get_member_task_ids(members: List[Dict]) -> List[int]:
+    """Extract the numeric task IDs from task collection members."""
+    task_ids = []
+    for member in members:
+        odata_id = member.get('@odata.id', '')
+        # Extract the task ID from paths like "/redfish/v1/TaskService/Tasks/13"
+        if '/Tasks/' in odata_id:
+            task_id = odata_id.rstrip('/').split('/Tasks/')[-1]
+            if task_id.isdigit():
+                task_ids.append(int(task_id))
+    return task_ids
+
+
+class TaskTracker:
+    """
+    Finds the latest task on each BMC without re-reading the whole collection.
+    The last-seen task ID, collection size and ETag per BMC are kept in a small
+    JSON state file. Lookups try, in order: a conditional GET with If-None-Match
+    (HTTP 304 means nothing changed), a $skip query that returns only the tail
+    of the collection, and finally a full collection walk. The tail is only
+    trusted if it starts with the last task seen and stays in ascending order;
+    BMCs whose collection is not sorted by task ID always get the full walk.
+    """
+    
+    def __init__(self, state_file: str = DEFAULT_TASK_STATE_FILE):
+        self.state_file = state_file
+        self._lock = threading.Lock()
+        try:
+            with open(self.state_file, 'r') as f:
+                self._state = json.load(f)
+            if not isinstance(self._state, dict):
+                self._state = {}
+        except (OSError, ValueError):
+            self._state = {}
+    
+    def _save(self) -> None:
+        """Write the state file atomically. Caller must hold the lock."""
+        try:
+            state_dir = os.path.dirname(self.state_file)
+            if state_dir and not os.path.exists(state_dir):
+                os.makedirs(state_dir)
+            
+            temp_file = f"{self.state_file}.tmp"
+            with open(temp_file, 'w') as f:
+                json.dump(self._state, f, indent=2, sort_keys=True)
+            os.replace(temp_file, self.state_file)
+        except OSError:
+            pass
+    
+    def _record(self, ip: str, entry: Dict) -> None:
+        """Store and persist the state for a BMC."""
+        with self._lock:
+            self._state[ip] = entry
+            self._save()
+    
+    def forget(self, ip: str) -> None:
+        """Drop the remembered state for a BMC so the next lookup walks the collection."""
+        with self._lock:
+            if self._state.pop(ip, None) is not None:
+                self._save()
+    
+    def latest_task_id(self, client: RedfishClient, ip: str,
+                       timeout: int = 30) -> Tuple[bool, Optional[str]]:
+        """
+        Find the highest task ID on a BMC.
+        Returns tuple of (collection_read, task_id); task_id is None if there are no tasks.
+        """
+        with self._lock:
+            known = dict(self._state.get(ip, {}))
+        
+        try:
+            # Unchanged since last time: the BMC answers 304 with no body
+            if known.get('etag'):
+                response = client.get(ip, TASK_COLLECTION_PATH, timeout=timeout,
+                                      headers={'If-None-Match': known['etag']})
+                if response.status_code == 304:
+                    last_id = known.get('last_task_id')
+                    return True, str(last_id) if last_id is not None else None
+                if response.status_code == 200:
+                    return True, self._update_from_collection(ip, response, known)
+            
+            # Only fetch the tail of the collection past what was seen before;
+            # with at most one task the tail is the whole collection anyway
+            elif known.get('skip_supported', True) and (known.get('member_count') or 0) > 1:
+                skip = known['member_count'] - 1
+                response = client.get(ip, f"{TASK_COLLECTION_PATH}?$skip={skip}", timeout=timeout)
+                if response.status_code == 200:
+                    data = response.json()
+                    members = data.get('Members', [])
+                    total = data.get('Members@odata.count')
+                    tail_ids = get_member_task_ids(members)
+                    
+                    if skip > 0 and total is not None and len(members) == total:
+                        # $skip was ignored: this already was a full walk
+                        known['skip_supported'] = False
+                        return True, self._update_from_collection(ip, response, known, data)
+                    
+                    # The tail starts at the previous last member; anything else
+                    # (tasks pruned, unsorted collection) needs the full walk
+                    if (tail_ids and tail_ids[0] == known.get('last_task_id')
+                            and tail_ids == sorted(set(tail_ids))):
+                        entry = dict(known, last_task_id=tail_ids[-1],
+                                     member_count=total if total is not None else known['member_count'])
+                        self._record(ip, entry)
+                        return True, str(tail_ids[-1])
+            
+            # Fallback: walk the full collection
+            response = client.get(ip, TASK_COLLECTION_PATH, timeout=timeout)
+            if response.status_code != 200:
+                logging.error(f"Failed to get task collection from {ip}: HTTP {response.status_code}")
+                return False, None
+            return True, self._update_from_collection(ip, response, known)
+        
+        except Exception as e:
+            logging.error(f"Error getting task collection from {ip}: {e}")
+            return False, None
+    
+    def _update_from_collection(self, ip: str, response, known: Dict,
+                                data: Optional[Dict] = None) -> Optional[str]:
+        """Record a full collection response. Returns the highest task ID or None."""
+        if data is None:
+            data = response.json()
+        members = data.get('Members', [])
+        task_ids = get_member_task_ids(members)
+        
+        # A tail read can only find the latest task if the IDs ascend
+        ascending = task_ids == sorted(task_ids)
+        entry = {
+            'last_task_id': max(task_ids) if task_ids else None,
+            'member_count': data.get('Members@odata.count', len(members)),
+            'etag': response.headers.get('ETag'),
+            'skip_supported': known.get('skip_supported', True) and ascending
+        }
+        self._record(ip, entry)
+        
+        return str(entry['last_task_id']) if task_ids else None
+
+
+def _progress_key(result: Dict) -> tuple:
+    """Return the fields whose change counts as task progress."""
+    return result.get('task_id'), result.get('task_state'), result.get('percent_complete')
+
+
+def _next_interval(previous: Optional[Dict], result: Dict, interval: float,
+                   active_interval: float, max_active_interval: float,
+                   idle_interval: float) -> float:
+    """Return the delay before the next poll of a target given its latest result."""
+    if is_result_finished(result):
+        return idle_interval
+    if previous is not None and _progress_key(previous) == _progress_key(result):
+        # No progress since the last poll: back off
+        return min(interval * 2, max_active_interval)
+    return active_interval
+
+
+def task_uri_from_response(response) -> Optional[str]:
+    """
+    Find the task created by an UpdateService push from its response.
+    Prefers the task resource in the body, then the Location header; a task
+    monitor such as ".../Tasks/13/Monitor" maps to its task ".../Tasks/13".
+    Returns the task path, or None if the response names no task.
+    """
+    try:
+        data = response.json()
+    except ValueError:
+        data = None
+    if isinstance(data, dict) and '/Tasks/' in data.get('@odata.id', ''):
+        return data['@odata.id']
+    
+    location = response.headers.get('Location')
+    if not location:
+        return None
+    if '/Tasks/' in location and location.rstrip('/').endswith('/Monitor'):
+        return location.rstrip('/')[:-len('/Monitor')]
+    return location
+
+
+def read_task(client: RedfishClient, ip: str, task_uri: str, timeout: int = 30) -> Dict:
+    """
+    Read a task (or task monitor) once.
+    A task monitor answers 202 while the operation runs and the operation's
+    final response once it is done.
+    Returns a dict with task_id, task_state, task_status, percent_complete,
+    status and error.
+    """
+    result = {
+        'task_id': task_uri.rstrip('/').split('/')[-1],
+        'task_state': None,
+        'task_status': None,
+        'percent_complete': None,
+        'status': None,
+        'error': False
+    }
+    
+    try:
+        response = client.get(ip, task_uri, timeout=timeout)
+        try:
+            data = response.json() if response.text else {}
+        except ValueError:
+            data = {}
+        
+        if response.status_code in [200, 202] and isinstance(data, dict) and 'TaskState' in data:
+            result['task_state'] = data.get('TaskState')
+            result['task_status'] = data.get('TaskStatus')
+            percent = data.get('PercentComplete')
+            result['percent_complete'] = int(percent) if percent is not None else None
+        elif response.status_code == 202:
+            result['task_state'] = 'Running'
+        elif response.status_code in [200, 204]:
+            result['task_state'] = 'Completed'
+        else:
+            result['status'] = f"HTTP {response.status_code}"
+            result['error'] = True
+    
+    except Exception as e:
+        result['status'] = str(e)
+        result['error'] = True
+    
+    return result
+
+
+class LiveDisplay:
+    """
+    Redraws a block of lines in place on a terminal.
+    When output is not a terminal the block is printed again only if its lines
+    changed; the optional footer (e.g. elapsed time) does not count as a change.
+    """
+    
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+        self.interactive = hasattr(self.stream, 'isatty') and self.stream.isatty()
+        self._line_count = 0
+        self._last_lines: List[str] = []
+    
+    def update(self, lines: List[str], footer: Optional[str] = None) -> None:
+        """Replace the previously drawn block with `lines` and `footer`."""
+        block = lines + [footer] if footer is not None else lines
+        if self.interactive:
+            if self._line_count:
+                # Move to the start of the previous block and clear to end of screen
+                self.stream.write(f"\033[{self._line_count}F\033[J")
+            self.stream.write("\n".join(block) + "\n")
+            self.stream.flush()
+            self._line_count = len(block)
+        elif lines != self._last_lines:
+            self.stream.write("\n".join(block) + "\n\n")
+            self.stream.flush()
+        self._last_lines = list(lines)
+
+
+def watch_tasks(targets: List[Dict], poll: Callable[[Dict, Optional[Dict]], Dict],
+                render: Callable[[List[Dict]], List[str]],
+                max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+                active_interval: float = DEFAULT_ACTIVE_INTERVAL,
+                max_active_interval: float = DEFAULT_MAX_ACTIVE_INTERVAL,
+                idle_interval: float = DEFAULT_IDLE_INTERVAL,
+                deadline: Optional[float] = None,
+                display: Optional[LiveDisplay] = None,
+                max_errors: int = DEFAULT_MAX_WATCH_ERRORS) -> List[Dict]:
+    """
+    Poll every target until all of their tasks are finished.
+    `poll(target, previous_result)` returns a status result dict and
+    `render(results)` returns the dashboard lines to draw. Each round
+    only polls targets that are due, concurrently, then redraws the dashboard.
+    A target whose last `max_errors` polls all returned an error is given up
+    on and no longer polled; its error result is kept, so it still counts as
+    unreadable in aggregate_exit_code. Stops early once `deadline` seconds
+    have passed, if given.
+    Returns the final results in the order of `targets`.
+    """
+    display = display or LiveDisplay()
+    start = time.monotonic()
+    results: List[Optional[Dict]] = [None] * len(targets)
+    intervals = [active_interval] * len(targets)
+    next_due = [start] * len(targets)
+    errors = [0] * len(targets)
+    
+    while True:
+        now = time.monotonic()
+        due = [index for index in range(len(targets)) if next_due[index] <= now]
+        
+        polled = fan_out(
+            due,
+            lambda index: poll(targets[index], results[index]),
+            max_in_flight=max_in_flight
+        )
+        
+        now = time.monotonic()
+        for index, result in zip(due, polled):
+            intervals[index] = _next_interval(results[index], result, intervals[index], active_interval,
+                                              max_active_interval, idle_interval)
+            results[index] = result
+            errors[index] = errors[index] + 1 if result.get('error') else 0
+            next_due[index] = float('inf') if errors[index] >= max_errors else now + intervals[index]
+        
+        display.update(render(results), f"({now - start:.0f}s elapsed)")
+        
+        if all(is_result_finished(result) or errors[index] >= max_errors
+               for index, result in enumerate(results)):
+            return results
+        
+        wake = min(next_due)
+        if deadline is not None:
+            if now - start >= deadline:
+                return results
+            wake = min(wake, start + deadline)
+        time.sleep(max(0.0, wake - time.monotonic()))
+
+
+class TaskPoller:
+    """
+    Follows handed-off Redfish tasks to completion on a background thread.
+    Tasks can be added while others are already being polled. Each round polls
+    the due tasks concurrently with the same back-off as watch_tasks and
+    records when each task was first seen finished, so completion times are
+    accurate to one poll interval. Finished tasks are not polled again; a task
+    whose last `max_errors` polls all failed is given up on (`gave_up` is set)
+    and not polled again either.
+    """
+    
+    def __init__(self, client: RedfishClient, max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+                 active_interval: float = DEFAULT_ACTIVE_INTERVAL,
+                 max_active_interval: float = DEFAULT_MAX_ACTIVE_INTERVAL,
+                 timeout: int = 30, max_errors: int = DEFAULT_MAX_WATCH_ERRORS):
+        self.client = client
+        self.max_in_flight = max_in_flight
+        self.active_interval = active_interval
+        self.max_active_interval = max_active_interval
+        self.timeout = timeout
+        self.max_errors = max_errors
+        self._entries: List[Dict] = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = False
+        self._thread: Optional[threading.Thread] = None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+    
+    def add(self, ip: str, system_name: str, task_uri: str) -> None:
+        """Start following a task; polling begins immediately."""
+        entry = {
+            'ip': ip,
+            'system_name': system_name,
+            'task_uri': task_uri,
+            'task_id': task_uri.rstrip('/').split('/')[-1],
+            'task_state': None,
+            'task_status': None,
+            'percent_complete': None,
+            'status': None,
+            'error': False,
+            'added_at': time.monotonic(),
+            'finished_at': None,
+            'errors': 0,
+            'gave_up': False,
+            'interval': self.active_interval,
+            'next_due': time.monotonic()
+        }
+        logging.info(f"Tracking task {task_uri} on {system_name} ({ip})")
+        
+        with self._lock:
+            self._entries.append(entry)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='task-poller', daemon=True)
+                self._thread.start()
+        self._wake.set()
+    
+    def results(self) -> List[Dict]:
+        """
+        Return a snapshot of every tracked task in the order they were added.
+        Finished tasks carry `seconds`, the time from hand-off to completion.
+        """
+        with self._lock:
+            snapshot = [dict(entry) for entry in self._entries]
+        for result in snapshot:
+            if result['finished_at'] is not None:
+                result['seconds'] = result['finished_at'] - result['added_at']
+            else:
+                result['seconds'] = None
+        return snapshot
+    
+    def _poll(self, entry: Dict) -> Dict:
+        """Read one task and merge it into a copy of its entry."""
+        result = dict(entry)
+        result.update(read_task(self.client, entry['ip'], entry['task_uri'], self.timeout))
+        return result
+    
+    def _run(self) -> None:
+        """Poll due tasks until stopped."""
+        while not self._stopped:
+            now = time.monotonic()
+            with self._lock:
+                due = [entry for entry in self._entries
+                       if self._is_active(entry) and entry['next_due'] <= now]
+            
+            polled = fan_out(due, self._poll, max_in_flight=self.max_in_flight)
+            
+            now = time.monotonic()
+            with self._lock:
+                for entry, result in zip(due, polled):
+                    if _progress_key(result) != _progress_key(entry) or result['error'] != entry['error']:
+                        logging.info(f"Task {entry['task_id']} on {entry['system_name']} ({entry['ip']}): "
+                                     f"{result['task_state'] or result['status']}"
+                                     + (f" {result['percent_complete']}%"
+                                        if result['percent_complete'] is not None else ""))
+                    interval = _next_interval(entry, result, entry['interval'], self.active_interval,
+                                              self.max_active_interval, self.max_active_interval)
+                    entry.update(result, interval=interval, next_due=now + interval,
+                                 errors=entry['errors'] + 1 if result['error'] else 0)
+                    if is_result_finished(entry):
+                        entry['finished_at'] = now
+                    elif entry['errors'] >= self.max_errors:
+                        entry['gave_up'] = True
+                        logging.warning(f"Task {entry['task_id']} on {entry['system_name']} ({entry['ip']}): "
+                                        f"giving up after {entry['errors']} failed polls")
+                
+                pending = [entry['next_due'] for entry in self._entries if self._is_active(entry)]
+            
+            self._wake.wait(max(0.0, min(pending) - time.monotonic()) if pending else None)
+            self._wake.clear()
+    
+    @staticmethod
+    def _is_active(entry: Dict) -> bool:
+        """Return True if a task is still being polled."""
+        return entry['finished_at'] is None and not entry['gave_up']
+    
+    def wait(self, render: Callable[[List[Dict]], List[str]], deadline: Optional[float] = None,
+             display: Optional[LiveDisplay] = None, refresh: float = 1.0) -> List[Dict]:
+        """
+        Redraw `render(results)` every `refresh` seconds until all tracked tasks
+        have finished or been given up on, or until `deadline` seconds have
+        passed if given.
+        Returns the final results.
+        """
+        display = display or LiveDisplay()
+        start = time.monotonic()
+        
+        while True:
+            results = self.results()
+            now = time.monotonic()
+            display.update(render(results), f"({now - start:.0f}s elapsed)")
+            
+            if not any(self._is_active(result) for result in results):
+                return results
+            if deadline is not None and now - start >= deadline:
+                return results
+            time.sleep(refresh)
+    
+    def stop(self) -> None:
+        """Stop the background thread."""
+        self._stopped = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
@@ -6,12 +6,22 @@ Tests ping and TCP port 443 connectivity to IP addresses from generated switch Y
 
 import os
 import sys
-import subprocess
-import socket
-import platform
+import argparse
 import yaml
-from typing import List, Dict, Tuple
-import time
+from typing import List, Dict, Tuple, Optional
+
+from probe_engine import probe_hosts, scan_tcp_port, full_probe_hosts, DEFAULT_CONCURRENCY, FULL_PROBE_STAGES
+
+
+# Default number of concurrent probes and overall sweep deadline (seconds)
+DEFAULT_WORKERS = DEFAULT_CONCURRENCY
+DEFAULT_DEADLINE = 60
+
+# Default per-stage timeout (seconds) for the --full readiness probe
+DEFAULT_FULL_TIMEOUT = 5
+
+# TCP connects slower than this (milliseconds) are flagged in the summary
+SLOW_CONNECT_MS = 250
 
 
 def load_yaml_files() -> List[str]:
@@ -48,95 +58,80 @@ def load_yaml_files() -> List[str]:
     return sorted(list(ip_addresses))
 
 
-def ping_host(ip_address: str, timeout: int = 3) -> bool:
+def run_ping_tests(ip_addresses: List[str], workers: int = DEFAULT_WORKERS,
+                   deadline: Optional[float] = DEFAULT_DEADLINE, timeout: float = 3,
+                   count_refused: bool = False) -> Dict[str, bool]:
     """
-    Ping a host and return True if reachable, False otherwise.
-    Works on Windows, Linux, and macOS.
+    Run ping tests for all IP addresses.
+    All hosts are probed from one event loop (ICMP where the kernel allows
+    unprivileged echo sockets, TCP-connect to port 443 otherwise), with up to
+    `workers` probes in flight and the whole sweep bounded by `deadline` seconds.
+    A live counter tracks hosts as they answer or time out; the per-host results
+    are printed in sorted order once the sweep finishes. With `count_refused`,
+    a refused TCP fallback connection counts as reachable.
     """
-    system = platform.system().lower()
+    workers = max(1, workers)
+    print(f"\nTesting ping connectivity to {len(ip_addresses)} IP addresses ({workers} concurrent)...")
+    print("=" * 50)
     
-    try:
-        if system == "windows":
-            # Windows ping command
-            cmd = ["ping", "-n", "1", "-w", str(timeout * 1000), ip_address]
-        else:
-            # Linux/macOS ping command
-            cmd = ["ping", "-c", "1", "-W", str(timeout), ip_address]
-        
-        # Run ping command
-        result = subprocess.run(
-            cmd,
-            stdout=subprocess.DEVNULL,
-            stderr=subprocess.DEVNULL,
-            timeout=timeout + 2
-        )
-        
-        return result.returncode == 0
+    completed = [0]
     
-    except subprocess.TimeoutExpired:
-        return False
-    except Exception:
-        return False
-
-
-def test_tcp_port(ip_address: str, port: int = 443, timeout: int = 5) -> bool:
-    """
-    Test TCP connectivity to a specific port.
-    Returns True if connection successful, False otherwise.
-    """
-    try:
-        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        sock.settimeout(timeout)
-        result = sock.connect_ex((ip_address, port))
-        sock.close()
-        return result == 0
-    except Exception:
-        return False
-
-
-def run_ping_tests(ip_addresses: List[str]) -> Dict[str, bool]:
-    """Run ping tests for all IP addresses."""
-    print(f"\nTesting ping connectivity to {len(ip_addresses)} IP addresses...")
-    print("=" * 50)
+    def report(ip: str, rtt: Optional[float], method: str) -> None:
+        if completed[0] == 0 and method != 'icmp':
+            print(f"ICMP sockets unavailable, probing with TCP connect ({method})")
+        completed[0] += 1
+        print(f"\r  {completed[0]}/{len(ip_addresses)} hosts probed", end="", flush=True)
     
-    results = {}
+    rtts, method = probe_hosts(ip_addresses, timeout=timeout, concurrency=workers, deadline=deadline,
+                               refused_is_up=count_refused, on_result=report)
+    if completed[0]:
+        print()
+    
+    # Hosts still pending at the deadline were never reported
+    unreported = len(ip_addresses) - completed[0]
+    if unreported:
+        print(f"✗ {unreported} hosts still pending when the {deadline:g}s deadline passed")
     
     for i, ip in enumerate(ip_addresses, 1):
-        print(f"[{i}/{len(ip_addresses)}] Pinging {ip}...", end=" ", flush=True)
-        
-        is_reachable = ping_host(ip)
-        results[ip] = is_reachable
-        
-        if is_reachable:
-            print("✓ SUCCESS")
-        else:
-            print("✗ FAILED")
+        label = f"Pinging {ip}" if method == 'icmp' else f"Probing {ip} ({method})"
+        rtt = rtts.get(ip)
+        status = f"✓ SUCCESS ({rtt * 1000:.1f} ms)" if rtt is not None else "✗ FAILED"
+        print(f"[{i}/{len(ip_addresses)}] {label}... {status}")
     
-    return results
+    return {ip: rtts.get(ip) is not None for ip in ip_addresses}
 
 
-def run_tcp_tests(ip_addresses: List[str], port: int = 443) -> Dict[str, bool]:
-    """Run TCP port connectivity tests for all IP addresses."""
-    print(f"\nTesting TCP port {port} connectivity to {len(ip_addresses)} IP addresses...")
+def run_tcp_tests(ip_addresses: List[str], port: int = 443, workers: int = DEFAULT_WORKERS,
+                  deadline: Optional[float] = DEFAULT_DEADLINE, timeout: float = 5) -> Dict[str, Optional[float]]:
+    """
+    Run TCP port connectivity tests for all IP addresses.
+    Connects are issued concurrently (up to `workers` in flight) and bounded by `deadline`.
+    Returns {ip: connect latency in milliseconds, or None if the connect failed}.
+    """
+    workers = max(1, workers)
+    print(f"\nTesting TCP port {port} connectivity to {len(ip_addresses)} IP addresses ({workers} concurrent)...")
     print("=" * 50)
     
+    connect_times = scan_tcp_port(ip_addresses, port=port, timeout=timeout,
+                                  concurrency=workers, deadline=deadline)
+    
     results = {}
     
     for i, ip in enumerate(ip_addresses, 1):
         print(f"[{i}/{len(ip_addresses)}] Testing {ip}:{port}...", end=" ", flush=True)
         
-        is_reachable = test_tcp_port(ip, port)
-        results[ip] = is_reachable
+        connect_time = connect_times.get(ip)
+        results[ip] = connect_time * 1000 if connect_time is not None else None
         
-        if is_reachable:
-            print("✓ SUCCESS")
+        if results[ip] is not None:
+            print(f"✓ SUCCESS ({results[ip]:.1f} ms)")
         else:
             print("✗ FAILED")
     
     return results
 
 
-def display_summary(ping_results: Dict[str, bool], tcp_results: Dict[str, bool] = None):
+def display_summary(ping_results: Dict[str, bool], tcp_results: Dict[str, Optional[float]] = None):
     """Display test results summary."""
     print("\n" + "=" * 60)
     print("CONNECTIVITY TEST SUMMARY")
@@ -156,19 +151,89 @@ def display_summary(ping_results: Dict[str, bool], tcp_results: Dict[str, bool]
     # TCP results summary (if tested)
     if tcp_results:
         print()
-        tcp_success = sum(1 for result in tcp_results.values() if result)
+        tcp_success = sum(1 for result in tcp_results.values() if result is not None)
         tcp_total = len(tcp_results)
         print(f"TCP Port 443 Test Results: {tcp_success}/{tcp_total} successful")
         
+        latencies = [result for result in tcp_results.values() if result is not None]
+        if latencies:
+            print(f"TCP connect latency: min {min(latencies):.1f} ms, "
+                  f"avg {sum(latencies) / len(latencies):.1f} ms, max {max(latencies):.1f} ms")
+        
+        slow_hosts = [(ip, result) for ip, result in tcp_results.items()
+                      if result is not None and result > SLOW_CONNECT_MS]
+        if slow_hosts:
+            print(f"Slow TCP port 443 connects (> {SLOW_CONNECT_MS} ms):")
+            for ip, result in sorted(slow_hosts, key=lambda item: item[1], reverse=True):
+                print(f"  ⚠ {ip}:443 ({result:.1f} ms)")
+        
         if tcp_success < tcp_total:
             print("Failed TCP port 443 tests:")
             for ip, result in tcp_results.items():
-                if not result:
+                if result is None:
                     print(f"  ✗ {ip}:443")
     
     print("=" * 60)
 
 
+def run_full_tests(ip_addresses: List[str], workers: int = DEFAULT_WORKERS,
+                   deadline: Optional[float] = DEFAULT_DEADLINE,
+                   timeout: float = DEFAULT_FULL_TIMEOUT) -> Tuple[Dict[str, Dict], bool]:
+    """
+    Run the single-pass readiness pipeline (ping -> TCP 443 -> TLS -> GET /redfish/v1).
+    Every host runs its whole chain as one concurrent task, bounded by `deadline`;
+    each stage waits at most `timeout` seconds.
+    Returns tuple of ({ip: result} with per-stage latencies in milliseconds, icmp_available).
+    """
+    workers = max(1, workers)
+    print(f"\nRunning full readiness probe on {len(ip_addresses)} IP addresses ({workers} concurrent)...")
+    print("Stages: ping -> TCP 443 -> TLS handshake -> GET /redfish/v1")
+    print("=" * 50)
+    
+    results, icmp_available = full_probe_hosts(ip_addresses, timeout=timeout,
+                                               concurrency=workers, deadline=deadline)
+    
+    if not icmp_available:
+        print("ICMP sockets unavailable, ping stage skipped")
+    
+    return results, icmp_available
+
+
+def display_full_summary(results: Dict[str, Dict], icmp_available: bool = True) -> bool:
+    """
+    Display the per-stage latency table for the full readiness probe.
+    The PING pass count is left out when the ping stage was skipped.
+    Returns True if every host answered Redfish.
+    """
+    def cell(value: Optional[float]) -> str:
+        return f"{value:.1f}" if value is not None else "-"
+    
+    print("\n" + "=" * 78)
+    print("FULL READINESS SUMMARY (latencies in ms)")
+    print("=" * 78)
+    print(f"{'IP Address':<16} {'Ping':>8} {'TCP 443':>8} {'TLS':>8} {'Redfish':>8}  Status")
+    print("-" * 78)
+    
+    ready_count = 0
+    for ip, result in results.items():
+        ready = result['redfish'] is not None
+        if ready:
+            ready_count += 1
+        status = "✓ READY" if ready else f"✗ {result['error']}"
+        print(f"{ip:<16} {cell(result['ping']):>8} {cell(result['tcp']):>8} "
+              f"{cell(result['tls']):>8} {cell(result['redfish']):>8}  {status}")
+    
+    print("-" * 78)
+    for stage in FULL_PROBE_STAGES:
+        if stage == 'ping' and not icmp_available:
+            continue
+        passed = sum(1 for result in results.values() if result[stage] is not None)
+        print(f"{stage.upper() + ':':<9} {passed}/{len(results)} passed")
+    print("=" * 78)
+    
+    return ready_count == len(results)
+
+
 def get_user_choice(prompt: str) -> bool:
     """Get yes/no choice from user."""
     while True:
@@ -181,8 +246,53 @@ def get_user_choice(prompt: str) -> bool:
             print("Please enter 'y' for yes or 'n' for no.")
 
 
+def parse_arguments():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(
+        description='GB300 Switch Reachability Test'
+    )
+    
+    parser.add_argument(
+        '-w', '--workers',
+        type=int,
+        default=DEFAULT_WORKERS,
+        help=f'Number of hosts to probe concurrently (default: {DEFAULT_WORKERS}, 1 = sequential)'
+    )
+    
+    parser.add_argument(
+        '-d', '--deadline',
+        type=float,
+        default=DEFAULT_DEADLINE,
+        help=f'Overall deadline in seconds for each probe sweep (default: {DEFAULT_DEADLINE}, 0 = none)'
+    )
+    
+    parser.add_argument(
+        '--full',
+        action='store_true',
+        help='Run ping, TCP 443, TLS and Redfish service root checks in one concurrent pass per host'
+    )
+    
+    parser.add_argument(
+        '-t', '--timeout',
+        type=float,
+        default=DEFAULT_FULL_TIMEOUT,
+        help=f'Per-stage timeout in seconds for --full (default: {DEFAULT_FULL_TIMEOUT})'
+    )
+    
+    parser.add_argument(
+        '--count-refused',
+        action='store_true',
+        help='When ICMP is unavailable, count hosts that refuse the TCP 443 connection as reachable '
+             '(a firewall or router can send the same refusal for a host that is down)'
+    )
+    
+    return parser.parse_args()
+
+
 def main():
     """Main program flow."""
+    args = parse_arguments()
+    
     print("GB300 Switch Reachability Test")
     print("=" * 40)
     
@@ -195,8 +305,20 @@ def main():
         for ip in ip_addresses:
             print(f"  - {ip}")
         
+        # Single-pass pipeline: no interactive pause between stages
+        if args.full:
+            full_results, icmp_available = run_full_tests(ip_addresses, args.workers, args.deadline,
+                                                          args.timeout)
+            if display_full_summary(full_results, icmp_available):
+                print("✓ All systems are reachable and Redfish is answering!")
+            else:
+                print("⚠ Some systems are not ready. Check the summary above.")
+                sys.exit(1)
+            return
+        
         # Run ping tests
-        ping_results = run_ping_tests(ip_addresses)
+        ping_results = run_ping_tests(ip_addresses, args.workers, args.deadline,
+                                      count_refused=args.count_refused)
         
         # Display ping results
         ping_success = sum(1 for result in ping_results.values() if result)
@@ -209,13 +331,13 @@ def main():
             return
         
         # Run TCP tests
-        tcp_results = run_tcp_tests(ip_addresses)
+        tcp_results = run_tcp_tests(ip_addresses, workers=args.workers, deadline=args.deadline)
         
         # Display final summary
         display_summary(ping_results, tcp_results)
         
         # Final status
-        tcp_success = sum(1 for result in tcp_results.values() if result)
+        tcp_success = sum(1 for result in tcp_results.values() if result is not None)
         if ping_success == len(ip_addresses) and tcp_success == len(ip_addresses):
             print("✓ All connectivity tests passed!")
         else:
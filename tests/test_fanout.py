@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Tests for the concurrent fan-out helpers in fanout.py.
+"""
+
+import os
+import sys
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fanout import fan_out
+
+
+class FanOutTest(unittest.TestCase):
+    
+    def test_results_follow_item_order(self):
+        def slow_for_small(item):
+            time.sleep(0.01 * (5 - item))
+            return item * 10
+        
+        self.assertEqual(fan_out(list(range(5)), slow_for_small), [0, 10, 20, 30, 40])
+    
+    def test_max_in_flight_bounds_concurrency(self):
+        lock = threading.Lock()
+        active = [0]
+        peak = [0]
+        
+        def work(item):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.02)
+            with lock:
+                active[0] -= 1
+        
+        fan_out(list(range(12)), work, max_in_flight=3)
+        self.assertEqual(peak[0], 3)
+    
+    def test_on_result_sees_every_item_with_its_index(self):
+        seen = []
+        fan_out(['a', 'b', 'c'], str.upper, on_result=lambda index, item, result: seen.append((index, item, result)))
+        self.assertEqual(sorted(seen), [(0, 'a', 'A'), (1, 'b', 'B'), (2, 'c', 'C')])
+    
+    def test_rate_spaces_out_starts(self):
+        start = time.monotonic()
+        fan_out(list(range(4)), lambda item: item, rate=20)
+        # The first call uses the initial token; the other three wait 50 ms each
+        self.assertGreaterEqual(time.monotonic() - start, 0.14)
+    
+    def test_empty_input(self):
+        self.assertEqual(fan_out([], lambda item: item), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
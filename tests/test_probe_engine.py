@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Tests for probe_engine against localhost.
+The ICMP prober is given a plain UDP socket and talks to a fake echo
+responder, so no raw or ICMP socket privileges are needed.
+"""
+
+import asyncio
+import os
+import socket
+import sys
+import threading
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from probe_engine import (
+    ICMP_ECHO_REPLY, build_echo_request, parse_echo_reply, probe_hosts_async, tcp_probe
+)
+
+
+class FakeEchoResponder:
+    """UDP server on localhost that answers ICMP echo requests with echo replies."""
+    
+    def __init__(self):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(('127.0.0.1', 0))
+        self.sock.settimeout(0.1)
+        self.port = self.sock.getsockname()[1]
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+    
+    def _serve(self) -> None:
+        while not self._stopped.is_set():
+            try:
+                packet, address = self.sock.recvfrom(2048)
+            except socket.timeout:
+                continue
+            except OSError:
+                return
+            self.sock.sendto(bytes([ICMP_ECHO_REPLY]) + packet[1:], address)
+    
+    def close(self) -> None:
+        self._stopped.set()
+        self._thread.join()
+        self.sock.close()
+
+
+def udp_socket() -> socket.socket:
+    """Non-blocking UDP socket standing in for an ICMP datagram socket."""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.setblocking(False)
+    return sock
+
+
+class EchoPacketTest(unittest.TestCase):
+    
+    def test_reply_round_trip(self):
+        request = build_echo_request(0x1234, 7)
+        self.assertIsNone(parse_echo_reply(request))
+        self.assertEqual(parse_echo_reply(bytes([ICMP_ECHO_REPLY]) + request[1:]), (0x1234, 7))
+
+
+class IcmpProbeTest(unittest.TestCase):
+    
+    def setUp(self):
+        self.responder = FakeEchoResponder()
+    
+    def tearDown(self):
+        self.responder.close()
+    
+    def test_replies_are_matched_and_reported(self):
+        reported = []
+        results, method = asyncio.run(probe_hosts_async(
+            ['127.0.0.1', 'localhost'], timeout=2.0,
+            icmp_sock=udp_socket(), icmp_port=self.responder.port,
+            on_result=lambda ip, rtt, probe_method: reported.append((ip, rtt is not None, probe_method))
+        ))
+        
+        self.assertEqual(method, 'icmp')
+        self.assertIsNotNone(results['127.0.0.1'])
+        self.assertIsNotNone(results['localhost'])
+        self.assertEqual(sorted(reported), [('127.0.0.1', True, 'icmp'), ('localhost', True, 'icmp')])
+    
+    def test_silent_host_times_out(self):
+        # Nothing answers on 127.0.0.2 at the responder's port
+        results, _ = asyncio.run(probe_hosts_async(
+            ['127.0.0.2'], timeout=0.3, icmp_sock=udp_socket(), icmp_port=self.responder.port
+        ))
+        self.assertIsNone(results['127.0.0.2'])
+
+
+class TcpProbeTest(unittest.TestCase):
+    
+    def setUp(self):
+        self.listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.listener.bind(('127.0.0.1', 0))
+        self.listener.listen(8)
+        self.open_port = self.listener.getsockname()[1]
+        
+        # A port that was just bound and released refuses connections
+        closed = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        closed.bind(('127.0.0.1', 0))
+        self.closed_port = closed.getsockname()[1]
+        closed.close()
+    
+    def tearDown(self):
+        self.listener.close()
+    
+    def test_open_port(self):
+        self.assertIsNotNone(asyncio.run(tcp_probe('127.0.0.1', self.open_port, timeout=2.0)))
+    
+    def test_refused_port_is_down_unless_requested(self):
+        self.assertIsNone(asyncio.run(tcp_probe('127.0.0.1', self.closed_port, timeout=2.0)))
+        self.assertIsNotNone(asyncio.run(tcp_probe('127.0.0.1', self.closed_port, timeout=2.0,
+                                                   refused_is_up=True)))
+    
+    def test_fallback_reports_tcp_method(self):
+        reported = []
+        results, method = asyncio.run(probe_hosts_async(
+            ['127.0.0.1'], timeout=2.0, use_icmp=False, fallback_port=self.open_port,
+            on_result=lambda ip, rtt, probe_method: reported.append(probe_method)
+        ))
+        self.assertEqual(method, f'tcp/{self.open_port}')
+        self.assertEqual(reported, [method])
+        self.assertIsNotNone(results['127.0.0.1'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Tests for the rolling-wave scheduler in waves.py.
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from waves import run_waves, split_waves
+
+
+def quiet(line: str) -> None:
+    pass
+
+
+def fail_items(bad):
+    """run_wave callback that fails the items in `bad` and records each wave."""
+    waves = []
+    
+    def run_wave(wave):
+        waves.append(list(wave))
+        return [item not in bad for item in wave]
+    
+    return run_wave, waves
+
+
+class SplitWavesTest(unittest.TestCase):
+    
+    def test_last_wave_holds_the_remainder(self):
+        self.assertEqual(split_waves([1, 2, 3, 4, 5], 2), [[1, 2], [3, 4], [5]])
+    
+    def test_wave_size_below_one_is_treated_as_one(self):
+        self.assertEqual(split_waves([1, 2], 0), [[1], [2]])
+
+
+class RunWavesTest(unittest.TestCase):
+    
+    def test_all_waves_run_when_nothing_fails(self):
+        run_wave, waves = fail_items(set())
+        rollout = run_waves(list(range(7)), 3, run_wave, log=quiet)
+        
+        self.assertEqual(waves, [[0, 1, 2], [3, 4, 5], [6]])
+        self.assertEqual(rollout.wave_count, 3)
+        self.assertEqual(rollout.waves_run, 3)
+        self.assertEqual(rollout.succeeded, list(range(7)))
+        self.assertEqual(rollout.failed, [])
+        self.assertEqual(rollout.not_run, [])
+        self.assertFalse(rollout.aborted)
+    
+    def test_aborts_once_failures_exceed_the_limit(self):
+        run_wave, waves = fail_items({1})
+        rollout = run_waves(list(range(9)), 3, run_wave, max_failures=0, log=quiet)
+        
+        self.assertEqual(waves, [[0, 1, 2]])
+        self.assertTrue(rollout.aborted)
+        self.assertEqual(rollout.waves_run, 1)
+        self.assertEqual(rollout.succeeded, [0, 2])
+        self.assertEqual(rollout.failed, [1])
+        self.assertEqual(rollout.not_run, [3, 4, 5, 6, 7, 8])
+    
+    def test_failures_up_to_the_limit_are_tolerated(self):
+        run_wave, waves = fail_items({1, 4})
+        rollout = run_waves(list(range(9)), 3, run_wave, max_failures=1, log=quiet)
+        
+        # One failure is within the limit; the second one stops the rollout
+        self.assertEqual(len(waves), 2)
+        self.assertTrue(rollout.aborted)
+        self.assertEqual(rollout.failed, [1, 4])
+        self.assertEqual(rollout.not_run, [6, 7, 8])
+    
+    def test_partition_covers_every_item_once(self):
+        run_wave, _ = fail_items({2, 3})
+        items = list(range(10))
+        rollout = run_waves(items, 4, run_wave, max_failures=1, log=quiet)
+        
+        self.assertEqual(sorted(rollout.succeeded + rollout.failed + rollout.not_run), items)
+    
+    def test_failures_in_the_last_wave_do_not_abort(self):
+        run_wave, _ = fail_items({4, 5})
+        rollout = run_waves(list(range(6)), 3, run_wave, max_failures=0, log=quiet)
+        
+        self.assertFalse(rollout.aborted)
+        self.assertEqual(rollout.waves_run, 2)
+        self.assertEqual(rollout.not_run, [])
+        self.assertEqual(rollout.failed, [4, 5])
+    
+    def test_gate_only_sees_the_successful_items(self):
+        run_wave, _ = fail_items({0})
+        gated = []
+        
+        def health_gate(wave):
+            gated.append(list(wave))
+            return [True] * len(wave)
+        
+        run_waves(list(range(3)), 3, run_wave, health_gate, max_failures=5, log=quiet)
+        self.assertEqual(gated, [[1, 2]])
+    
+    def test_gate_failures_count_towards_the_limit(self):
+        run_wave, waves = fail_items(set())
+        
+        def health_gate(wave):
+            return [item != 2 for item in wave]
+        
+        rollout = run_waves(list(range(9)), 3, run_wave, health_gate, max_failures=0, log=quiet)
+        
+        self.assertEqual(len(waves), 1)
+        self.assertTrue(rollout.aborted)
+        self.assertEqual(rollout.succeeded, [0, 1])
+        self.assertEqual(rollout.failed, [2])
+        self.assertEqual(rollout.not_run, [3, 4, 5, 6, 7, 8])
+    
+    def test_gate_results_are_matched_by_position(self):
+        targets = [{'BMC_IP': f"10.0.0.{n}"} for n in range(3)]
+        
+        def health_gate(wave):
+            # Gates may work on copies of the targets; only the order matters
+            copies = [dict(target) for target in wave]
+            return [copy['BMC_IP'] != "10.0.0.1" for copy in copies]
+        
+        rollout = run_waves(targets, 3, lambda wave: [True] * len(wave), health_gate,
+                            max_failures=5, log=quiet)
+        
+        self.assertEqual(rollout.failed, [targets[1]])
+        self.assertEqual(rollout.succeeded, [targets[0], targets[2]])
+
+
+if __name__ == '__main__':
+    unittest.main()
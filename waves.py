@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+GB300 Rolling-Wave Execution
+Runs a disruptive operation across the fleet in waves: the targets of a wave
+are acted on together, a health gate checks them before the next wave starts,
+and the remaining waves are skipped once too many targets have failed, so a
+bad command or image cannot take down the whole fleet at once.
+"""
+
+import time
+from typing import Any, Callable, List, Optional
+
+
+# Failed targets (operation or health gate) tolerated before the remaining waves are skipped
+DEFAULT_MAX_FAILURES = 0
+
+
+def split_waves(items: List[Any], wave_size: int) -> List[List[Any]]:
+    """Split items into consecutive waves of at most `wave_size` items."""
+    wave_size = max(1, wave_size)
+    return [items[offset:offset + wave_size] for offset in range(0, len(items), wave_size)]
+
+
+class WaveRollout:
+    """
+    Outcome of a rolling-wave run.
+    `succeeded`, `failed` and `not_run` partition the items (each in item
+    order within its wave); `aborted` is set when the failure limit was
+    exceeded and the remaining waves were skipped.
+    """
+    
+    def __init__(self, wave_count: int):
+        self.wave_count = wave_count
+        self.waves_run = 0
+        self.succeeded: List[Any] = []
+        self.failed: List[Any] = []
+        self.not_run: List[Any] = []
+        self.aborted = False
+
+
+def run_waves(items: List[Any], wave_size: int,
+              run_wave: Callable[[List[Any]], List[bool]],
+              health_gate: Optional[Callable[[List[Any]], List[bool]]] = None,
+              max_failures: int = DEFAULT_MAX_FAILURES,
+              log: Callable[[str], None] = print) -> WaveRollout:
+    """
+    Act on `items` in consecutive waves of `wave_size`.
+    `run_wave(wave)` acts on every item of the wave (normally concurrently)
+    and returns one success flag per item, in order. `health_gate(items)` is
+    then called with the wave's successful items and likewise returns one
+    health flag per item, in order; unhealthy items count as failed. Once
+    more than `max_failures` items have failed, no further wave is started.
+    Returns a WaveRollout.
+    """
+    waves = split_waves(items, wave_size)
+    rollout = WaveRollout(len(waves))
+    start = time.monotonic()
+    
+    for number, wave in enumerate(waves, 1):
+        log("\n" + "=" * 60)
+        log(f"WAVE {number}/{len(waves)}: {len(wave)} systems")
+        log("=" * 60)
+        
+        flags = run_wave(wave)
+        succeeded = [item for item, success in zip(wave, flags) if success]
+        failed = [item for item, success in zip(wave, flags) if not success]
+        
+        if health_gate is not None and succeeded:
+            healthy = health_gate(succeeded)
+            failed.extend(item for item, ok in zip(succeeded, healthy) if not ok)
+            succeeded = [item for item, ok in zip(succeeded, healthy) if ok]
+        
+        rollout.waves_run = number
+        rollout.succeeded.extend(succeeded)
+        rollout.failed.extend(failed)
+        log(f"\nWave {number}/{len(waves)}: {len(succeeded)} succeeded, {len(failed)} failed "
+            f"({len(rollout.failed)} failed in total, {time.monotonic() - start:.0f}s elapsed)")
+        
+        remaining = waves[number:]
+        if remaining and len(rollout.failed) > max_failures:
+            rollout.aborted = True
+            rollout.not_run = [item for later_wave in remaining for item in later_wave]
+            log(f"✗ Stopping: {len(rollout.failed)} failed systems exceed the limit of {max_failures}; "
+                f"{len(rollout.not_run)} systems in {len(remaining)} later waves were not started")
+            break
+    
+    return rollout